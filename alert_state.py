@@ -0,0 +1,173 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+
+class AlertStateStore:
+    """
+    État persistant des alertes (SQLite) : cooldowns et dernier état MA
+
+    Les écritures sont gardées en mémoire puis écrites par lot toutes les
+    `flush_interval` secondes par un thread d'arrière-plan (write-behind) :
+    la boucle de surveillance ne fait jamais d'écriture disque. Au
+    redémarrage, les cooldowns et états sont relus et les alertes reprennent
+    dès le premier cycle.
+    """
+
+    def __init__(self, db_file: str = "alert_state.db", flush_interval: float = 5.0):
+        """
+        Args:
+            db_file: Fichier SQLite
+            flush_interval: Délai max avant écriture des changements (secondes)
+        """
+        self.db_file = db_file
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending_cooldowns: Dict[Tuple[str, str], float] = {}
+        self._pending_states: Dict[Tuple[str, str, str], Dict] = {}
+        self._states: Dict[Tuple[str, str, str], Dict] = {}
+        self._stopping = threading.Event()
+
+        self._init_db()
+        self._load_states()
+
+        self._flusher = threading.Thread(target=self._run, daemon=True, name="alert-state-flush")
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _init_db(self):
+        """Crée les tables si nécessaire"""
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS cooldowns (
+                    monitor TEXT NOT NULL,
+                    alert_key TEXT NOT NULL,
+                    sent_at REAL NOT NULL,
+                    PRIMARY KEY (monitor, alert_key)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ma_state (
+                    symbol TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    system TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (symbol, timeframe, system)
+                )
+            """)
+            self._conn.commit()
+
+    def _load_states(self):
+        with self._db_lock:
+            rows = self._conn.execute("SELECT symbol, timeframe, system, state FROM ma_state").fetchall()
+        self._states = {(symbol, tf, system): json.loads(state) for symbol, tf, system, state in rows}
+
+    def load_cooldowns(self, monitor: str) -> Dict[str, datetime]:
+        """Cooldowns enregistrés d'un moniteur ({alert_key: datetime d'envoi})"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT alert_key, sent_at FROM cooldowns WHERE monitor = ?", (monitor,)
+            ).fetchall()
+        history = {key: datetime.fromtimestamp(sent_at) for key, sent_at in rows}
+
+        with self._pending_lock:
+            for (pending_monitor, key), sent_at in self._pending_cooldowns.items():
+                if pending_monitor == monitor:
+                    history[key] = datetime.fromtimestamp(sent_at)
+        return history
+
+    def mark_sent(self, monitor: str, alert_key: str, sent_at: datetime):
+        """Enregistre l'envoi d'une alerte (écrit au prochain flush)"""
+        with self._pending_lock:
+            self._pending_cooldowns[(monitor, alert_key)] = sent_at.timestamp()
+
+    def get_ma_state(self, symbol: str, timeframe: str, system: str) -> Optional[Dict]:
+        """Dernier état MA évalué d'une série"""
+        with self._pending_lock:
+            return self._states.get((symbol, timeframe, system))
+
+    def set_ma_state(self, symbol: str, timeframe: str, system: str, state: Dict):
+        """
+        Enregistre le dernier état MA évalué
+
+        Args:
+            state: Dict sérialisable en JSON (bougie, valeurs, ordre, alignement)
+        """
+        key = (symbol, timeframe, system)
+        with self._pending_lock:
+            if self._states.get(key) == state:
+                return
+            self._states[key] = state
+            self._pending_states[key] = state
+
+    def has_ma_state(self) -> bool:
+        """True si au moins une série a déjà été évaluée (warm-up inutile)"""
+        with self._pending_lock:
+            return bool(self._states)
+
+    def flush(self):
+        """Écrit les changements en attente"""
+        with self._pending_lock:
+            cooldowns, self._pending_cooldowns = self._pending_cooldowns, {}
+            states, self._pending_states = self._pending_states, {}
+
+        if not cooldowns and not states:
+            return
+
+        now = time.time()
+        try:
+            with self._db_lock:
+                try:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO cooldowns (monitor, alert_key, sent_at) VALUES (?, ?, ?)",
+                        [(monitor, key, sent_at) for (monitor, key), sent_at in cooldowns.items()]
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO ma_state (symbol, timeframe, system, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        [(symbol, tf, system, json.dumps(state), now) for (symbol, tf, system), state in states.items()]
+                    )
+                    self._conn.commit()
+                except sqlite3.Error:
+                    self._conn.rollback()
+                    raise
+        except Exception:
+            # Écriture échouée : changements remis en attente (sans écraser les plus récents)
+            with self._pending_lock:
+                for key, sent_at in cooldowns.items():
+                    self._pending_cooldowns.setdefault(key, sent_at)
+                for key, state in states.items():
+                    self._pending_states.setdefault(key, state)
+            raise
+
+    def prune_cooldowns(self, monitor: str, max_age_seconds: float):
+        """Supprime les cooldowns expirés d'un moniteur"""
+        with self._db_lock:
+            self._conn.execute(
+                "DELETE FROM cooldowns WHERE monitor = ? AND sent_at < ?",
+                (monitor, time.time() - max_age_seconds)
+            )
+            self._conn.commit()
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Erreur écriture état des alertes: {e}")
+
+    def close(self):
+        """Écrit les derniers changements et ferme la base"""
+        self._stopping.set()
+        self._flusher.join(timeout=self.flush_interval)
+        self.flush()
+        atexit.unregister(self.flush)
+        with self._db_lock:
+            self._conn.close()
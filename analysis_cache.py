@@ -0,0 +1,98 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from intervals import interval_to_ms, next_candle_close, normalize_interval
+
+# Délai après la clôture avant de considérer la nouvelle bougie disponible (secondes)
+SETTLE_SECONDS = {
+    'binance': 2,
+    'yahoo': 60,
+}
+
+
+class AnalysisCache:
+    """
+    Cache des résultats d'analyse par (source, symbole, interval)
+
+    Une entrée est valide jusqu'à la prochaine clôture de bougie de son
+    interval. Expirée, elle reste servie pendant une durée d'interval
+    (stale-while-revalidate) pendant qu'un rafraîchissement tourne en tâche
+    de fond ; les demandes simultanées d'une même clé partagent un seul calcul.
+    """
+
+    def __init__(self, max_entries: int = 500):
+        """
+        Args:
+            max_entries: Nombre max de résultats conservés (les moins récents sont retirés)
+        """
+        self.max_entries = max_entries
+        # {clé: {'result': Dict, 'expires': float, 'stale_until': float}}
+        self._entries: 'OrderedDict[Tuple[str, str, str], Dict]' = OrderedDict()
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0}
+
+    async def get(self, source: str, symbol: str, interval: str,
+                  compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        """
+        Résultat en cache, ou calculé par `compute` (coroutine sans argument)
+
+        Seuls les résultats 'status' == 'success' sont mis en cache.
+        """
+        key = (source, symbol, normalize_interval(interval))
+        entry = self._entries.get(key)
+        now = time.time()
+
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if now < entry['expires']:
+                self.stats['hits'] += 1
+                return entry['result']
+            if now < entry['stale_until']:
+                self.stats['stale_hits'] += 1
+                self._refresh(key, compute)
+                return entry['result']
+
+        self.stats['misses'] += 1
+        return await asyncio.shield(self._refresh(key, compute))
+
+    def _refresh(self, key: Tuple[str, str, str], compute: Callable[[], Awaitable[Dict]]) -> asyncio.Task:
+        """Lance (une seule fois par clé) le calcul d'une entrée"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, compute))
+            self._inflight[key] = task
+        return task
+
+    async def _compute(self, key: Tuple[str, str, str], compute: Callable[[], Awaitable[Dict]]) -> Dict:
+        try:
+            result = await compute()
+            if result.get('status') == 'success':
+                self._store(key, result)
+            return result
+        except Exception as e:
+            # Même format que analyze_symbol (un rafraîchissement en tâche de fond ne doit pas lever)
+            return {'status': 'error', 'message': str(e), 'symbol': key[1]}
+        finally:
+            del self._inflight[key]
+
+    def _store(self, key: Tuple[str, str, str], result: Dict):
+        source, _, interval = key
+        close = next_candle_close(source, interval).timestamp() + SETTLE_SECONDS.get(source, 0)
+        self._entries[key] = {
+            'result': result,
+            'expires': close,
+            'stale_until': close + interval_to_ms(interval) / 1000
+        }
+        self._entries.move_to_end(key)
+        self.stats['refreshes'] += 1
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, source: Optional[str] = None, symbol: Optional[str] = None):
+        """Supprime les entrées d'une source et/ou d'un symbole (toutes par défaut)"""
+        for key in list(self._entries):
+            if (source is None or key[0] == source) and (symbol is None or key[1] == symbol):
+                del self._entries[key]
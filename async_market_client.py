@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+import numpy as np
+
+from binance_weight import ENDPOINT_WEIGHTS, kline_weight, weight_tracker
+from kline_parser import parse_klines
+from metrics import metrics
+
+BINANCE_API_URL = "https://api.binance.com"
+
+
+class AsyncBinanceAPIError(Exception):
+    """Erreur renvoyée par l'API REST Binance"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Binance HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class AsyncBinanceClient:
+    """
+    Client REST Binance asynchrone (session HTTP keep-alive partagée)
+
+    Les méthodes reprennent les noms et paramètres de python-binance
+    (get_klines, get_ticker, get_exchange_info) pour être interchangeables.
+    Chaque requête passe par le suivi de poids partagé (binance_weight).
+    """
+
+    def __init__(self, base_url: str = BINANCE_API_URL, max_connections: int = 20,
+                 max_per_host: int = 10, timeout: float = 10, max_retries: int = 3):
+        """
+        Args:
+            base_url: URL de l'API REST
+            max_connections: Connexions simultanées max (pool)
+            max_per_host: Connexions simultanées max vers un même hôte
+            timeout: Timeout total d'une requête (secondes)
+            max_retries: Nouvelles tentatives sur erreur réseau ou 5xx
+        """
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=min(timeout, 5))
+        self.max_retries = max_retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Session créée à la première requête, dans la boucle qui l'utilise"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_per_host,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_per_host)
+        return self._session
+
+    async def _request(self, path: str, params: Optional[Dict] = None, weight: int = 1,
+                       priority: str = 'high', raw: bool = False):
+        """
+        GET JSON avec nouvelles tentatives (erreurs réseau, 5xx)
+
+        Args:
+            weight: Poids Binance de la requête
+            priority: 'high' (commandes) ou 'low' (cycles de surveillance, peuvent être retardés)
+            raw: Retourner le corps brut (bytes) sans décoder le JSON
+        """
+        session = await self._get_session()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        url = f"{self.base_url}{path}"
+
+        for attempt in range(self.max_retries + 1):
+            await weight_tracker.acquire_async(weight, priority)
+            try:
+                async with self._semaphore:
+                    started = time.perf_counter()
+                    async with session.get(url, params=params) as response:
+                        weight_tracker.record_headers(response.headers, response.status)
+
+                        if response.status == 200:
+                            data = await response.read() if raw else await response.json(content_type=None)
+                            metrics.observe('fetch_seconds', time.perf_counter() - started, source='binance_async')
+                            return data
+
+                        text = await response.text()
+                        # 429/418 : pas de nouvelle tentative, le suivi de poids suspend les requêtes
+                        if response.status < 500 or attempt == self.max_retries:
+                            raise AsyncBinanceAPIError(response.status, text[:200])
+
+                        delay = 2 ** attempt
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 2 ** attempt
+                print(f"⚠️ Binance async {path} - tentative {attempt + 1}/{self.max_retries}: {e}")
+
+            await asyncio.sleep(delay)
+
+    async def get_klines(self, symbol: str, interval: str, limit: int = 500,
+                         startTime: Optional[int] = None, endTime: Optional[int] = None,
+                         priority: str = 'high') -> List[list]:
+        """Klines d'un symbole (format brut Binance, 12 colonnes)"""
+        return await self._request('/api/v3/klines', {
+            'symbol': symbol,
+            'interval': interval,
+            'limit': limit,
+            'startTime': startTime,
+            'endTime': endTime
+        }, weight=kline_weight(limit), priority=priority)
+
+    async def get_klines_matrix(self, symbol: str, interval: str, limit: int = 500,
+                                startTime: Optional[int] = None, endTime: Optional[int] = None,
+                                priority: str = 'high') -> np.ndarray:
+        """Klines décodées depuis la réponse brute (matrice float64 bougies x 12, voir kline_parser)"""
+        payload = await self._request('/api/v3/klines', {
+            'symbol': symbol,
+            'interval': interval,
+            'limit': limit,
+            'startTime': startTime,
+            'endTime': endTime
+        }, weight=kline_weight(limit), priority=priority, raw=True)
+        return parse_klines(payload)
+
+    async def get_ticker(self, symbol: str, priority: str = 'high') -> Dict:
+        """Statistiques 24h d'un symbole"""
+        return await self._request('/api/v3/ticker/24hr', {'symbol': symbol},
+                                   weight=ENDPOINT_WEIGHTS['ticker_24hr'], priority=priority)
+
+    async def get_exchange_info(self, priority: str = 'high') -> Dict:
+        """Informations de l'exchange (liste des symboles)"""
+        return await self._request('/api/v3/exchangeInfo',
+                                   weight=ENDPOINT_WEIGHTS['exchange_info'], priority=priority)
+
+    async def close(self):
+        """Ferme la session HTTP"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,103 @@
+import bisect
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence
+
+# Discord n'affiche que 25 suggestions par option
+MAX_CHOICES = 25
+
+# Borne supérieure des entrées commençant par un préfixe donné
+_PREFIX_END = '\U0010ffff'
+
+
+class AutocompleteIndex:
+    """
+    Suggestions d'autocomplétion filtrées par préfixe (index trié en mémoire)
+
+    Chaque source est un niveau de priorité (ex : symboles configurés, puis
+    univers Binance). Une source n'est retriée que lorsque sa liste change ;
+    une requête coûte une recherche bisect par source plus les 25 entrées
+    retournées, quelle que soit la taille des listes.
+
+    Classement : correspondance exacte, usages récents, puis ordre
+    alphabétique des sources dans leur ordre de priorité.
+    """
+
+    def __init__(self, *sources: Callable[[], Sequence[str]], recent_size: int = 100):
+        """
+        Args:
+            sources: Fonctions retournant les entrées possibles, par priorité décroissante
+                (une liste retournée n'est pas modifiée ensuite : un changement passe par
+                une nouvelle liste, la même liste est reconnue sans comparaison)
+            recent_size: Nombre d'entrées utilisées récemment conservées
+        """
+        self.sources = sources
+        self.recent_size = recent_size
+        # Dernière liste vue par source et entrées triées correspondantes
+        self._snapshots: List[Optional[Sequence[str]]] = [None] * len(sources)
+        self._sorted: List[List[str]] = [[] for _ in sources]
+        self._members: List[set] = [set() for _ in sources]
+        # Entrées utilisées, de la plus ancienne à la plus récente
+        self._recent: OrderedDict = OrderedDict()
+
+    def _refresh(self):
+        """Retrie les sources dont la liste a changé depuis la dernière requête"""
+        for position, source in enumerate(self.sources):
+            entries = source()
+            previous = self._snapshots[position]
+            if entries is previous or entries == previous:
+                continue
+            normalized = {entry.upper() for entry in entries}
+            self._snapshots[position] = entries
+            self._sorted[position] = sorted(normalized)
+            self._members[position] = normalized
+
+    def _contains(self, entry: str) -> bool:
+        return any(entry in members for members in self._members)
+
+    def record(self, value: Optional[str]):
+        """Enregistre une entrée utilisée (remonte dans les suggestions suivantes)"""
+        if not value:
+            return
+        value = str(value).upper().strip()
+        self._recent.pop(value, None)
+        self._recent[value] = None
+        while len(self._recent) > self.recent_size:
+            self._recent.popitem(last=False)
+
+    def complete(self, value: Optional[str], limit: int = MAX_CHOICES) -> List[str]:
+        """
+        Suggestions pour la saisie en cours
+
+        Args:
+            value: Texte saisi (ctx.value, éventuellement vide)
+            limit: Nombre max de suggestions
+
+        Returns:
+            Entrées commençant par la saisie (insensible à la casse)
+        """
+        self._refresh()
+        query = (value or '').upper().strip()
+        results: List[str] = []
+        seen = set()
+
+        def add(entry: str) -> bool:
+            if entry not in seen:
+                seen.add(entry)
+                results.append(entry)
+            return len(results) >= limit
+
+        if query and self._contains(query) and add(query):
+            return results
+
+        for entry in reversed(self._recent):
+            if entry.startswith(query) and self._contains(entry) and add(entry):
+                return results
+
+        for entries in self._sorted:
+            start = bisect.bisect_left(entries, query)
+            end = bisect.bisect_left(entries, query + _PREFIX_END, start)
+            for entry in entries[start:min(end, start + limit + len(seen))]:
+                if add(entry):
+                    return results
+
+        return results
@@ -0,0 +1,147 @@
+import argparse
+import gzip
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Fixtures enregistrées (python -m benchmarks.fixtures)
+DEFAULT_FIXTURE_FILE = os.path.join(os.path.dirname(__file__), "fixtures", "market.json.gz")
+
+# Séries enregistrées : intervals Binance (1000 bougies max par requête) et historiques Yahoo
+BINANCE_INTERVALS = ['15m', '1h', '4h', '1d']
+BINANCE_LIMIT = 1000
+YAHOO_HISTORIES = {
+    '1h': '730d',
+    '1d': 'max',
+}
+
+DEFAULT_CRYPTOS = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT', 'XRPUSDT', 'ADAUSDT', 'DOGEUSDT', 'AVAXUSDT']
+DEFAULT_STOCKS = ['AAPL', 'MSFT', 'NVDA', 'TSLA', 'AMZN', 'GOOGL', 'META', '^GSPC']
+
+INTERVAL_MS = {'15m': 15 * 60_000, '1h': 3_600_000, '4h': 4 * 3_600_000, '1d': 86_400_000}
+
+
+def _frame_to_json(df: pd.DataFrame) -> Dict:
+    """Historique Yahoo sérialisable (index ISO + colonnes OHLCV)"""
+    return {
+        'index': [ts.isoformat() for ts in df.index],
+        'columns': {col: df[col].astype(float).tolist() for col in ['Open', 'High', 'Low', 'Close', 'Volume']}
+    }
+
+
+def frame_from_json(data: Dict) -> pd.DataFrame:
+    """Historique Yahoo au format Ticker.history"""
+    index = pd.DatetimeIndex(pd.to_datetime(data['index'], utc=True)).tz_convert('America/New_York')
+    return pd.DataFrame(data['columns'], index=index)
+
+
+def record_fixtures(path: str = DEFAULT_FIXTURE_FILE, cryptos: Optional[List[str]] = None,
+                    stocks: Optional[List[str]] = None) -> Dict:
+    """
+    Enregistre des fixtures depuis Binance et Yahoo (seule étape qui utilise le réseau)
+
+    Args:
+        path: Fichier de sortie (JSON gzip)
+        cryptos: Symboles Binance
+        stocks: Symboles yfinance
+    """
+    from binance.client import Client
+    import yfinance as yf
+
+    cryptos = cryptos or DEFAULT_CRYPTOS
+    stocks = stocks or DEFAULT_STOCKS
+    client = Client()
+
+    fixtures = {'source': 'recorded', 'recorded_at': int(time.time() * 1000), 'binance': {}, 'yahoo': {}}
+    for symbol in cryptos:
+        fixtures['binance'][symbol] = {
+            interval: client.get_klines(symbol=symbol, interval=interval, limit=BINANCE_LIMIT)
+            for interval in BINANCE_INTERVALS
+        }
+        print(f"✅ Binance {symbol}")
+
+    for symbol in stocks:
+        ticker = yf.Ticker(symbol)
+        fixtures['yahoo'][symbol] = {
+            interval: _frame_to_json(ticker.history(period=period, interval=interval))
+            for interval, period in YAHOO_HISTORIES.items()
+        }
+        print(f"✅ Yahoo {symbol}")
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(fixtures, f)
+    print(f"💾 Fixtures enregistrées: {path} ({len(cryptos)} cryptos, {len(stocks)} actions)")
+    return fixtures
+
+
+def synthetic_fixtures(cryptos: int = 8, stocks: int = 8, seed: int = 42) -> Dict:
+    """
+    Fixtures déterministes au même format que les fixtures enregistrées
+
+    Utilisées quand aucun enregistrement n'est disponible (CI, machine sans réseau).
+    """
+    rng = np.random.RandomState(seed)
+    now_ms = int(time.time() * 1000)
+    fixtures = {'source': 'synthetic', 'recorded_at': now_ms, 'binance': {}, 'yahoo': {}}
+
+    for i in range(cryptos):
+        series = {}
+        for interval in BINANCE_INTERVALS:
+            step = INTERVAL_MS[interval]
+            closes = 100 * (i + 1) * np.exp(np.cumsum(rng.normal(0, 0.01, BINANCE_LIMIT)))
+            opens = np.concatenate(([closes[0]], closes[:-1]))
+            volumes = rng.lognormal(10, 0.5, BINANCE_LIMIT)
+            first = (now_ms // step - BINANCE_LIMIT + 1) * step
+            series[interval] = [
+                [first + k * step, f"{o:.8f}", f"{max(o, c) * 1.002:.8f}", f"{min(o, c) * 0.998:.8f}", f"{c:.8f}",
+                 f"{v:.8f}", first + (k + 1) * step - 1, f"{v * c:.8f}", int(v) % 5000, f"{v / 2:.8f}",
+                 f"{v * c / 2:.8f}", "0"]
+                for k, (o, c, v) in enumerate(zip(opens, closes, volumes))
+            ]
+        fixtures['binance'][f"SYN{i}USDT"] = series
+
+    for i in range(stocks):
+        series = {}
+        for interval, periods, freq in (('1h', 730 * 7, 'h'), ('1d', 2500, 'B')):
+            index = pd.date_range(end=pd.Timestamp.now(tz='America/New_York').floor('h'), periods=periods, freq=freq)
+            closes = 50 * (i + 1) * np.exp(np.cumsum(rng.normal(0, 0.01, periods)))
+            df = pd.DataFrame({
+                'Open': closes * (1 + rng.normal(0, 0.002, periods)),
+                'High': closes * 1.005,
+                'Low': closes * 0.995,
+                'Close': closes,
+                'Volume': rng.lognormal(14, 0.4, periods),
+            }, index=index)
+            series[interval] = _frame_to_json(df)
+        fixtures['yahoo'][f"SYN{i}"] = series
+
+    return fixtures
+
+
+def load_fixtures(path: str = DEFAULT_FIXTURE_FILE) -> Dict:
+    """
+    Fixtures enregistrées si le fichier existe, synthétiques sinon
+
+    Aucun enregistrement n'est versionné : par défaut les benchmarks tournent sur
+    synthetic_fixtures(). Enregistrer avec python -m benchmarks.fixtures (réseau requis).
+    """
+    if os.path.exists(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    print(f"⚠️ Aucune fixture enregistrée ({path}) - données synthétiques")
+    return synthetic_fixtures()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enregistre les fixtures de benchmark (Binance + Yahoo)")
+    parser.add_argument('--output', default=DEFAULT_FIXTURE_FILE)
+    parser.add_argument('--crypto', nargs='*', default=DEFAULT_CRYPTOS)
+    parser.add_argument('--stocks', nargs='*', default=DEFAULT_STOCKS)
+    args = parser.parse_args()
+    record_fixtures(args.output, args.crypto, args.stocks)
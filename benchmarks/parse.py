@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from candle_store import INT_COLUMNS
+from candles import CandleSeries
+from kline_parser import parse_candles, parse_klines
+from benchmarks.fixtures import DEFAULT_FIXTURE_FILE, load_fixtures
+
+KEY = ('binance', 'BENCH', '1h')
+
+
+def _rows_from_lists(klines: List[list]) -> List[tuple]:
+    """Lignes SQLite construites depuis des klines décodées par json (ancien CandleStore._upsert)"""
+    return [
+        KEY + (
+            int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]),
+            int(k[6]), float(k[7]), int(k[8]), float(k[9]), float(k[10])
+        )
+        for k in klines
+    ]
+
+
+def _rows_from_matrix(matrix: np.ndarray) -> List[tuple]:
+    """Lignes SQLite construites depuis la matrice de kline_parser (CandleStore._upsert)"""
+    columns = [
+        matrix[:, i].astype(np.int64).tolist() if i in INT_COLUMNS else matrix[:, i].tolist()
+        for i in range(11)
+    ]
+    return [KEY + row for row in zip(*columns)]
+
+
+def _dataframe(klines: List[list]) -> pd.DataFrame:
+    """DataFrame 12 colonnes converti par astype (analyseurs avant CandleSeries)"""
+    df = pd.DataFrame(klines, columns=[
+        'timestamp', 'open', 'high', 'low', 'close', 'volume',
+        'close_time', 'quote_volume', 'trades', 'taker_buy_base', 'taker_buy_quote', 'ignore'
+    ])
+    df[['open', 'high', 'low', 'close', 'volume', 'quote_volume']] = \
+        df[['open', 'high', 'low', 'close', 'volume', 'quote_volume']].astype(float)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df.set_index('timestamp')
+
+
+# (nom, fonction appliquée au corps brut de la réponse)
+DECODERS = [
+    ('json -> lignes SQLite', lambda payload: _rows_from_lists(json.loads(payload))),
+    ('octets -> lignes SQLite', lambda payload: _rows_from_matrix(parse_klines(payload))),
+    ('json -> DataFrame', lambda payload: _dataframe(json.loads(payload))),
+    ('json -> CandleSeries', lambda payload: CandleSeries.from_klines(json.loads(payload))),
+    ('octets -> matrice', parse_klines),
+    ('octets -> CandleSeries', parse_candles),
+]
+
+
+def _payloads(fixtures: Dict) -> List[bytes]:
+    """Réponses HTTP reconstituées (JSON compact, comme l'API Binance)"""
+    return [
+        json.dumps(klines, separators=(',', ':')).encode()
+        for series in fixtures['binance'].values()
+        for klines in series.values()
+    ]
+
+
+def run_parse_benchmarks(payloads: List[bytes], repeat: int = 20,
+                         decoders: Optional[List[tuple]] = None) -> List[Dict]:
+    """Meilleure durée moyenne par réponse de chaque décodeur (µs)"""
+    decoders = decoders or DECODERS
+    size = sum(len(payload) for payload in payloads)
+    klines = sum(len(json.loads(payload)) for payload in payloads)
+    results = []
+
+    for name, decode in decoders:
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for payload in payloads:
+                decode(payload)
+            best = min(best, time.perf_counter() - started)
+        result = {
+            'decoder': name,
+            'us_per_response': round(best / len(payloads) * 1e6, 1),
+            'ns_per_kline': round(best / klines * 1e9, 1),
+            'mb_per_second': round(size / best / 1e6, 1),
+        }
+        results.append(result)
+        print(f"⏱️ {name:<26} {result['us_per_response']:9.1f} µs/réponse  "
+              f"{result['ns_per_kline']:7.1f} ns/kline  {result['mb_per_second']:6.1f} Mo/s")
+    return results
+
+
+def _check(payloads: List[bytes]):
+    """Les deux chemins doivent produire exactement les mêmes bougies"""
+    for payload in payloads:
+        expected = CandleSeries.from_klines(json.loads(payload))
+        parsed = parse_candles(payload)
+        for column in ('open_time', 'close_time', 'open', 'high', 'low', 'close', 'volume', 'quote_volume'):
+            if not np.array_equal(getattr(expected, column), getattr(parsed, column)):
+                raise AssertionError(f"Colonne {column} différente entre json et kline_parser")
+        if _rows_from_lists(json.loads(payload)) != _rows_from_matrix(parse_klines(payload)):
+            raise AssertionError("Lignes SQLite différentes entre json et kline_parser")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark du décodage des réponses klines")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURE_FILE)
+    args = parser.parse_args(argv)
+
+    payloads = _payloads(load_fixtures(args.fixtures))
+    _check(payloads)
+    print(f"📦 {len(payloads)} réponses, {sum(len(p) for p in payloads) / 1e6:.1f} Mo")
+    run_parse_benchmarks(payloads, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
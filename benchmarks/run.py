@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_state import AlertStateStore
+from candle_store import CandleStore
+from ma_alerts import MAAlertMonitor
+from market_analysis import BinanceMarketAnalyzer, YFinanceMarketAnalyzer
+from volume_monitor import VolumeMonitor
+from benchmarks.fixtures import DEFAULT_FIXTURE_FILE, load_fixtures
+from benchmarks.standins import FixtureAsyncClient, FixtureMarket, NullDispatcher, replay
+
+DEFAULT_SCALES = [10, 100, 1000]
+DEFAULT_OUTPUT = "bench_results.json"
+
+
+class BenchEnvironment:
+    """Moniteurs et analyseurs branchés sur les fixtures, dans un répertoire temporaire"""
+
+    def __init__(self, market: FixtureMarket, scale: int):
+        self.market = market
+        self.directory = tempfile.mkdtemp(prefix="bench_")
+        self.cryptos = market.crypto_symbols(scale)
+        self.stocks = market.stock_symbols(scale)
+
+        self.candle_store = CandleStore(os.path.join(self.directory, "candles.db"), max_age_seconds=0)
+        self.state_store = AlertStateStore(os.path.join(self.directory, "alert_state.db"))
+        self.dispatcher = NullDispatcher()
+        async_client = FixtureAsyncClient(market)
+
+        self.ma_monitor = MAAlertMonitor(os.path.join(self.directory, "ma_alerts_config.json"),
+                                         candle_store=self.candle_store, async_client=async_client,
+                                         dispatcher=self.dispatcher, state_store=self.state_store)
+        self.ma_monitor.config['assets'] = {'crypto': self.cryptos, 'stocks': self.stocks}
+        self.ma_monitor.set_webhook_url("https://discord.invalid/webhook")
+
+        self.volume_monitor = VolumeMonitor(os.path.join(self.directory, "volume_config.json"),
+                                            candle_store=self.candle_store, async_client=async_client,
+                                            dispatcher=self.dispatcher, state_store=self.state_store)
+        self.volume_monitor.config['assets'] = {'crypto': self.cryptos, 'stocks': self.stocks}
+        self.volume_monitor.set_webhook_url("https://discord.invalid/webhook")
+
+        self.crypto_analyzer = BinanceMarketAnalyzer(candle_store=self.candle_store, async_client=async_client)
+        self.stock_analyzer = YFinanceMarketAnalyzer()
+
+    def stages(self) -> List[tuple]:
+        """(nom, préparation non mesurée, étape mesurée) dans l'ordre d'exécution"""
+        ma = self.ma_monitor
+
+        def reset_cooldowns():
+            ma.alert_history.clear()
+
+        return [
+            # Premier cycle : stockage vide, historique complet, warm-up silencieux
+            ('ma_cycle_cold', None, lambda: ma.check_all_assets(silent_mode=True)),
+            # Cycle complet sur stockage chaud : MA incrémentales, alertes et embeds
+            ('ma_cycle_warm', reset_cooldowns, lambda: ma.check_all_assets(force=True)),
+            # Aucune nouvelle bougie : séries ignorées
+            ('ma_cycle_unchanged', None, lambda: ma.check_all_assets()),
+            ('ma_cycle_async', reset_cooldowns, lambda: asyncio.run(ma.check_all_assets_async(force=True))),
+            ('volume_cycle', None, lambda: self.volume_monitor.check_all_assets()),
+            ('volume_status', None, lambda: self.volume_monitor.get_current_status()),
+            ('crypto_analyze', None, lambda: [self.crypto_analyzer.analyze_symbol(s, '1d') for s in self.cryptos]),
+            ('stock_analyze', None, lambda: [self.stock_analyzer.analyze_symbol(s, '1d') for s in self.stocks]),
+        ]
+
+    def close(self):
+        self.state_store.close()
+        self.candle_store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _measure(market: FixtureMarket, func: Callable, verbose: bool) -> Dict:
+    """Durée et requêtes rejouées d'une étape"""
+    before = dict(market.requests)
+    started = time.perf_counter()
+    if verbose:
+        func()
+    else:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            func()
+    return {
+        'seconds': time.perf_counter() - started,
+        'binance_requests': market.requests['binance'] - before['binance'],
+        'yahoo_requests': market.requests['yahoo'] - before['yahoo'],
+    }
+
+
+def run_benchmarks(fixtures: Dict, scales: List[int], repeat: int = 3,
+                   only: Optional[List[str]] = None, verbose: bool = False) -> List[Dict]:
+    """
+    Mesure chaque étape à chaque échelle
+
+    Chaque répétition repart d'un environnement neuf (stockage vide) : le
+    cycle à froid reste comparable d'une répétition à l'autre.
+    """
+    results = []
+    for scale in scales:
+        runs: Dict[str, List[Dict]] = {}
+        for _ in range(repeat):
+            market = FixtureMarket(fixtures)
+            with replay(market):
+                env = BenchEnvironment(market, scale)
+                try:
+                    for name, setup, func in env.stages():
+                        if only and name not in only:
+                            continue
+                        if setup:
+                            setup()
+                        env.dispatcher.sent = 0
+                        measure = _measure(market, func, verbose)
+                        measure['embeds'] = env.dispatcher.sent
+                        runs.setdefault(name, []).append(measure)
+                finally:
+                    env.close()
+
+        for name, measures in runs.items():
+            durations = [m['seconds'] for m in measures]
+            median = statistics.median(durations)
+            result = {
+                'stage': name,
+                'scale': scale,
+                'runs': [round(d, 6) for d in durations],
+                'min': round(min(durations), 6),
+                'median': round(median, 6),
+                'per_symbol_ms': round(median / scale * 1000, 4),
+                'binance_requests': measures[-1]['binance_requests'],
+                'yahoo_requests': measures[-1]['yahoo_requests'],
+                'embeds': measures[-1]['embeds'],
+            }
+            results.append(result)
+            print(f"⏱️ {name:<20} x{scale:<5} médiane {median * 1000:10.1f} ms  "
+                  f"({result['per_symbol_ms']:.2f} ms/symbole, {result['binance_requests']} req. Binance)")
+    return results
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[Dict]:
+    """Étapes dont la médiane dépasse celle de la référence de plus de `tolerance`"""
+    reference = {(r['stage'], r['scale']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = reference.get((result['stage'], result['scale']))
+        if not before or before['median'] <= 0:
+            continue
+        ratio = result['median'] / before['median']
+        if ratio > 1 + tolerance:
+            regressions.append({'stage': result['stage'], 'scale': result['scale'],
+                                'baseline': before['median'], 'median': result['median'],
+                                'ratio': round(ratio, 3)})
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne des cycles de surveillance et des analyses")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', nargs='*', help="Étapes à mesurer (toutes par défaut)")
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURE_FILE)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Résultats JSON ('-' : sortie standard)")
+    parser.add_argument('--baseline', help="Résultats JSON de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Ralentissement toléré (0.25 = +25%%)")
+    parser.add_argument('--verbose', action='store_true', help="Afficher les logs des moniteurs")
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures)
+    results = run_benchmarks(fixtures, args.scales, args.repeat, args.stages, args.verbose)
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'fixtures': {
+            'source': fixtures.get('source', 'recorded'),
+            'crypto': len(fixtures['binance']),
+            'stocks': len(fixtures['yahoo']),
+        },
+        'repeat': args.repeat,
+        'results': results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = compare(results, json.load(f), args.tolerance)
+        for regression in report['regressions']:
+            print(f"❌ Régression {regression['stage']} x{regression['scale']}: "
+                  f"{regression['baseline'] * 1000:.1f} ms → {regression['median'] * 1000:.1f} ms "
+                  f"(x{regression['ratio']})")
+        exit_code = 1 if report['regressions'] else 0
+
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Résultats: {args.output}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+import bisect
+import json
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from binance.client import Client
+
+from benchmarks.fixtures import INTERVAL_MS, frame_from_json
+from kline_parser import parse_klines
+
+
+class FixtureMarket:
+    """
+    Marché rejoué depuis des fixtures
+
+    Les grandes échelles utilisent des symboles virtuels (BENCH0042USDT,
+    BENCH0042) qui rejouent les séries enregistrées à tour de rôle. Les
+    klines sont décalées pour que la dernière bougie soit la bougie en cours :
+    le stockage local et la détection de clôture se comportent comme en direct.
+    """
+
+    def __init__(self, fixtures: Dict, now_ms: Optional[int] = None):
+        self.fixtures = fixtures
+        self.now_ms = now_ms or int(pd.Timestamp.now(tz='UTC').timestamp() * 1000)
+        self._crypto_sources = sorted(fixtures['binance'])
+        self._stock_sources = sorted(fixtures['yahoo'])
+        self._symbols: Dict[str, str] = {}   # Symbole virtuel -> symbole enregistré
+        self._klines: Dict[tuple, List[list]] = {}
+        self._opens: Dict[tuple, List[int]] = {}
+        self._frames: Dict[tuple, pd.DataFrame] = {}
+        self.requests = {'binance': 0, 'yahoo': 0}
+
+    def crypto_symbols(self, count: int) -> List[str]:
+        symbols = [f"BENCH{i:04d}USDT" for i in range(count)]
+        for i, symbol in enumerate(symbols):
+            self._symbols[symbol] = self._crypto_sources[i % len(self._crypto_sources)]
+        return symbols
+
+    def stock_symbols(self, count: int) -> List[str]:
+        symbols = [f"BENCH{i:04d}" for i in range(count)]
+        for i, symbol in enumerate(symbols):
+            self._symbols[symbol] = self._stock_sources[i % len(self._stock_sources)]
+        return symbols
+
+    def _source(self, symbol: str) -> str:
+        return self._symbols.get(symbol, symbol)
+
+    def _series(self, symbol: str, interval: str) -> tuple:
+        key = (self._source(symbol), interval)
+        if key not in self._klines:
+            if key[0] not in self.fixtures['binance'] or interval not in self.fixtures['binance'][key[0]]:
+                raise ValueError(f"Pas de fixture Binance pour {symbol} {interval}")
+            raw = self.fixtures['binance'][key[0]][interval]
+            step = INTERVAL_MS[interval]
+            shift = (self.now_ms // step) * step - raw[-1][0]
+            klines = [[k[0] + shift] + k[1:6] + [k[6] + shift] + k[7:] for k in raw]
+            self._klines[key] = klines
+            self._opens[key] = [k[0] for k in klines]
+        return self._klines[key], self._opens[key]
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 500,
+                   startTime: Optional[int] = None, endTime: Optional[int] = None) -> List[list]:
+        """Mêmes règles de sélection que l'API Binance (startTime, endTime, limit)"""
+        self.requests['binance'] += 1
+        klines, opens = self._series(symbol, interval)
+        if startTime is not None:
+            start = bisect.bisect_left(opens, startTime)
+            end = bisect.bisect_right(opens, endTime) if endTime is not None else len(opens)
+            return klines[start:min(end, start + limit)]
+
+        end = bisect.bisect_right(opens, endTime) if endTime is not None else len(opens)
+        return klines[max(0, end - limit):end]
+
+    def get_ticker(self, symbol: str) -> Dict:
+        self.requests['binance'] += 1
+        last = self._series(symbol, '1h')[0][-1]
+        return {'symbol': symbol, 'lastPrice': last[4], 'volume': last[5]}
+
+    def history(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        """Historique Yahoo limité à la période demandée (format Ticker.history)"""
+        self.requests['yahoo'] += 1
+        key = (self._source(symbol), interval)
+        if key not in self._frames:
+            series = self.fixtures['yahoo'].get(key[0], {})
+            # 15m/5m non enregistrés : l'historique 1h les remplace
+            data = series.get(interval) or series.get('1h')
+            self._frames[key] = frame_from_json(data) if data else pd.DataFrame()
+
+        df = self._frames[key]
+        if df.empty or period == 'max':
+            return df.copy()
+
+        if period.endswith('mo'):
+            days = int(period[:-2]) * 30
+        elif period.endswith('y'):
+            days = int(period[:-1]) * 365
+        else:
+            days = int(period.rstrip('d'))
+        return df[df.index >= df.index[-1] - pd.Timedelta(days=days)].copy()
+
+
+class _Response:
+    """Dernière réponse du client (en-têtes lus par le suivi de poids)"""
+    status_code = 200
+    headers = {'X-MBX-USED-WEIGHT-1M': '1'}
+
+
+def fixture_client_class(market: FixtureMarket) -> type:
+    """Classe remplaçant binance.client.Client (instanciée sans argument par le code)"""
+
+    class FixtureClient:
+        KLINE_INTERVAL_5MINUTE = Client.KLINE_INTERVAL_5MINUTE
+        KLINE_INTERVAL_15MINUTE = Client.KLINE_INTERVAL_15MINUTE
+        KLINE_INTERVAL_1HOUR = Client.KLINE_INTERVAL_1HOUR
+        KLINE_INTERVAL_4HOUR = Client.KLINE_INTERVAL_4HOUR
+        KLINE_INTERVAL_1DAY = Client.KLINE_INTERVAL_1DAY
+
+        def __init__(self, *args, **kwargs):
+            self.response = _Response()
+
+        def get_klines(self, symbol: str, interval: str, limit: int = 500,
+                       startTime: Optional[int] = None, endTime: Optional[int] = None, **kwargs) -> List[list]:
+            return market.get_klines(symbol, interval, limit, startTime, endTime)
+
+        def get_ticker(self, symbol: str, **kwargs) -> Dict:
+            return market.get_ticker(symbol)
+
+    return FixtureClient
+
+
+class FixtureAsyncClient:
+    """Remplace AsyncBinanceClient (mêmes méthodes, sans réseau)"""
+
+    def __init__(self, market: FixtureMarket):
+        self.market = market
+
+    async def get_klines(self, symbol: str, interval: str, limit: int = 500,
+                         startTime: Optional[int] = None, endTime: Optional[int] = None,
+                         priority: str = 'high') -> List[list]:
+        return self.market.get_klines(symbol, interval, limit, startTime, endTime)
+
+    async def get_klines_matrix(self, symbol: str, interval: str, limit: int = 500,
+                                startTime: Optional[int] = None, endTime: Optional[int] = None,
+                                priority: str = 'high') -> np.ndarray:
+        """Klines rejouées sérialisées comme la réponse HTTP, puis décodées par kline_parser"""
+        klines = self.market.get_klines(symbol, interval, limit, startTime, endTime)
+        return parse_klines(json.dumps(klines).encode())
+
+    async def get_ticker(self, symbol: str, priority: str = 'high') -> Dict:
+        return self.market.get_ticker(symbol)
+
+    async def close(self):
+        pass
+
+
+class NullDispatcher:
+    """Remplace WebhookDispatcher : les embeds sont comptés, jamais envoyés"""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send(self, url: str, embed: Dict, label: Optional[str] = None):
+        self.sent += 1
+
+
+@contextmanager
+def replay(market: FixtureMarket):
+    """
+    Remplace Binance (Client) et Yahoo (yf.Ticker, yf.download) par les fixtures
+
+    Le budget de poids Binance est levé pendant la mesure : les fixtures
+    ne coûtent rien et l'attente d'une fenêtre fausserait les durées.
+    """
+    import yfinance as yf
+
+    import ma_alerts
+    import market_analysis
+    import volume_monitor
+    from binance_weight import weight_tracker
+
+    class FixtureTicker:
+        def __init__(self, symbol: str, *args, **kwargs):
+            self.symbol = symbol
+
+        def history(self, period: str = '1mo', interval: str = '1d', **kwargs) -> pd.DataFrame:
+            return market.history(self.symbol, period, interval)
+
+    def download(tickers, period: str = '1mo', interval: str = '1d', **kwargs) -> pd.DataFrame:
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        frames = {symbol: market.history(symbol, period, interval) for symbol in symbols}
+        market.requests['yahoo'] -= len(symbols) - 1  # Une seule requête groupée
+        return pd.concat(frames, axis=1)
+
+    client_class = fixture_client_class(market)
+    patches = [
+        (ma_alerts, 'Client', client_class),
+        (volume_monitor, 'Client', client_class),
+        (market_analysis, 'Client', client_class),
+        (yf, 'Ticker', FixtureTicker),
+        (yf, 'download', download),
+        (weight_tracker, 'low_priority_budget', float('inf')),
+        (weight_tracker, 'high_priority_budget', float('inf')),
+    ]
+    saved = [(target, name, getattr(target, name)) for target, name, _ in patches]
+    for target, name, value in patches:
+        setattr(target, name, value)
+    try:
+        yield market
+    finally:
+        for target, name, value in saved:
+            setattr(target, name, value)
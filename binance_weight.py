@@ -0,0 +1,221 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# Limite REQUEST_WEIGHT de l'API Spot Binance (par minute et par IP)
+BINANCE_WEIGHT_LIMIT = 6000
+
+# Poids fixes des endpoints utilisés par le bot
+ENDPOINT_WEIGHTS = {
+    'ticker_24hr': 2,    # Un seul symbole
+    'exchange_info': 20,
+}
+
+
+def kline_weight(limit: int) -> int:
+    """Poids d'une requête /api/v3/klines selon le nombre de bougies demandées"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class BinanceRateLimited(Exception):
+    """Requête refusée localement : IP bannie temporairement par Binance (429/418)"""
+
+
+class BinanceWeightTracker:
+    """
+    Suivi du poids des requêtes Binance sur la fenêtre d'une minute
+
+    Le poids utilisé est le maximum entre celui renvoyé par Binance (en-tête
+    X-MBX-USED-WEIGHT-1M, qui inclut les autres processus sur la même IP) et
+    le poids envoyé localement sur la minute (requêtes encore en vol).
+
+    Les requêtes de faible priorité (cycles de surveillance) attendent la minute
+    suivante dès que leur budget est atteint, laissant une marge aux commandes ;
+    les requêtes prioritaires n'attendent que si la limite serait dépassée.
+    """
+
+    def __init__(self, limit: int = BINANCE_WEIGHT_LIMIT, low_priority_ratio: float = 0.7,
+                 high_priority_ratio: float = 0.95):
+        """
+        Args:
+            limit: Poids maximum par minute
+            low_priority_ratio: Part de la limite utilisable par les cycles de surveillance
+            high_priority_ratio: Part de la limite utilisable par les commandes
+        """
+        self.limit = limit
+        self.low_priority_budget = int(limit * low_priority_ratio)
+        self.high_priority_budget = int(limit * high_priority_ratio)
+
+        self._lock = threading.Lock()
+        self._window = None           # Minute UTC courante (epoch // 60)
+        self._reported = 0            # Plus grand poids renvoyé par Binance dans la fenêtre
+        self._local = 0               # Poids envoyé par ce processus dans la fenêtre
+        self._banned_until = 0.0
+        self._deferred = 0            # Requêtes de faible priorité retardées
+        self._peak = 0
+        self._cycles: Dict[str, Dict] = {}
+
+    def _roll_window(self, now: float):
+        """Réinitialise les compteurs à chaque nouvelle minute (appelé sous verrou)"""
+        window = int(now // 60)
+        if window != self._window:
+            self._window = window
+            self._reported = 0
+            self._local = 0
+
+    def _used(self) -> int:
+        return max(self._reported, self._local)
+
+    def used_weight(self) -> int:
+        """Poids utilisé estimé sur la minute en cours"""
+        with self._lock:
+            self._roll_window(time.time())
+            return self._used()
+
+    def seconds_until_reset(self) -> float:
+        """Secondes avant la prochaine fenêtre d'une minute"""
+        return 60 - time.time() % 60
+
+    def _reserve(self, weight: int, priority: str) -> float:
+        """
+        Réserve `weight` si le budget le permet
+
+        Returns:
+            0 si réservé, sinon le délai à attendre avant de réessayer (secondes)
+        """
+        with self._lock:
+            now = time.time()
+
+            if now < self._banned_until:
+                if priority == 'high':
+                    raise BinanceRateLimited(
+                        f"Limite Binance atteinte, réessayer dans {self._banned_until - now:.0f}s"
+                    )
+                return self._banned_until - now
+
+            self._roll_window(now)
+            budget = self.high_priority_budget if priority == 'high' else self.low_priority_budget
+
+            # Une requête plus lourde que le budget passe seule en début de fenêtre
+            if self._used() + weight <= budget or self._used() == 0:
+                # Estimation prudente jusqu'au prochain en-tête Binance
+                self._reported += weight
+                self._local += weight
+                self._peak = max(self._peak, self._used())
+                return 0
+
+            if priority != 'high':
+                self._deferred += 1
+            return 60 - now % 60 + 0.05
+
+    def acquire(self, weight: int, priority: str = 'high'):
+        """Attend (thread) que le budget permette d'envoyer une requête de poids `weight`"""
+        while True:
+            delay = self._reserve(weight, priority)
+            if not delay:
+                return
+            time.sleep(delay)
+
+    async def acquire_async(self, weight: int, priority: str = 'high'):
+        """Version asynchrone de acquire (n'occupe pas la boucle pendant l'attente)"""
+        while True:
+            delay = self._reserve(weight, priority)
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+    def record_headers(self, headers, status: Optional[int] = None):
+        """
+        Met à jour le poids utilisé à partir des en-têtes d'une réponse Binance
+
+        Args:
+            headers: En-têtes HTTP (requests ou aiohttp)
+            status: Code HTTP (429/418 = bannissement temporaire)
+        """
+        if headers is None:
+            return
+
+        used = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('x-mbx-used-weight-1m')
+
+        with self._lock:
+            self._roll_window(time.time())
+
+            if used is not None:
+                try:
+                    used = int(used)
+                except ValueError:
+                    used = None
+
+            if used is not None:
+                # L'en-tête inclut toutes les requêtes déjà traitées par Binance
+                self._reported = max(self._reported, used)
+                self._peak = max(self._peak, self._used())
+
+            if status in (418, 429):
+                retry_after = headers.get('Retry-After') or headers.get('retry-after')
+                delay = float(retry_after) if retry_after else self.seconds_until_reset()
+                self._banned_until = max(self._banned_until, time.time() + delay)
+                print(f"🚫 Binance HTTP {status} - requêtes suspendues {delay:.0f}s")
+
+    def record_client_response(self, client):
+        """Enregistre la dernière réponse d'un client python-binance (synchrone)"""
+        response = getattr(client, 'response', None)
+        if response is not None:
+            self.record_headers(response.headers, getattr(response, 'status_code', None))
+
+    def plan_cycle(self, name: str, requests: Iterable[int], interval_minutes: Optional[float] = None) -> Dict:
+        """
+        Enregistre le coût prévu d'un cycle de surveillance
+
+        Args:
+            name: Nom du cycle ('ma_alerts', 'volume')
+            requests: Poids de chaque requête prévue
+            interval_minutes: Fréquence du cycle
+
+        Returns:
+            {'weight', 'requests', 'minutes', 'interval_minutes'} ; minutes = nombre de
+            fenêtres d'une minute nécessaires pour rester sous le budget
+        """
+        weights = list(requests)
+        total = sum(weights)
+        plan = {
+            'weight': total,
+            'requests': len(weights),
+            'minutes': max(1, -(-total // self.low_priority_budget)),
+            'interval_minutes': interval_minutes
+        }
+        with self._lock:
+            self._cycles[name] = plan
+
+        if total > self.low_priority_budget:
+            print(f"⚠️ Cycle {name}: {total} de poids prévu (> {self.low_priority_budget}/min) - "
+                  f"étalé sur {plan['minutes']} minute(s)")
+        return plan
+
+    def status(self) -> Dict:
+        """État courant du budget (commande /binance_weight)"""
+        with self._lock:
+            now = time.time()
+            self._roll_window(now)
+            return {
+                'used': self._used(),
+                'limit': self.limit,
+                'low_priority_budget': self.low_priority_budget,
+                'high_priority_budget': self.high_priority_budget,
+                'peak': self._peak,
+                'deferred': self._deferred,
+                'reset_in': 60 - now % 60,
+                'banned_for': max(0.0, self._banned_until - now),
+                'cycles': {name: dict(plan) for name, plan in self._cycles.items()}
+            }
+
+
+# Instance partagée par tous les clients Binance du bot (limite par IP)
+weight_tracker = BinanceWeightTracker()
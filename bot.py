@@ -1,5 +1,5 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import os
 from dotenv import load_dotenv
 from market_analysis import BinanceMarketAnalyzer, YFinanceMarketAnalyzer
@@ -8,12 +8,39 @@ from stock_manager import StockManager
 from symbol_search import BinanceSymbolSearch, YFinanceSymbolSearch
 from volume_monitor import VolumeMonitor
 import asyncio
+import time
+import traceback
 from datetime import datetime
 from ma_alerts import MAAlertMonitor
+from candle_store import CandleStore
+from kline_stream import BinanceKlineStream, DEFAULT_STREAM_URL
+from async_market_client import AsyncBinanceClient
+from binance_weight import weight_tracker
+from webhook_delivery import WebhookDispatcher
+from alert_state import AlertStateStore
+from analysis_cache import AnalysisCache
+from worker_pool import WorkerPool, WorkerPoolFull
+from candle_scheduler import CandleCloseScheduler
+from intervals import minutes_to_interval
+from monitor_workers import MonitorWorkerPool
+from metrics import metrics, MetricsServer
+from loop_watchdog import LoopWatchdog
+from autocomplete import AutocompleteIndex
 
 # Charger les variables d'environnement
 load_dotenv()
 
+# Mode multi-process (optionnel) : cryptos des moniteurs réparties sur N processus.
+# Les processus sont tous créés ici, avant tout thread du bot (fork), et jamais recréés.
+MONITOR_WORKERS = int(os.getenv('MONITOR_WORKERS', '0'))
+ma_workers = None
+volume_workers = None
+if MONITOR_WORKERS > 1:
+    ma_workers = MonitorWorkerPool('ma', MONITOR_WORKERS)
+    volume_workers = MonitorWorkerPool('volume', MONITOR_WORKERS)
+    ma_workers.start()
+    volume_workers.start()
+
 # Créer le bot avec les intents nécessaires
 intents = discord.Intents.default()
 intents.message_content = True
@@ -21,14 +48,68 @@ intents.message_content = True
 bot = commands.Bot(command_prefix='/', intents=intents)
 
 # Initialiser les analyseurs et gestionnaires
-crypto_analyzer = BinanceMarketAnalyzer()
+candle_store = CandleStore()  # Bougies Binance partagées (candles.db)
+binance_async_client = AsyncBinanceClient()  # Session HTTP asyncio partagée (keep-alive)
+crypto_analyzer = BinanceMarketAnalyzer(candle_store=candle_store, async_client=binance_async_client)
 stock_analyzer = YFinanceMarketAnalyzer()
 crypto_manager = CryptoManager()
 stock_manager = StockManager()
-crypto_searcher = BinanceSymbolSearch()
+# Index des paires Binance reconstruit en arrière-plan (nouvelles paires visibles sans redémarrage)
+SYMBOLS_REFRESH_MINUTES = float(os.getenv('SYMBOLS_REFRESH_MINUTES', '60'))
+crypto_searcher = BinanceSymbolSearch(ttl=SYMBOLS_REFRESH_MINUTES * 60)
 stock_searcher = YFinanceSymbolSearch()
-volume_monitor = VolumeMonitor()
-ma_alert_monitor = MAAlertMonitor()
+
+def binance_universe(field: str):
+    """Actifs ou paires de l'index Binance déjà chargé (jamais d'appel réseau pendant l'autocomplétion)"""
+    index = crypto_searcher.loaded_index()
+    return getattr(index, field) if index is not None else []
+
+# Autocomplétion : symboles configurés (utilisés récemment d'abord), univers Binance/Yahoo pour les ajouts
+crypto_completer = AutocompleteIndex(crypto_manager.get_crypto_symbols)
+stock_completer = AutocompleteIndex(stock_manager.get_stock_symbols)
+crypto_add_completer = AutocompleteIndex(lambda: binance_universe('base_assets'))
+binance_pair_completer = AutocompleteIndex(lambda: binance_universe('pair_symbols'))
+stock_add_completer = AutocompleteIndex(lambda: list(stock_searcher.popular_stocks))
+# Options dont les valeurs saisies alimentent l'historique d'usage
+AUTOCOMPLETE_USAGE = {'crypto': crypto_completer, 'stock': stock_completer}
+webhook_dispatcher = WebhookDispatcher()  # Outbox webhooks partagée (webhooks.db)
+alert_state = AlertStateStore()  # Cooldowns et états MA persistants (alert_state.db)
+analysis_cache = AnalysisCache()  # Résultats /crypto_check, /stock_check jusqu'à la clôture de bougie
+command_pool = WorkerPool()  # Travail bloquant des commandes (yfinance, recherches), hors de la boucle
+candle_scheduler = CandleCloseScheduler()  # Vérifications quelques secondes après chaque clôture de bougie
+volume_monitor = VolumeMonitor(candle_store=candle_store, async_client=binance_async_client,
+                               dispatcher=webhook_dispatcher, state_store=alert_state,
+                               workers=volume_workers)
+ma_alert_monitor = MAAlertMonitor(candle_store=candle_store, async_client=binance_async_client,
+                                  dispatcher=webhook_dispatcher, state_store=alert_state,
+                                  workers=ma_workers)
+ma_alerts_warmed_up = not ma_alert_monitor.needs_warmup()  # État restauré depuis alert_state.db
+
+# Métriques Prometheus (optionnel) : http://127.0.0.1:<METRICS_PORT>/metrics
+METRICS_PORT = os.getenv('METRICS_PORT')
+metrics_server = None
+if METRICS_PORT:
+    metrics_server = MetricsServer(metrics, int(METRICS_PORT))
+    metrics_server.start()
+
+# Surveillance du retard de la boucle asyncio (blocages attribués aux commandes et tâches, voir /loop_lag)
+LOOP_LAG_THRESHOLD_MS = int(os.getenv('LOOP_LAG_THRESHOLD_MS', '200'))
+loop_watchdog = LoopWatchdog(threshold=LOOP_LAG_THRESHOLD_MS / 1000)
+
+def volume_check_interval() -> str:
+    """Interval des bougies déclenchant la surveillance des volumes (check_interval_minutes)"""
+    return minutes_to_interval(volume_monitor.config.get('check_interval_minutes', 15))
+
+# Mode streaming (optionnel) : klines Binance via WebSocket au lieu du polling REST
+STREAMING_ENABLED = os.getenv('BINANCE_STREAMING', '0') == '1'
+kline_stream = None
+if STREAMING_ENABLED:
+    kline_stream = BinanceKlineStream(
+        candle_store=candle_store,
+        url=os.getenv('BINANCE_STREAM_URL', DEFAULT_STREAM_URL),
+        interval=candle_store.base_interval,
+        close_intervals=set(ma_alert_monitor.config['timeframes']) | {volume_check_interval()}
+    )
 
 # Supprimer la commande help par défaut
 bot.remove_command('help')
@@ -47,25 +128,200 @@ async def on_ready():
     print(f'Cryptos supportées: {", ".join(crypto_manager.get_crypto_symbols())}')
     print(f'Stocks supportés: {", ".join(stock_manager.get_stock_symbols())}')
     
-    # Démarrer la surveillance des volumes
-    if not volume_check_task.is_running():
-        volume_check_task.start()
+    if not loop_watchdog.is_running():
+        loop_watchdog.start()
+        print(f'⏱️ Surveillance de la boucle asyncio activée (seuil {LOOP_LAG_THRESHOLD_MS} ms)')
+    
+    # Index des symboles Binance (/crypto_search, détection automatique de /crypto_add)
+    crypto_searcher.start()
+    
+    # Démarrer la surveillance des volumes et des croisements MA (alignée sur les clôtures de bougies)
+    if not candle_scheduler.is_running():
+        candle_scheduler.add_job('volume', volume_timeframes, volume_check)
+        candle_scheduler.add_job('ma_alerts', ma_alert_timeframes, ma_alert_check)
+        candle_scheduler.start()
         print('🔍 Surveillance des volumes activée')
-
-    # Démarrer la surveillance des croisements MA
-    if not ma_alert_check_task.is_running():
-        ma_alert_check_task.start()
         print('🔍 Surveillance des croisements MA activée')
-# Tâche de surveillance des volumes (toutes les 15 minutes)
-@tasks.loop(minutes=15)
-async def volume_check_task():
+
+        # Premier démarrage : warm-up silencieux (sinon l'état a été restauré depuis alert_state.db)
+        if not ma_alerts_warmed_up:
+            bot.loop.create_task(ma_alert_warmup())
+        else:
+            print(f"✅ État des alertes restauré - {len(ma_alert_monitor.alert_history)} cooldown(s) actif(s)")
+
+    # Démarrer le flux klines (mode streaming)
+    if kline_stream and not kline_stream.is_running():
+        kline_stream.set_symbols(ma_alert_monitor.config['assets']['crypto'] + volume_monitor.config['assets']['crypto'])
+        kline_stream.add_listener(on_candle_close)
+        bot.loop.create_task(kline_stream.run())
+        print('📡 Mode streaming Binance activé')
+
+@bot.before_invoke
+async def tag_command_task(ctx):
+    """Tâche de la commande nommée /commande (attribution des blocages de la boucle)"""
+    loop_watchdog.tag_current_task(f"/{ctx.command.qualified_name}")
+
+@bot.after_invoke
+async def record_autocomplete_usage(ctx):
+    """Symboles utilisés remontés en tête des suggestions d'autocomplétion"""
+    for option in ctx.selected_options or []:
+        completer = AUTOCOMPLETE_USAGE.get(option.get('name'))
+        if completer is not None:
+            completer.record(option.get('value'))
+
+@bot.event
+async def on_application_command_error(ctx, error):
+    """Erreurs non gérées des commandes (pool de travail saturé notamment)"""
+    original = getattr(error, 'original', error)
+    if isinstance(original, WorkerPoolFull):
+        await ctx.respond("⏳ Le bot est très sollicité, réessayez dans quelques secondes.", ephemeral=True)
+        return
+    print(f"❌ Erreur commande /{ctx.command.qualified_name if ctx.command else '?'}: {original}")
+    traceback.print_exception(type(original), original, original.__traceback__)
+
+async def on_candle_close(symbol: str, interval: str, kline: list):
+    """Évalue les alertes d'une crypto dès la clôture d'une bougie (mode streaming)"""
+    loop = asyncio.get_event_loop()
+
+    if interval in ma_alert_monitor.config['timeframes'] and symbol in ma_alert_monitor.config['assets']['crypto']:
+        # Pas d'alertes tant que le warm-up n'est pas terminé (premier démarrage uniquement)
+        silent = not ma_alerts_warmed_up
+        alerts = await loop.run_in_executor(None, ma_alert_monitor.check_asset, symbol, interval, silent)
+        for alert in alerts:
+            print(f"   └ {alert['symbol']} {interval}: {alert['type']} ({alert['system']})")
+
+    if interval == volume_check_interval() and symbol in volume_monitor.config['assets']['crypto']:
+        alerts = await loop.run_in_executor(None, volume_monitor.check_crypto_asset, symbol)
+        for alert in alerts:
+            print(f"   └ {alert['symbol']}: {alert['level']} (+{alert['increase']:.1f}%)")
+
+async def analyze_crypto(binance_symbol: str, timeframe: str) -> dict:
+    """Analyse crypto (cache jusqu'à la prochaine clôture de bougie)"""
+    return await analysis_cache.get(
+        'binance', binance_symbol, timeframe,
+        lambda: crypto_analyzer.analyze_symbol_async(binance_symbol, interval=timeframe)
+    )
+
+async def analyze_stock(yfinance_symbol: str, timeframe: str) -> dict:
+    """Analyse action/indice (cache jusqu'à la prochaine clôture, yfinance dans le pool de commandes)"""
+    return await analysis_cache.get(
+        'yahoo', yfinance_symbol, timeframe,
+        lambda: command_pool.run(stock_analyzer.analyze_symbol, yfinance_symbol, timeframe,
+                                 key=('stock_analysis', yfinance_symbol, timeframe))
+    )
+
+# Comparaisons : analyses simultanées max, timeout par actif, délai min entre deux éditions du message
+COMPARE_CONCURRENCY = int(os.getenv('COMPARE_CONCURRENCY', '5'))
+COMPARE_TIMEOUT = float(os.getenv('COMPARE_TIMEOUT', '20'))
+COMPARE_EDIT_INTERVAL = 1.5
+
+def compare_field(symbol: str, analysis, alerts: list) -> tuple:
+    """Nom et valeur du champ d'un actif dans une comparaison (None = analyse en cours)"""
+    if analysis is None:
+        return f"⏳ {symbol}", "Analyse en cours..."
+    if analysis['status'] == 'timeout':
+        return f"⌛ {symbol}", f"Pas de réponse ({COMPARE_TIMEOUT:.0f}s)"
+    if analysis['status'] == 'exception':
+        return f"❌ {symbol}", f"Erreur: {analysis['message'][:50]}"
+    if analysis['status'] != 'success':
+        return f"❌ {symbol}", "Erreur d'analyse"
+
+    if analysis['aligned_bullish']:
+        status = "🟢 Haussier"
+        if analysis['is_compressed']:
+            alerts.append(f"{symbol}: Haussier + Compression!")
+    elif analysis['aligned_bearish']:
+        status = "🔴 Baissier"
+        if analysis['is_compressed']:
+            alerts.append(f"{symbol}: Baissier + Compression!")
+    else:
+        status = "🟠 Neutre"
+
+    compression = "🔥 OUI" if analysis['is_compressed'] else "Non"
+
+    return symbol, (f"Prix: ${analysis['current_price']:,.2f}\n"
+                    f"Alignement: {status}\n"
+                    f"Compression: {compression}\n"
+                    f"Écart: {analysis['compression_pct']:.2f}%")
+
+async def run_comparison(ctx, title: str, description: str, footer: str, assets: dict, analyze):
+    """
+    Analyse les actifs en parallèle et met à jour le tableau au fil des résultats
+
+    Args:
+        assets: {symbole affiché: symbole de marché}
+        analyze: Fonction async analyze(symbole de marché) -> analyse
+    """
+    semaphore = asyncio.Semaphore(COMPARE_CONCURRENCY)
+    results = {symbol: None for symbol in assets}
+
+    async def analyze_one(symbol: str, market_symbol: str):
+        async with semaphore:
+            try:
+                # L'analyse abandonnée continue en arrière-plan et alimente le cache
+                return symbol, await asyncio.wait_for(analyze(market_symbol), COMPARE_TIMEOUT)
+            except asyncio.TimeoutError:
+                return symbol, {'status': 'timeout'}
+            except Exception as e:
+                return symbol, {'status': 'exception', 'message': str(e)}
+
+    def build_embed() -> discord.Embed:
+        embed = discord.Embed(title=title, description=description, color=discord.Color.blue())
+        alerts = []
+        for symbol, analysis in results.items():
+            name, value = compare_field(symbol, analysis, alerts)
+            embed.add_field(name=name, value=value, inline=True)
+
+        if alerts:
+            embed.add_field(
+                name="🔥 ALERTES",
+                value="\n".join(alerts),
+                inline=False
+            )
+
+        done = sum(1 for analysis in results.values() if analysis is not None)
+        progress = "" if done == len(results) else f" | ⏳ {done}/{len(results)}"
+        embed.set_footer(text=footer + progress)
+        return embed
+
+    await ctx.respond(embed=build_embed())
+    last_edit = time.monotonic()
+
+    tasks = [asyncio.ensure_future(analyze_one(symbol, market_symbol)) for symbol, market_symbol in assets.items()]
+    for pending, future in enumerate(asyncio.as_completed(tasks), 1):
+        symbol, analysis = await future
+        results[symbol] = analysis
+        # Éditions espacées (limites Discord) ; la dernière est toujours envoyée
+        if pending < len(tasks) and time.monotonic() - last_edit >= COMPARE_EDIT_INTERVAL:
+            await ctx.edit(embed=build_embed())
+            last_edit = time.monotonic()
+
+    await ctx.edit(embed=build_embed())
+
+def polled_timeframes(timeframes: list) -> dict:
+    """
+    Timeframes vérifiés par polling, par marché
+
+    En mode streaming, les cryptos ne sont vérifiées par polling que pour les
+    timeframes dont le flux n'émet pas la clôture (plus fins que son interval).
+    """
+    crypto = [tf for tf in timeframes if not kline_stream or tf not in kline_stream.close_intervals]
+    polled = {'crypto': crypto} if crypto else {}
+    polled['stocks'] = list(timeframes)
+    return polled
+
+def volume_timeframes() -> dict:
+    """Bougies déclenchant la surveillance des volumes (check_interval_minutes de volume_config.json)"""
+    return polled_timeframes([volume_check_interval()])
+
+# Surveillance des volumes (à chaque clôture de bougie check_interval_minutes)
+async def volume_check(closed: dict):
     """Vérifie les volumes et envoie des alertes si nécessaire"""
     print(f"🔍 Vérification des volumes - {datetime.now().strftime('%H:%M:%S')}")
     
     try:
-        # Exécuter dans un thread pour ne pas bloquer le bot
-        loop = asyncio.get_event_loop()
-        alerts = await loop.run_in_executor(None, volume_monitor.check_all_assets)
+        # Klines crypto récupérées en parallèle sur la boucle, évaluation dans un thread
+        alerts = await volume_monitor.check_all_assets_async(list(closed))
         
         if alerts:
             print(f"✅ {len(alerts)} alerte(s) envoyée(s)")
@@ -77,30 +333,40 @@ async def volume_check_task():
     except Exception as e:
         print(f"❌ Erreur surveillance volumes: {e}")
 
-@volume_check_task.before_loop
-async def before_volume_check():
-    """Attendre que le bot soit prêt avant de démarrer la surveillance"""
-    await bot.wait_until_ready()
+def ma_alert_timeframes() -> dict:
+    """Timeframes surveillés par marché (ma_alerts_config.json)"""
+    return polled_timeframes(ma_alert_monitor.config['timeframes'])
+
+MA_WARMUP_RETRY_SECONDS = 60
+
+async def ma_alert_warmup():
+    """Premier démarrage : enregistre l'état de tous les actifs sans envoyer d'alertes"""
+    global ma_alerts_warmed_up
+    print("⏳ Premier démarrage - Mode warm-up (pas d'alertes)")
+    while True:
+        try:
+            alerts = await ma_alert_monitor.check_all_assets_async(True)
+        except Exception as e:
+            # Alertes toujours silencieuses tant que le warm-up n'a pas abouti
+            print(f"❌ Erreur warm-up MA: {e} - nouvel essai dans {MA_WARMUP_RETRY_SECONDS} s")
+            await asyncio.sleep(MA_WARMUP_RETRY_SECONDS)
+            continue
+        print(f"✅ Warm-up terminé - {len(alerts)} état(s) enregistré(s)")
+        ma_alerts_warmed_up = True
+        return
 
-# Tâche de surveillance des croisements MA (toutes les heures)
-@tasks.loop(minutes=60)
-async def ma_alert_check_task():
+# Surveillance des croisements MA (à chaque clôture de bougie, uniquement les timeframes clôturés)
+async def ma_alert_check(closed: dict):
     """Vérifie les croisements MA et envoie des alertes"""
-    print(f"🔍 Vérification croisements MA - {datetime.now().strftime('%H:%M:%S')}")
+    summary = ", ".join(f"{market} {'/'.join(timeframes)}" for market, timeframes in closed.items())
+    print(f"🔍 Vérification croisements MA ({summary}) - {datetime.now().strftime('%H:%M:%S')}")
     
     try:
-        loop = asyncio.get_event_loop()
-        
-        # Premier run : warm-up silencieux
-        if not hasattr(ma_alert_check_task, 'warmed_up'):
-            print("⏳ Premier démarrage - Mode warm-up (pas d'alertes)")
-            alerts = await loop.run_in_executor(None, ma_alert_monitor.check_all_assets, True)
-            ma_alert_check_task.warmed_up = True
-            print(f"✅ Warm-up terminé - {len(alerts)} état(s) enregistré(s)")
-            return
-        
-        # Runs suivants : normal
-        alerts = await loop.run_in_executor(None, ma_alert_monitor.check_all_assets, False)
+        alerts = []
+        for market, timeframes in closed.items():
+            alerts.extend(await ma_alert_monitor.check_all_assets_async(
+                not ma_alerts_warmed_up, [market], timeframes
+            ))
         
         if alerts:
             print(f"✅ {len(alerts)} alerte(s) MA envoyée(s)")
@@ -112,11 +378,6 @@ async def ma_alert_check_task():
     except Exception as e:
         print(f"❌ Erreur surveillance MA: {e}")
 
-@ma_alert_check_task.before_loop
-async def before_ma_alert_check():
-    """Attendre que le bot soit prêt"""
-    await bot.wait_until_ready()
-
 def sync_alerts_with_managers():
     """Synchronise les alertes avec les actifs des managers"""
     # Récupérer tous les symboles Binance
@@ -134,6 +395,9 @@ def sync_alerts_with_managers():
     # Synchroniser
     volume_monitor.sync_assets_from_managers(crypto_symbols, stock_symbols)
     ma_alert_monitor.sync_assets_from_managers(crypto_symbols, stock_symbols)
+
+    if kline_stream:
+        kline_stream.set_symbols(crypto_symbols)
     
     print(f"🔄 Synchronisation terminée: {len(crypto_symbols)} cryptos, {len(stock_symbols)} stocks")
 # ============================================================================
@@ -557,8 +821,8 @@ async def dca(
 # ============================================================================
 
 async def crypto_autocomplete(ctx: discord.AutocompleteContext):
-    """Autocomplétion pour les cryptos disponibles"""
-    return crypto_manager.get_crypto_symbols()
+    """Autocomplétion pour les cryptos disponibles (filtrée par la saisie, 25 max)"""
+    return crypto_completer.complete(ctx.value)
 
 @bot.slash_command(name="crypto_check", description="Vérifier l'état des moyennes mobiles d'une crypto")
 async def crypto_check(
@@ -584,7 +848,7 @@ async def crypto_check(
         return
     
     try:
-        analysis = crypto_analyzer.analyze_symbol(binance_symbol, interval=timeframe)
+        analysis = await analyze_crypto(binance_symbol, timeframe)
         
         if analysis['status'] != 'success':
             await ctx.respond(f"❌ Erreur: {analysis.get('message', 'Erreur inconnue')}")
@@ -736,65 +1000,14 @@ async def crypto_compare(
 
         comparison_mode = "Sélection personnalisée" if assets else "Toutes les cryptos"
 
-        embed = discord.Embed(
+        await run_comparison(
+            ctx,
             title=f"📊 Comparaison Cryptos ({timeframe_label})",
             description=f"**Mode:** {comparison_mode} | **Actifs:** {len(cryptos)}",
-            color=discord.Color.blue()
+            footer=f"Binance | {len(cryptos)} crypto(s) | Timeframe: {timeframe_label}",
+            assets=cryptos,
+            analyze=lambda binance_symbol: analyze_crypto(binance_symbol, timeframe)
         )
-
-        alerts = []
-
-        for symbol, binance_symbol in cryptos.items():
-            try:
-                analysis = crypto_analyzer.analyze_symbol(binance_symbol, interval=timeframe)
-                
-                if analysis['status'] != 'success':
-                    embed.add_field(
-                        name=f"❌ {symbol}",
-                        value="Erreur d'analyse",
-                        inline=True
-                    )
-                    continue
-                
-                if analysis['aligned_bullish']:
-                    status = "🟢 Haussier"
-                    if analysis['is_compressed']:
-                        alerts.append(f"{symbol}: Haussier + Compression!")
-                elif analysis['aligned_bearish']:
-                    status = "🔴 Baissier"
-                    if analysis['is_compressed']:
-                        alerts.append(f"{symbol}: Baissier + Compression!")
-                else:
-                    status = "🟠 Neutre"
-                
-                compression = "🔥 OUI" if analysis['is_compressed'] else "Non"
-                
-                embed.add_field(
-                    name=f"{symbol}",
-                    value=f"Prix: ${analysis['current_price']:,.2f}\n"
-                          f"Alignement: {status}\n"
-                          f"Compression: {compression}\n"
-                          f"Écart: {analysis['compression_pct']:.2f}%",
-                    inline=True
-                )
-                
-            except Exception as e:
-                embed.add_field(
-                    name=f"❌ {symbol}",
-                    value=f"Erreur: {str(e)[:50]}",
-                    inline=True
-                )
-        
-        if alerts:
-            embed.add_field(
-                name="🔥 ALERTES",
-                value="\n".join(alerts),
-                inline=False
-            )
-        
-        embed.set_footer(text=f"Binance | {len(cryptos)} crypto(s) | Timeframe: {timeframe_label}")
-        
-        await ctx.respond(embed=embed)
         
     except Exception as e:
         await ctx.respond(f"❌ Erreur: {str(e)}")
@@ -811,7 +1024,8 @@ async def crypto_search(
     await ctx.defer()
     
     try:
-        results = crypto_searcher.search(query, limit=15)
+        results = await command_pool.run(lambda: crypto_searcher.search(query, limit=15),
+                                         key=('crypto_search', query.upper()))
         
         if not results:
             await ctx.respond(f"❌ Aucun résultat pour '{query}' sur Binance.")
@@ -905,15 +1119,28 @@ async def crypto_list(ctx):
     
     await ctx.respond(embed=embed)
 
+async def crypto_add_autocomplete(ctx: discord.AutocompleteContext):
+    """Autocomplétion des actifs Binance (index des paires)"""
+    return crypto_add_completer.complete(ctx.value)
+
+async def binance_pair_autocomplete(ctx: discord.AutocompleteContext):
+    """Autocomplétion des paires Binance (index des paires)"""
+    return binance_pair_completer.complete(ctx.value)
+
 @bot.slash_command(name="crypto_add", description="Ajouter une nouvelle crypto")
 async def crypto_add(
     ctx,
-    symbol: str = discord.Option(str, description="Symbole court (ex: BTC, SOL, DOGE)"),
+    symbol: str = discord.Option(
+        str,
+        description="Symbole court (ex: BTC, SOL, DOGE)",
+        autocomplete=crypto_add_autocomplete
+    ),
     binance_symbol: str = discord.Option(
         str, 
         description="Symbole Binance (optionnel, auto-détecté si vide)",
         required=False,
-        default=None
+        default=None,
+        autocomplete=binance_pair_autocomplete
     )
 ):
     await ctx.defer()
@@ -927,7 +1154,8 @@ async def crypto_add(
     if not binance_symbol:
         await ctx.respond(f"🔄 Recherche automatique de `{symbol}` sur Binance...")
         
-        binance_symbol = crypto_searcher.get_best_match(symbol)
+        binance_symbol = await command_pool.run(crypto_searcher.get_best_match, symbol,
+                                                key=('crypto_match', symbol))
         
         if not binance_symbol:
             await ctx.edit(
@@ -950,7 +1178,7 @@ async def crypto_add(
         
         await ctx.respond(f"🔄 Vérification de `{binance_symbol}` sur Binance...")
     
-    if not crypto_analyzer.test_symbol_exists(binance_symbol):
+    if not await crypto_analyzer.test_symbol_exists_async(binance_symbol):
         await ctx.edit(
             content=f"❌ Le symbole `{binance_symbol}` n'existe pas sur Binance!\n"
                    f"💡 Utilisez `/crypto_search {symbol}` pour trouver le bon symbole."
@@ -966,6 +1194,17 @@ async def crypto_add(
         )
         embed.add_field(name="Symbole", value=symbol, inline=True)
         embed.add_field(name="Binance", value=binance_symbol, inline=True)
+        
+        # Coût Binance prévu du cycle MA avec la nouvelle crypto
+        plan = ma_alert_monitor.plan_binance_cycle()
+        if plan['minutes'] > 1:
+            embed.add_field(
+                name="⚠️ Poids Binance",
+                value=f"Cycle MA prévu: **{plan['weight']}** (budget {weight_tracker.low_priority_budget}/min)\n"
+                      f"Les requêtes seront étalées sur {plan['minutes']} minutes",
+                inline=False
+            )
+        
         embed.set_footer(text=f"Total: {crypto_manager.get_count()} crypto(s) • Alertes synchronisées ✓")
         
         await ctx.edit(content=None, embed=embed)
@@ -1071,8 +1310,8 @@ async def alerts_sync(ctx):
 # ============================================================================
 
 async def stock_autocomplete(ctx: discord.AutocompleteContext):
-    """Autocomplétion pour les stocks disponibles"""
-    return stock_manager.get_stock_symbols()
+    """Autocomplétion pour les stocks disponibles (filtrée par la saisie, 25 max)"""
+    return stock_completer.complete(ctx.value)
 
 @bot.slash_command(name="stock_check", description="Vérifier l'état des moyennes mobiles d'une action/indice")
 async def stock_check(
@@ -1098,7 +1337,7 @@ async def stock_check(
         return
     
     try:
-        analysis = stock_analyzer.analyze_symbol(yfinance_symbol, interval=timeframe)
+        analysis = await analyze_stock(yfinance_symbol, timeframe)
         
         if analysis['status'] != 'success':
             await ctx.respond(f"❌ Erreur: {analysis.get('message', 'Erreur inconnue')}")
@@ -1257,67 +1496,14 @@ async def stock_compare(
 
         comparison_mode = "Sélection personnalisée" if assets else "Tous les stocks"
 
-        embed = discord.Embed(
+        await run_comparison(
+            ctx,
             title=f"📊 Comparaison Stocks ({timeframe_label})",
             description=f"**Mode:** {comparison_mode} | **Actifs:** {len(stocks)}",
-            color=discord.Color.blue()
+            footer=f"Yahoo Finance | {len(stocks)} stock(s) | Timeframe: {timeframe_label}",
+            assets=stocks,
+            analyze=lambda yfinance_symbol: analyze_stock(yfinance_symbol, timeframe)
         )
-
-        alerts = []
-
-        for symbol, yfinance_symbol in stocks.items():
-            try:
-                analysis = stock_analyzer.analyze_symbol(yfinance_symbol, interval=timeframe)
-                
-                if analysis['status'] != 'success':
-                    embed.add_field(
-                        name=f"❌ {symbol}",
-                        value="Erreur d'analyse",
-                        inline=True
-                    )
-                    continue
-                
-                # Déterminer le statut
-                if analysis['aligned_bullish']:
-                    status = "🟢 Haussier"
-                    if analysis['is_compressed']:
-                        alerts.append(f"{symbol}: Haussier + Compression!")
-                elif analysis['aligned_bearish']:
-                    status = "🔴 Baissier"
-                    if analysis['is_compressed']:
-                        alerts.append(f"{symbol}: Baissier + Compression!")
-                else:
-                    status = "🟠 Neutre"
-                
-                compression = "🔥 OUI" if analysis['is_compressed'] else "Non"
-                
-                embed.add_field(
-                    name=f"{symbol}",
-                    value=f"Prix: ${analysis['current_price']:,.2f}\n"
-                          f"Alignement: {status}\n"
-                          f"Compression: {compression}\n"
-                          f"Écart: {analysis['compression_pct']:.2f}%",
-                    inline=True
-                )
-                
-            except Exception as e:
-                embed.add_field(
-                    name=f"❌ {symbol}",
-                    value=f"Erreur: {str(e)[:50]}",
-                    inline=True
-                )
-        
-        # Alertes importantes
-        if alerts:
-            embed.add_field(
-                name="🔥 ALERTES",
-                value="\n".join(alerts),
-                inline=False
-            )
-        
-        embed.set_footer(text=f"Yahoo Finance | {len(stocks)} stock(s) | Timeframe: {timeframe_label}")
-        
-        await ctx.respond(embed=embed)
         
     except Exception as e:
         await ctx.respond(f"❌ Erreur: {str(e)}")
@@ -1334,7 +1520,8 @@ async def stock_search(
     await ctx.defer()
     
     try:
-        results = stock_searcher.search(query, limit=10)
+        results = await command_pool.run(lambda: stock_searcher.search(query, limit=10),
+                                         key=('stock_search', query.upper()))
         
         if not results:
             await ctx.respond(f"❌ Aucun résultat pour '{query}' sur Yahoo Finance.\n"
@@ -1396,10 +1583,18 @@ async def stock_list(ctx):
     
     await ctx.respond(embed=embed)
 
+async def stock_add_autocomplete(ctx: discord.AutocompleteContext):
+    """Autocomplétion des symboles populaires connus (saisie libre acceptée)"""
+    return stock_add_completer.complete(ctx.value)
+
 @bot.slash_command(name="stock_add", description="Ajouter un nouveau stock/indice")
 async def stock_add(
     ctx,
-    symbol: str = discord.Option(str, description="Symbole court (ex: AAPL, SPX, NVDA)"),
+    symbol: str = discord.Option(
+        str,
+        description="Symbole court (ex: AAPL, SPX, NVDA)",
+        autocomplete=stock_add_autocomplete
+    ),
     yfinance_symbol: str = discord.Option(
         str,
         description="Symbole yfinance (optionnel, auto-détecté si vide)",
@@ -1418,7 +1613,8 @@ async def stock_add(
     if not yfinance_symbol:
         await ctx.respond(f"🔄 Recherche automatique de `{symbol}` sur Yahoo Finance...")
         
-        yfinance_symbol = stock_searcher.get_best_match(symbol)
+        yfinance_symbol = await command_pool.run(stock_searcher.get_best_match, symbol,
+                                                 key=('stock_match', symbol))
         
         if not yfinance_symbol:
             await ctx.edit(
@@ -1437,7 +1633,8 @@ async def stock_add(
         
         await ctx.respond(f"🔄 Vérification de `{yfinance_symbol}` sur Yahoo Finance...")
     
-    if not stock_analyzer.test_symbol_exists(yfinance_symbol):
+    if not await command_pool.run(stock_analyzer.test_symbol_exists, yfinance_symbol,
+                                  key=('stock_exists', yfinance_symbol)):
         await ctx.edit(
             content=f"❌ Le symbole `{yfinance_symbol}` n'existe pas sur Yahoo Finance!\n"
                    f"💡 Utilisez `/stock_search {symbol}` pour trouver le bon symbole."
@@ -1626,8 +1823,7 @@ async def volume_test(ctx):
     try:
         await ctx.respond("🔍 Lancement du test de surveillance...")
         
-        loop = asyncio.get_event_loop()
-        alerts = await loop.run_in_executor(None, volume_monitor.check_all_assets)
+        alerts = await volume_monitor.check_all_assets_async()
         
         if alerts:
             alert_text = "\n".join([
@@ -1748,8 +1944,8 @@ async def ma_alerts_test(ctx):
     try:
         await ctx.respond("🔍 Lancement du test de surveillance MA...\n⏳ Cela peut prendre 30-60 secondes...")
         
-        loop = asyncio.get_event_loop()
-        alerts = await loop.run_in_executor(None, ma_alert_monitor.check_all_assets)
+        # Test manuel : toutes les séries, même sans nouvelle bougie terminée
+        alerts = await ma_alert_monitor.check_all_assets_async(force=True)
         
         if alerts:
             alert_text = ""
@@ -1810,12 +2006,178 @@ async def ma_alerts_status(ctx):
                 inline=True
             )
         
+        cycle = ma_alert_monitor.last_cycle_stats
+        if cycle:
+            embed.add_field(
+                name="🔄 Dernier cycle",
+                value=f"{cycle['timestamp'].strftime('%H:%M:%S')} • {cycle['evaluated']} série(s) évaluée(s), "
+                      f"{cycle['skipped']} inchangée(s) ignorée(s) • {cycle['duration']:.1f}s",
+                inline=False
+            )
+        
         embed.set_footer(text=f"Cooldown: {ma_alert_monitor.config['cooldown_hours']}h entre chaque alerte")
         
         await ctx.respond(embed=embed)
         
     except Exception as e:
         await ctx.respond(f"❌ Erreur: {str(e)}")
+
+@bot.slash_command(name="binance_weight", description="Voir l'utilisation du poids des requêtes Binance")
+async def binance_weight(ctx):
+    await ctx.defer()
+    
+    try:
+        status = weight_tracker.status()
+        used_pct = status['used'] / status['limit'] * 100
+        
+        if status['banned_for'] > 0 or used_pct >= 90:
+            color = discord.Color.red()
+        elif status['used'] >= status['low_priority_budget']:
+            color = discord.Color.orange()
+        else:
+            color = discord.Color.green()
+        
+        embed = discord.Embed(
+            title="⚖️ Poids des requêtes Binance",
+            description=f"**{status['used']} / {status['limit']}** ({used_pct:.1f}%) sur la minute en cours",
+            color=color
+        )
+        
+        embed.add_field(
+            name="📊 Budgets",
+            value=f"Surveillance: {status['low_priority_budget']}/min\n"
+                  f"Commandes: {status['high_priority_budget']}/min\n"
+                  f"Pic: {status['peak']}",
+            inline=True
+        )
+        embed.add_field(
+            name="⏱️ Fenêtre",
+            value=f"Reset dans {status['reset_in']:.0f}s\n"
+                  f"Requêtes retardées: {status['deferred']}",
+            inline=True
+        )
+        
+        if status['banned_for'] > 0:
+            embed.add_field(
+                name="🚫 Limite Binance atteinte",
+                value=f"Requêtes suspendues encore {status['banned_for']:.0f}s",
+                inline=False
+            )
+        
+        cycles_text = ""
+        for name, plan in status['cycles'].items():
+            interval = f" / {plan['interval_minutes']}min" if plan['interval_minutes'] else ""
+            spread = f" ⚠️ étalé sur {plan['minutes']}min" if plan['minutes'] > 1 else ""
+            cycles_text += f"**{name}**: {plan['weight']} ({plan['requests']} requêtes){interval}{spread}\n"
+        
+        embed.add_field(
+            name="🔮 Coût prévu des cycles (pire cas)",
+            value=cycles_text or "Aucun cycle planifié",
+            inline=False
+        )
+        
+        await ctx.respond(embed=embed)
+        
+    except Exception as e:
+        await ctx.respond(f"❌ Erreur: {str(e)}")
+
+def format_latencies(series, label_key: str) -> str:
+    """Lignes p50/p95/p99 d'un histogramme de durées, une par valeur de label"""
+    lines = []
+    for labels, summary in series:
+        name = " / ".join(str(labels[key]) for key in label_key.split('+') if key in labels)
+        lines.append(
+            f"**{name}** {summary['p50'] * 1000:.0f} · {summary['p95'] * 1000:.0f} · "
+            f"{summary['p99'] * 1000:.0f} ms (n={summary['count']})"
+        )
+    return "\n".join(lines)
+
+@bot.slash_command(name="bot_stats", description="Durées des étapes des cycles de surveillance (admin)")
+@discord.default_permissions(administrator=True)
+async def bot_stats(ctx):
+    snapshot = metrics.snapshot()
+    histograms = snapshot['histograms']
+    counters = snapshot['counters']
+    
+    uptime_hours = snapshot['uptime'] / 3600
+    embed = discord.Embed(
+        title="📈 Statistiques du bot",
+        description=f"p50 · p95 · p99 depuis {uptime_hours:.1f}h",
+        color=discord.Color.blue()
+    )
+    
+    sections = [
+        ("🔄 Cycles", 'cycle_seconds', 'job'),
+        ("📥 Récupération par source", 'fetch_seconds', 'source'),
+        ("⚙️ Étapes (parsing, MA, évaluation, embeds)", 'stage_seconds', 'monitor+stage'),
+        ("📤 Webhooks Discord", 'webhook_seconds', 'status'),
+    ]
+    for title, name, label_key in sections:
+        value = format_latencies(histograms.get(name, []), label_key)
+        embed.add_field(name=title, value=value[:1024] or "Aucune mesure", inline=False)
+    
+    totals = []
+    for labels, value in counters.get('alerts_total', []):
+        totals.append(f"Alertes {labels['monitor']}: {value:g}")
+    for labels, value in counters.get('series_total', []):
+        totals.append(f"Séries MA {labels['result']}: {value:g}")
+    for labels, value in counters.get('webhook_embeds_total', []):
+        totals.append(f"Embeds {labels['result']}: {value:g}")
+    for labels, value in counters.get('cycle_errors_total', []):
+        totals.append(f"⚠️ Erreurs {labels['job']}: {value:g}")
+    embed.add_field(name="🔢 Totaux", value="\n".join(totals) or "Aucun", inline=False)
+    
+    if metrics_server:
+        embed.set_footer(text=f"Prometheus: http://{metrics_server.host}:{metrics_server.port}/metrics")
+    
+    await ctx.respond(embed=embed, ephemeral=True)
+
+@bot.slash_command(name="loop_lag", description="Retard et blocages de la boucle asyncio (admin)")
+@discord.default_permissions(administrator=True)
+async def loop_lag(ctx):
+    status = loop_watchdog.get_status()
+    lag = metrics.snapshot()['histograms'].get('loop_lag_seconds', [])
+    
+    embed = discord.Embed(
+        title="⏱️ Boucle asyncio",
+        description=f"Seuil de blocage: **{status['threshold'] * 1000:.0f} ms** • "
+                    f"{status['stalls']} blocage(s) depuis {status['uptime'] / 3600:.1f}h",
+        color=discord.Color.red() if status['stalls'] else discord.Color.green()
+    )
+    
+    if lag:
+        summary = lag[0][1]
+        embed.add_field(
+            name="📶 Retard",
+            value=f"p50 {summary['p50'] * 1000:.1f} · p95 {summary['p95'] * 1000:.1f} · "
+                  f"p99 {summary['p99'] * 1000:.1f} · max {summary['max'] * 1000:.0f} ms",
+            inline=False
+        )
+    
+    offenders = loop_watchdog.top_offenders()
+    if offenders:
+        embed.add_field(
+            name="🐢 Commandes et tâches bloquantes",
+            value="\n".join(
+                f"**{task}** {stats['count']}× • max {stats['max'] * 1000:.0f} ms • total {stats['total']:.1f}s"
+                for task, stats in offenders
+            )[:1024],
+            inline=False
+        )
+    
+    for stall in list(loop_watchdog.stalls)[-3:][::-1]:
+        stack = "\n".join(stall['stack'][-6:]) or "Pile non capturée"
+        embed.add_field(
+            name=f"🕐 {stall['at'].strftime('%H:%M:%S')} - {stall['task']} ({stall['seconds'] * 1000:.0f} ms)",
+            value=f"```\n{stack[-1000:]}\n```",
+            inline=False
+        )
+    
+    if not status['running']:
+        embed.set_footer(text="⚠️ Surveillance inactive")
+    
+    await ctx.respond(embed=embed, ephemeral=True)
+
 # ============================================================================
 # COMMANDE HELP
 # ============================================================================
@@ -1930,6 +2292,9 @@ async def help_command(ctx):
         "`/ma_alerts_config` - Configuration\n"
         "`/ma_alerts_test` - Test immédiat\n"
         "`/ma_alerts_status` - Historique\n"
+        "`/binance_weight` - Poids des requêtes Binance\n"
+        "`/bot_stats` - Durées des étapes (admin)\n"
+        "`/loop_lag` - Blocages de la boucle asyncio (admin)\n"
         "└ Alertes auto toutes les **15min** 🔥\n"
         "└ 2 systèmes: Court (7-300) + Long (112-750)\n"
         "└ Paires: 7-20, 20-50, 13-25, 25-32, 32-100, 100-200\n"
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from intervals import next_candle_close
+from metrics import metrics
+
+# Retard max rattrapé : au-delà (veille, blocage), seules les clôtures récentes sont traitées
+MAX_CATCH_UP = timedelta(minutes=5)
+
+# Source des bougies de chaque marché (grille de clôture)
+MARKET_SOURCES = {
+    'crypto': 'binance',
+    'stocks': 'yahoo',
+}
+
+
+class CandleCloseScheduler:
+    """
+    Planificateur aligné sur les clôtures de bougies
+
+    Chaque tâche déclare, par marché, les timeframes qu'elle surveille. Le
+    planificateur calcule la prochaine clôture de chaque (marché, timeframe) :
+    grille UTC pour les cryptos, séance de New York pour les actions. Quelques
+    secondes après une clôture, la tâche est appelée avec uniquement les
+    timeframes qui viennent de clôturer.
+    """
+
+    def __init__(self, delay_seconds: float = 5):
+        """
+        Args:
+            delay_seconds: Attente après la clôture (bougie disponible côté API)
+        """
+        self.delay_seconds = delay_seconds
+        # {nom: {'timeframes': callable, 'callback': coroutine, 'next_run': datetime, 'last_run': datetime}}
+        self._jobs: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._executions = set()
+
+    def add_job(self, name: str, timeframes: Callable[[], Dict[str, List[str]]],
+                callback: Callable[[Dict[str, List[str]]], Awaitable]):
+        """
+        Enregistre une tâche
+
+        Args:
+            name: Nom de la tâche (logs, statut)
+            timeframes: Fonction retournant {marché: [timeframes]} (relue à chaque
+                        calcul, les changements de configuration sont pris en compte)
+            callback: Coroutine appelée avec {marché: [timeframes clôturés]}
+        """
+        self._jobs[name] = {
+            'timeframes': timeframes,
+            'callback': callback,
+            'next_run': None,
+            'last_run': None
+        }
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _closes(self, job: Dict, now: datetime) -> Dict[datetime, Dict[str, List[str]]]:
+        """Prochaine clôture de chaque (marché, timeframe) d'une tâche, groupées par heure"""
+        closes: Dict[datetime, Dict[str, List[str]]] = {}
+        for market, timeframes in job['timeframes']().items():
+            source = MARKET_SOURCES.get(market, 'binance')
+            for timeframe in timeframes:
+                try:
+                    close = next_candle_close(source, timeframe, now)
+                except ValueError as e:
+                    print(f"⚠️ Planificateur: {e}")
+                    continue
+                closes.setdefault(close, {}).setdefault(market, []).append(timeframe)
+        return closes
+
+    def next_runs(self) -> Dict[str, Optional[datetime]]:
+        """Prochaine exécution prévue de chaque tâche (UTC)"""
+        return {name: job['next_run'] for name, job in self._jobs.items()}
+
+    def start(self):
+        """Démarre la boucle du planificateur (dans la boucle asyncio courante)"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        # Dernière clôture traitée par tâche (démarrage pour une nouvelle tâche) :
+        # une clôture n'est jamais exécutée deux fois ni sautée
+        last_close: Dict[str, datetime] = {}
+
+        while True:
+            now = datetime.now(timezone.utc)
+            due = []
+            next_wake = now + timedelta(hours=1)
+
+            for name, job in self._jobs.items():
+                # Clôtures comptées depuis la dernière traitée (pas de saut si la boucle a pris du retard)
+                reference = max(last_close.setdefault(name, now), now - MAX_CATCH_UP)
+                closes = self._closes(job, reference)
+                if not closes:
+                    job['next_run'] = None
+                    continue
+
+                close = min(closes)
+                run_at = close + timedelta(seconds=self.delay_seconds)
+                job['next_run'] = run_at
+                if run_at <= now:
+                    due.append((name, job, close, closes[close]))
+                else:
+                    next_wake = min(next_wake, run_at)
+
+            for name, job, close, closed in due:
+                last_close[name] = close
+                job['last_run'] = datetime.now(timezone.utc)
+                # Une tâche lente ne retarde pas les autres (nommée pour la surveillance de la boucle)
+                execution = asyncio.create_task(self._execute(name, job, closed), name=f"job {name}")
+                self._executions.add(execution)
+                execution.add_done_callback(self._executions.discard)
+
+            if due:
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), (next_wake - now).total_seconds())
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, name: str, job: Dict, closed: Dict[str, List[str]]):
+        if job.get('running'):
+            print(f"⚠️ {name}: exécution précédente encore en cours, clôture {closed} ignorée")
+            return
+
+        job['running'] = True
+        started = time.perf_counter()
+        try:
+            await job['callback'](closed)
+        except Exception as e:
+            metrics.inc('cycle_errors_total', job=name)
+            print(f"❌ Erreur tâche planifiée {name}: {e}")
+        finally:
+            job['running'] = False
+            metrics.observe('cycle_seconds', time.perf_counter() - started, job=name)
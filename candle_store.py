@@ -0,0 +1,468 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from binance_weight import kline_weight, weight_tracker
+from intervals import bucket_open, interval_to_ms
+from candles import CandleSeries
+from kline_resampler import resample_klines
+from metrics import metrics
+
+# Binance limite une requête klines à 1000 bougies
+BINANCE_MAX_LIMIT = 1000
+
+# Colonnes entières des klines (open_time, close_time, trades)
+INT_COLUMNS = (0, 6, 8)
+
+
+class CandleStore:
+    """Stockage local des bougies OHLCV (SQLite) avec récupération incrémentale"""
+
+    def __init__(self, db_file: str = "candles.db", max_rows: int = 2000,
+                 base_interval: str = '15m', derived_intervals: Tuple[str, ...] = ('1h', '4h', '1d'),
+                 base_limit: int = 1000, max_age_seconds: float = 60):
+        """
+        Args:
+            db_file: Fichier SQLite
+            max_rows: Nombre max de bougies conservées par série
+            base_interval: Interval fin téléchargé depuis Binance
+            derived_intervals: Intervals reconstruits localement depuis base_interval
+            base_limit: Nombre de bougies de base conservées pour le resampling
+            max_age_seconds: Une série synchronisée depuis moins longtemps, et depuis l'ouverture
+                de la bougie en cours, n'est pas re-téléchargée
+        """
+        self.db_file = db_file
+        self.max_rows = max_rows
+        self.base_interval = base_interval
+        self.derived_intervals = set(derived_intervals) - {base_interval}
+        self.base_limit = min(base_limit, max_rows)
+        self.max_age_seconds = max_age_seconds
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._series_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        # Verrous de série côté asyncio (un appel asynchrone par série à la fois)
+        self._async_locks: Dict[Tuple[str, str, str], asyncio.Lock] = {}
+        self._init_db()
+
+    def _init_db(self):
+        """Crée les tables si nécessaire"""
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS candles (
+                    source TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    open_time INTEGER NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL,
+                    close_time INTEGER,
+                    quote_volume REAL,
+                    trades INTEGER,
+                    taker_buy_base REAL,
+                    taker_buy_quote REAL,
+                    PRIMARY KEY (source, symbol, interval, open_time)
+                ) WITHOUT ROWID
+            """)
+            # exhausted = 1 si l'historique complet de la paire est déjà stocké
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS series (
+                    source TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    exhausted INTEGER DEFAULT 0,
+                    synced_at REAL,
+                    PRIMARY KEY (source, symbol, interval)
+                )
+            """)
+            self._conn.commit()
+
+    def _series_lock(self, key: Tuple[str, str, str]) -> threading.Lock:
+        """Verrou par série pour éviter deux téléchargements simultanés"""
+        with self._db_lock:
+            if key not in self._series_locks:
+                self._series_locks[key] = threading.Lock()
+            return self._series_locks[key]
+
+    def _series_info(self, key: Tuple[str, str, str]) -> Dict:
+        """Nombre de bougies, bornes et état de la série"""
+        with self._db_lock:
+            count, first_open, last_open = self._conn.execute(
+                "SELECT COUNT(*), MIN(open_time), MAX(open_time) FROM candles "
+                "WHERE source = ? AND symbol = ? AND interval = ?",
+                key
+            ).fetchone()
+            row = self._conn.execute(
+                "SELECT exhausted, synced_at FROM series "
+                "WHERE source = ? AND symbol = ? AND interval = ?",
+                key
+            ).fetchone()
+
+        return {
+            'count': count,
+            'first_open': first_open,
+            'last_open': last_open,
+            'exhausted': bool(row[0]) if row else False,
+            'synced_at': row[1] if row else None
+        }
+
+    def _upsert(self, key: Tuple[str, str, str], klines: Union[List[list], np.ndarray]):
+        """Insère ou remplace des bougies (format brut Binance, ou matrice de kline_parser)"""
+        if isinstance(klines, np.ndarray):
+            columns = [
+                klines[:, i].astype(np.int64).tolist() if i in INT_COLUMNS else klines[:, i].tolist()
+                for i in range(11)
+            ]
+            rows = [key + row for row in zip(*columns)]
+        else:
+            rows = [
+                key + (
+                    int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]),
+                    int(k[6]), float(k[7]), int(k[8]), float(k[9]), float(k[10])
+                )
+                for k in klines
+            ]
+        with self._db_lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def _clear(self, key: Tuple[str, str, str]):
+        """Supprime toutes les bougies d'une série"""
+        with self._db_lock:
+            self._conn.execute(
+                "DELETE FROM candles WHERE source = ? AND symbol = ? AND interval = ?",
+                key
+            )
+            self._conn.commit()
+
+    def _update_series(self, key: Tuple[str, str, str], exhausted: Optional[bool] = None,
+                       synced_at: Optional[float] = None):
+        """
+        Met à jour l'état de la série et élague les bougies les plus anciennes
+
+        Args:
+            synced_at: Heure des données (envoi des requêtes), maintenant par défaut
+        """
+        synced_at = time.time() if synced_at is None else synced_at
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO series (source, symbol, interval) VALUES (?, ?, ?)",
+                key
+            )
+            self._conn.execute(
+                "UPDATE series SET synced_at = ? WHERE source = ? AND symbol = ? AND interval = ?",
+                (synced_at,) + key
+            )
+            if exhausted is not None:
+                self._conn.execute(
+                    "UPDATE series SET exhausted = ? WHERE source = ? AND symbol = ? AND interval = ?",
+                    (int(exhausted),) + key
+                )
+            self._conn.execute(
+                "DELETE FROM candles WHERE source = ? AND symbol = ? AND interval = ? AND open_time < ("
+                "  SELECT open_time FROM candles WHERE source = ? AND symbol = ? AND interval = ?"
+                "  ORDER BY open_time DESC LIMIT 1 OFFSET ?"
+                ")",
+                key + key + (self.max_rows - 1,)
+            )
+            self._conn.commit()
+
+    def read_klines(self, symbol: str, interval: str, limit: int, source: str = 'binance') -> List[list]:
+        """Lit les `limit` dernières bougies stockées (format brut Binance)"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT open_time, open, high, low, close, volume, close_time, quote_volume, "
+                "trades, taker_buy_base, taker_buy_quote FROM candles "
+                "WHERE source = ? AND symbol = ? AND interval = ? "
+                "ORDER BY open_time DESC LIMIT ?",
+                (source, symbol, interval, limit)
+            ).fetchall()
+
+        rows.reverse()
+        return [list(row) + ['0'] for row in rows]
+
+    def read_candles(self, symbol: str, interval: str, limit: int, source: str = 'binance') -> CandleSeries:
+        """Lit les `limit` dernières bougies stockées en colonnes numpy (colonnes utiles seulement)"""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT open_time, open, high, low, close, volume, close_time, quote_volume FROM candles "
+                "WHERE source = ? AND symbol = ? AND interval = ? "
+                "ORDER BY open_time DESC LIMIT ?",
+                (source, symbol, interval, limit)
+            ).fetchall()
+
+        rows.reverse()
+        return CandleSeries.from_klines(rows, symbol, interval)
+
+    def _read(self, symbol: str, interval: str, limit: int, columns: bool) -> Union[List[list], CandleSeries]:
+        return self.read_candles(symbol, interval, limit) if columns else self.read_klines(symbol, interval, limit)
+
+    def get_klines(self, client, symbol: str, interval: str, limit: int, priority: str = 'high',
+                   columns: bool = False) -> Union[List[list], CandleSeries]:
+        """
+        Retourne les `limit` dernières bougies Binance en ne téléchargeant que les nouvelles
+
+        Les intervals dérivés (1h, 4h, 1d) sont mis à jour localement depuis
+        l'interval de base dès que leur historique est stocké : seul l'interval
+        de base nécessite alors un appel réseau.
+
+        Args:
+            client: Client Binance (python-binance)
+            symbol: Symbole Binance (BTCUSDT)
+            interval: Interval Binance ('15m', '1h', '4h', '1d')
+            limit: Nombre de bougies souhaitées (max 1000)
+            priority: 'high' (commandes) ou 'low' (cycles de surveillance, retardés si le
+                budget de poids Binance est atteint)
+            columns: Retourner une CandleSeries lue directement en colonnes (voir get_candles)
+
+        Returns:
+            Liste de klines au format Binance (12 colonnes, valeurs numériques)
+        """
+        limit = min(limit, BINANCE_MAX_LIMIT, self.max_rows)
+
+        if interval in self.derived_intervals:
+            klines = self._get_derived_klines(client, symbol, interval, limit, priority, columns)
+            if klines is not None:
+                return klines
+
+        return self._get_direct_klines(client, symbol, interval, limit, priority, columns)
+
+    def get_candles(self, client, symbol: str, interval: str, limit: int, priority: str = 'high') -> CandleSeries:
+        """get_klines en colonnes numpy (CandleSeries), sans liste de klines intermédiaire"""
+        return self.get_klines(client, symbol, interval, limit, priority, columns=True)
+
+    def _is_fresh(self, info: Dict, interval: str, limit: int) -> bool:
+        """
+        Vrai si la série est assez récente et complète pour éviter un appel réseau
+
+        Une synchronisation antérieure à l'ouverture de la bougie en cours n'est
+        jamais fraîche : la bougie clôturée depuis n'a été vue qu'en cours.
+        """
+        if info['synced_at'] is None:
+            return False
+        if info['count'] < limit and not info['exhausted']:
+            return False
+        now = time.time()
+        current_open = bucket_open(int(now * 1000), interval) / 1000
+        return info['synced_at'] >= current_open and now - info['synced_at'] < self.max_age_seconds
+
+    def _derived_ready(self, info: Dict, limit: int) -> bool:
+        """Vrai si l'historique stocké de l'interval cible permet le resampling"""
+        return info['count'] > 0 and (info['count'] >= limit or info['exhausted'])
+
+    def _apply_derived(self, key: Tuple[str, str, str], info: Dict, base: List[list], limit: int,
+                       columns: bool = False) -> Optional[Union[List[list], CandleSeries]]:
+        """Resample la fin de la série de base dans l'interval dérivé"""
+        _, symbol, interval = key
+
+        # La base doit couvrir la dernière bougie cible stockée depuis son ouverture
+        if not base or base[0][0] > info['last_open']:
+            return None
+
+        tail = [k for k in base if k[0] >= info['last_open']]
+        self._upsert(key, resample_klines(tail, interval))
+        self._update_series(key)
+
+        return self._read(symbol, interval, limit, columns)
+
+    def _get_derived_klines(self, client, symbol: str, interval: str, limit: int,
+                            priority: str = 'high', columns: bool = False) -> Optional[Union[List[list], CandleSeries]]:
+        """
+        Met à jour un interval dérivé depuis la série de base
+
+        Returns:
+            Klines, ou None si l'historique stocké ne permet pas le resampling
+        """
+        key = ('binance', symbol, interval)
+
+        with self._series_lock(key):
+            info = self._series_info(key)
+
+            # Il faut d'abord un historique complet de l'interval cible
+            if not self._derived_ready(info, limit):
+                return None
+
+            base = self.get_klines(client, symbol, self.base_interval, self.base_limit, priority)
+            return self._apply_derived(key, info, base, limit, columns)
+
+    def _fetch_plan(self, info: Dict, interval: str, limit: int) -> List[Tuple[str, Dict]]:
+        """
+        Requêtes klines nécessaires pour mettre la série à jour
+
+        Returns:
+            Liste de (type, paramètres get_klines) ; vide si la série est à jour
+        """
+        if self._is_fresh(info, interval, limit):
+            return []
+
+        step = interval_to_ms(interval)
+        now_ms = int(time.time() * 1000)
+
+        missing = None
+        if info['last_open'] is not None:
+            missing = (now_ms - info['last_open']) // step + 1
+
+        if info['count'] == 0 or missing > BINANCE_MAX_LIMIT:
+            # Pas d'historique exploitable : téléchargement complet
+            return [('full', {'limit': limit})]
+
+        plan = []
+
+        # Compléter l'historique si on demande plus que ce qui est stocké
+        if info['count'] < limit and not info['exhausted']:
+            plan.append(('older', {'endTime': info['first_open'] - 1, 'limit': limit - info['count']}))
+
+        # Nouvelles bougies (la dernière stockée est re-téléchargée car elle était peut-être en cours)
+        plan.append(('newer', {'startTime': info['last_open'], 'limit': max(missing, 1)}))
+        return plan
+
+    def _apply_fetch(self, key: Tuple[str, str, str], plan: List[Tuple[str, Dict]],
+                     results: List[Union[List[list], np.ndarray]], requested_at: float) -> bool:
+        """
+        Enregistre les bougies téléchargées selon le plan
+
+        Args:
+            requested_at: Heure d'envoi de la première requête (une réponse reçue après
+                une clôture peut décrire la bougie encore en cours)
+
+        Returns:
+            False si le téléchargement complet n'a rien renvoyé
+        """
+        if not plan:
+            return True
+
+        exhausted = None
+        for (kind, params), klines in zip(plan, results):
+            if kind == 'full':
+                if len(klines) == 0:
+                    return False
+                self._clear(key)
+                self._upsert(key, klines)
+                exhausted = len(klines) < params['limit']
+            else:
+                if len(klines):
+                    self._upsert(key, klines)
+                if kind == 'older':
+                    exhausted = len(klines) < params['limit']
+
+        self._update_series(key, exhausted=exhausted, synced_at=requested_at)
+        return True
+
+    def _request_klines(self, client, symbol: str, interval: str, params: Dict, priority: str) -> List[list]:
+        """Requête klines via python-binance, comptabilisée dans le suivi de poids"""
+        weight_tracker.acquire(kline_weight(params['limit']), priority)
+        try:
+            with metrics.timer('fetch_seconds', source='binance'):
+                return client.get_klines(symbol=symbol, interval=interval, **params)
+        finally:
+            weight_tracker.record_client_response(client)
+
+    def _get_direct_klines(self, client, symbol: str, interval: str, limit: int,
+                           priority: str = 'high', columns: bool = False) -> Union[List[list], CandleSeries]:
+        """Télécharge les bougies manquantes d'une série depuis Binance"""
+        key = ('binance', symbol, interval)
+
+        with self._series_lock(key):
+            plan = self._fetch_plan(self._series_info(key), interval, limit)
+            requested_at = time.time()
+            results = [
+                self._request_klines(client, symbol, interval, params, priority)
+                for _, params in plan
+            ]
+            if not self._apply_fetch(key, plan, results, requested_at):
+                return CandleSeries.from_klines([], symbol, interval) if columns else []
+
+            return self._read(symbol, interval, limit, columns)
+
+    def _async_lock(self, key: Tuple[str, str, str]) -> asyncio.Lock:
+        """Verrou asyncio d'une série (créé à la demande, dans la boucle du bot)"""
+        if key not in self._async_locks:
+            self._async_locks[key] = asyncio.Lock()
+        return self._async_locks[key]
+
+    async def _in_thread(self, key: Tuple[str, str, str], func: Callable, *args):
+        """Exécute une étape SQLite hors de la boucle, sous le verrou de série synchrone"""
+        def run():
+            with self._series_lock(key):
+                return func(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(None, run)
+
+    async def get_klines_async(self, client, symbol: str, interval: str, limit: int,
+                               priority: str = 'high', columns: bool = False) -> Union[List[list], CandleSeries]:
+        """
+        Version asynchrone de get_klines (client AsyncBinanceClient)
+
+        Les requêtes réseau sont attendues sur la boucle ; les accès SQLite
+        passent par le pool de threads. Les appels asynchrones d'une même série
+        sont sérialisés par un asyncio.Lock ; chaque étape SQLite prend aussi le
+        verrou de série synchrone, les écritures restent donc atomiques face à
+        get_klines (un appel synchrone concurrent peut au pire re-télécharger
+        les mêmes bougies). Les réponses sont décodées directement depuis les
+        octets reçus (kline_parser).
+        """
+        limit = min(limit, BINANCE_MAX_LIMIT, self.max_rows)
+
+        if interval in self.derived_intervals:
+            key = ('binance', symbol, interval)
+            async with self._async_lock(key):
+                info = await self._in_thread(key, self._series_info, key)
+                if self._derived_ready(info, limit):
+                    base = await self.get_klines_async(client, symbol, self.base_interval, self.base_limit, priority)
+                    klines = await self._in_thread(key, self._apply_derived, key, info, base, limit, columns)
+                    if klines is not None:
+                        return klines
+
+        key = ('binance', symbol, interval)
+        async with self._async_lock(key):
+            info = await self._in_thread(key, self._series_info, key)
+            plan = self._fetch_plan(info, interval, limit)
+            requested_at = time.time()
+            results = [
+                await client.get_klines_matrix(symbol=symbol, interval=interval, priority=priority, **params)
+                for _, params in plan
+            ]
+            if not await self._in_thread(key, self._apply_fetch, key, plan, results, requested_at):
+                return CandleSeries.from_klines([], symbol, interval) if columns else []
+
+            return await self._in_thread(key, self._read, symbol, interval, limit, columns)
+
+    async def get_candles_async(self, client, symbol: str, interval: str, limit: int,
+                                priority: str = 'high') -> CandleSeries:
+        """Version asynchrone de get_candles"""
+        return await self.get_klines_async(client, symbol, interval, limit, priority, columns=True)
+
+    def ingest_klines(self, symbol: str, interval: str, klines: List[list]) -> bool:
+        """
+        Ajoute des bougies reçues en streaming et marque la série comme synchronisée
+
+        Returns:
+            False si les bougies ne suivent pas la dernière bougie stockée (trou à
+            combler via REST au prochain get_klines)
+        """
+        if not klines:
+            return True
+
+        key = ('binance', symbol, interval)
+
+        with self._series_lock(key):
+            info = self._series_info(key)
+            step = interval_to_ms(interval)
+
+            if info['last_open'] is not None and int(klines[0][0]) > info['last_open'] + step:
+                return False
+
+            self._upsert(key, klines)
+            self._update_series(key)
+            return True
+
+    def close(self):
+        """Ferme la connexion SQLite"""
+        with self._db_lock:
+            self._conn.close()
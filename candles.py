@@ -0,0 +1,141 @@
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Colonnes des klines Binance conservées (les autres ne sont jamais lues)
+KLINE_OPEN_TIME = 0
+KLINE_CLOSE_TIME = 6
+KLINE_PRICE_COLUMNS = {'open': 1, 'high': 2, 'low': 3, 'close': 4, 'volume': 5, 'quote_volume': 7}
+
+
+class CandleSeries:
+    """
+    Bougies OHLCV en colonnes contiguës (float64 / int64)
+
+    Remplace les DataFrame construits à partir des 12 colonnes Binance : seules
+    les colonnes utilisées sont converties, une fois, et aucun index pandas
+    n'est créé. Les horodatages sont en ms UTC ; `tz` garde le fuseau de la
+    source (séance de New York pour Yahoo) pour les dates affichées.
+    """
+
+    __slots__ = ('symbol', 'interval', 'tz', 'open_time', 'close_time',
+                 'open', 'high', 'low', 'close', 'volume', 'quote_volume')
+
+    def __init__(self, open_time: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, volume: np.ndarray, quote_volume: Optional[np.ndarray] = None,
+                 close_time: Optional[np.ndarray] = None, symbol: Optional[str] = None,
+                 interval: Optional[str] = None, tz: Optional[str] = None):
+        self.symbol = symbol
+        self.interval = interval
+        self.tz = tz
+        self.open_time = open_time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        # Yahoo ne fournit ni volume en devise de cotation ni heure de clôture
+        self.quote_volume = quote_volume if quote_volume is not None else np.full(len(close), np.nan)
+        self.close_time = close_time if close_time is not None else open_time
+
+    @classmethod
+    def from_klines(cls, klines: List[list], symbol: Optional[str] = None,
+                    interval: Optional[str] = None) -> 'CandleSeries':
+        """
+        Convertit des klines au format Binance (chaînes de l'API ou nombres du stockage local)
+
+        Les lignes sont transposées en une passe, puis chaque colonne utile est
+        convertie directement en tableau numpy.
+        """
+        if not klines:
+            empty = np.empty(0, dtype=np.float64)
+            return cls(np.empty(0, dtype=np.int64), empty, empty, empty, empty, empty,
+                       empty, np.empty(0, dtype=np.int64), symbol, interval)
+
+        columns = list(zip(*klines))
+        prices = {name: np.array(columns[index], dtype=np.float64) for name, index in KLINE_PRICE_COLUMNS.items()}
+        return cls(
+            open_time=np.array(columns[KLINE_OPEN_TIME], dtype=np.int64),
+            close_time=np.array(columns[KLINE_CLOSE_TIME], dtype=np.int64),
+            symbol=symbol,
+            interval=interval,
+            **prices
+        )
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray, symbol: Optional[str] = None,
+                    interval: Optional[str] = None) -> 'CandleSeries':
+        """Convertit une matrice float64 (bougies x 12 colonnes Binance, voir kline_parser)"""
+        prices = {name: np.ascontiguousarray(matrix[:, index]) for name, index in KLINE_PRICE_COLUMNS.items()}
+        return cls(
+            open_time=matrix[:, KLINE_OPEN_TIME].astype(np.int64),
+            close_time=matrix[:, KLINE_CLOSE_TIME].astype(np.int64),
+            symbol=symbol,
+            interval=interval,
+            **prices
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, symbol: Optional[str] = None,
+                   interval: Optional[str] = None) -> 'CandleSeries':
+        """Convertit un historique yfinance (colonnes Open/High/Low/Close/Volume, index daté)"""
+        columns = {str(col).lower(): col for col in df.columns}
+        index = pd.DatetimeIndex(df.index)
+        tz = str(index.tz) if index.tz is not None else None
+        if tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        def column(name: str) -> np.ndarray:
+            return df[columns[name]].to_numpy(dtype=np.float64) if name in columns else np.full(len(df), np.nan)
+
+        return cls(
+            open_time=index.as_unit('ms').asi8.copy(),
+            open=column('open'),
+            high=column('high'),
+            low=column('low'),
+            close=column('close'),
+            volume=column('volume'),
+            symbol=symbol,
+            interval=interval,
+            tz=tz
+        )
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __getitem__(self, index: slice) -> 'CandleSeries':
+        """Sous-série (vues sur les mêmes tableaux, sans copie)"""
+        if not isinstance(index, slice):
+            raise TypeError("CandleSeries ne supporte que les tranches (candles[a:b])")
+        return CandleSeries(
+            self.open_time[index], self.open[index], self.high[index], self.low[index],
+            self.close[index], self.volume[index], self.quote_volume[index], self.close_time[index],
+            self.symbol, self.interval, self.tz
+        )
+
+    def tail(self, count: int) -> 'CandleSeries':
+        return self[-count:] if count > 0 else self[len(self):]
+
+    def timestamp(self, index: int = -1) -> pd.Timestamp:
+        """Ouverture d'une bougie (UTC sans fuseau pour Binance, fuseau de la source sinon)"""
+        ts = pd.Timestamp(int(self.open_time[index]), unit='ms')
+        return ts.tz_localize('UTC').tz_convert(self.tz) if self.tz else ts
+
+    @property
+    def nbytes(self) -> int:
+        """Mémoire occupée par les colonnes"""
+        arrays = {id(array): array for array in (self.open_time, self.open, self.high, self.low, self.close,
+                                                 self.volume, self.quote_volume, self.close_time)}
+        return sum(array.nbytes for array in arrays.values())
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame OHLCV indexé par date (exports, débogage)"""
+        index = pd.to_datetime(self.open_time, unit='ms')
+        if self.tz:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        index.name = 'timestamp'
+        return pd.DataFrame({
+            'open': self.open, 'high': self.high, 'low': self.low, 'close': self.close,
+            'volume': self.volume, 'quote_volume': self.quote_volume
+        }, index=index)
@@ -0,0 +1,129 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+
+def sma_matrix(values: Sequence[float], periods: Sequence[int]) -> np.ndarray:
+    """
+    Calcule plusieurs moyennes mobiles simples en une seule somme cumulée
+
+    Args:
+        values: Série de prix (ou volumes), du plus ancien au plus récent
+        periods: Périodes de MA à calculer
+
+    Returns:
+        Tableau float64 (len(periods) x len(values)) ; NaN tant que la fenêtre
+        ne contient pas `period` valeurs valides (même convention que pandas
+        rolling().mean() : une valeur NaN n'affecte que les fenêtres qui la contiennent)
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    n = values.shape[0]
+
+    result = np.full((len(periods), n), np.nan, dtype=np.float64)
+    if n == 0:
+        return result
+
+    # csum[i] = somme des i premières valeurs (NaN comptés 0), valid[i] = nombre de valeurs non NaN
+    missing = np.isnan(values)
+    csum = np.empty(n + 1, dtype=np.float64)
+    csum[0] = 0.0
+    np.cumsum(np.where(missing, 0.0, values), out=csum[1:])
+    valid = None
+    if missing.any():
+        valid = np.empty(n + 1, dtype=np.int64)
+        valid[0] = 0
+        np.cumsum(~missing, out=valid[1:])
+
+    for row, period in enumerate(periods):
+        if 0 < period <= n:
+            window = result[row, period - 1:]
+            np.subtract(csum[period:], csum[:-period], out=window)
+            window /= period
+            if valid is not None:
+                window[valid[period:] - valid[:-period] < period] = np.nan
+
+    return result
+
+
+def sma_at(ma_matrix: np.ndarray, periods: Sequence[int], index: int = -1) -> Dict[int, float]:
+    """Valeurs des MA à une position donnée sous forme {période: valeur}"""
+    if ma_matrix.shape[1] == 0 or not -ma_matrix.shape[1] <= index < ma_matrix.shape[1]:
+        return {period: float('nan') for period in periods}
+    return {period: float(ma_matrix[row, index]) for row, period in enumerate(periods)}
+
+
+def evaluate_ma_system(periods: Sequence[int], current: Dict[int, float],
+                       previous: Dict[int, float]) -> Dict:
+    """
+    Évalue en une opération tous les croisements et l'ordre d'un système de MA
+
+    Les écarts (MA_i - MA_j) des deux dernières bougies sont calculés pour toutes
+    les paires à la fois ; un croisement haussier correspond à un écart qui
+    passe de <= 0 à > 0 (mêmes règles que MAAlertMonitor.detect_cross).
+
+    Args:
+        periods: Périodes du système, de la plus rapide à la plus lente
+        current: {période: MA sur la dernière bougie}
+        previous: {période: MA sur la bougie précédente}
+
+    Returns:
+        {
+            'periods': list,
+            'crosses': ndarray int8 (n x n) : +1 si la ligne croise la colonne
+                       à la hausse, -1 à la baisse, 0 sinon,
+            'multiple_crosses': {ma_fast: [MA croisées]} (2 MA plus lentes ou plus),
+            'order': périodes triées par valeur décroissante (None si MA manquante),
+            'alignment': 'bullish_alignment', 'bearish_alignment' ou None
+        }
+    """
+    periods = list(periods)
+    nan = float('nan')
+    cur = np.array([current.get(p, nan) for p in periods], dtype=np.float64)
+    prev = np.array([previous.get(p, nan) for p in periods], dtype=np.float64)
+
+    diff_cur = cur[:, None] - cur[None, :]
+    diff_prev = prev[:, None] - prev[None, :]
+
+    # Les comparaisons avec NaN sont fausses : pas de croisement sans historique
+    golden = (diff_prev <= 0) & (diff_cur > 0)
+    death = (diff_prev >= 0) & (diff_cur < 0)
+    crosses = golden.astype(np.int8) - death.astype(np.int8)
+
+    # Croisements multiples : une MA croise au moins 2 MA plus lentes
+    slower_crossed = np.triu(crosses != 0, 1)
+    multiple_crosses = {
+        periods[i]: [periods[j] for j in np.flatnonzero(slower_crossed[i])]
+        for i in np.flatnonzero(slower_crossed.sum(axis=1) >= 2)
+    }
+
+    order = None
+    alignment = None
+    if periods and not np.isnan(cur).any():
+        # Tri stable décroissant (mêmes égalités que sorted(..., reverse=True))
+        order = [periods[i] for i in np.argsort(-cur, kind='stable')]
+        if order == sorted(periods):
+            alignment = 'bullish_alignment'
+        elif order == sorted(periods, reverse=True):
+            alignment = 'bearish_alignment'
+
+    return {
+        'periods': periods,
+        'crosses': crosses,
+        'multiple_crosses': multiple_crosses,
+        'order': order,
+        'alignment': alignment
+    }
+
+
+def cross_type(evaluation: Dict, ma_fast: int, ma_slow: int) -> Optional[str]:
+    """Type de croisement d'une paire dans le résultat de evaluate_ma_system"""
+    periods = evaluation['periods']
+    if ma_fast not in periods or ma_slow not in periods:
+        return None
+
+    value = evaluation['crosses'][periods.index(ma_fast), periods.index(ma_slow)]
+    if value > 0:
+        return 'golden_cross'
+    if value < 0:
+        return 'death_cross'
+    return None
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+# Durée des intervals Binance en millisecondes
+INTERVAL_MS: Dict[str, int] = {
+    '1m': 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 60 * 60_000,
+    '4h': 4 * 60 * 60_000,
+    '1d': 24 * 60 * 60_000,
+}
+
+
+UNIT_MS: Dict[str, int] = {
+    'm': 60_000,
+    'h': 60 * 60_000,
+    'd': 24 * 60 * 60_000,
+}
+
+# Séance régulière des marchés US (yfinance)
+NY_TZ = ZoneInfo('America/New_York')
+SESSION_OPEN = (9, 30)
+SESSION_CLOSE = (16, 0)
+
+INTERVAL_ALIASES = {'daily': '1d', 'h1': '1h', 'h4': '4h', '5min': '5m', '15min': '15m'}
+
+
+def interval_to_ms(interval: str) -> int:
+    """Retourne la durée d'un interval en millisecondes ('15m', '4h', ou multiple quelconque : '45m')"""
+    if interval in INTERVAL_MS:
+        return INTERVAL_MS[interval]
+
+    count, unit = interval[:-1], interval[-1:]
+    if unit in UNIT_MS and count.isdigit() and int(count) > 0:
+        return int(count) * UNIT_MS[unit]
+    raise ValueError(f"Interval non supporté: {interval}")
+
+
+def minutes_to_interval(minutes: int) -> str:
+    """Durée en minutes → interval ('60' → '1h', '15' → '15m')"""
+    if minutes % 1440 == 0:
+        return f"{minutes // 1440}d"
+    if minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    return f"{minutes}m"
+
+
+def normalize_interval(interval: str) -> str:
+    """Interval utilisateur → interval canonique ('daily' → '1d')"""
+    interval = interval.lower()
+    return INTERVAL_ALIASES.get(interval, interval)
+
+
+def bucket_open(timestamp_ms: int, interval: str) -> int:
+    """Heure d'ouverture (ms UTC) de la bougie contenant timestamp_ms"""
+    step = interval_to_ms(interval)
+    return timestamp_ms - (timestamp_ms % step)
+
+
+def _session_closes(day: datetime, interval: str):
+    """Heures de clôture des bougies yfinance d'une séance (heure de New York)"""
+    session_open = day.replace(hour=SESSION_OPEN[0], minute=SESSION_OPEN[1], second=0, microsecond=0)
+    session_close = day.replace(hour=SESSION_CLOSE[0], minute=SESSION_CLOSE[1], second=0, microsecond=0)
+
+    if interval == '1d':
+        return [session_close]
+
+    step = timedelta(milliseconds=interval_to_ms(interval))
+    # 4h est reconstruit par resample('4h') : bornes alignées sur minuit
+    start = day.replace(hour=0, minute=0, second=0, microsecond=0) if interval == '4h' else session_open
+
+    closes = []
+    close = start + step
+    while close < session_close:
+        if close > session_open:
+            closes.append(close)
+        close += step
+    closes.append(session_close)
+    return closes
+
+
+def next_candle_close(source: str, interval: str, now: Optional[datetime] = None) -> datetime:
+    """
+    Heure (UTC) de la prochaine clôture de bougie
+
+    Args:
+        source: 'binance' (bougies UTC continues) ou 'yahoo' (séance de New York,
+                du lundi au vendredi, jours fériés non gérés)
+        interval: '5m', '15m', '1h', '4h', '1d'
+        now: Heure de référence (UTC), maintenant par défaut
+    """
+    interval = normalize_interval(interval)
+    now = now or datetime.now(timezone.utc)
+
+    if source == 'binance':
+        step = interval_to_ms(interval)
+        now_ms = int(now.timestamp() * 1000)
+        return datetime.fromtimestamp((now_ms - now_ms % step + step) / 1000, tz=timezone.utc)
+
+    local = now.astimezone(NY_TZ)
+    for offset in range(8):
+        day = local + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for close in _session_closes(day, interval):
+            if close > local:
+                return close.astimezone(timezone.utc)
+
+    raise ValueError(f"Aucune clôture trouvée pour {source} {interval}")
+
+
+def last_candle_close(source: str, interval: str, now: Optional[datetime] = None) -> datetime:
+    """Heure (UTC) de la dernière clôture de bougie passée (voir next_candle_close)"""
+    interval = normalize_interval(interval)
+    now = now or datetime.now(timezone.utc)
+
+    if source == 'binance':
+        step = interval_to_ms(interval)
+        now_ms = int(now.timestamp() * 1000)
+        return datetime.fromtimestamp((now_ms - now_ms % step) / 1000, tz=timezone.utc)
+
+    local = now.astimezone(NY_TZ)
+    for offset in range(8):
+        day = local - timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for close in reversed(_session_closes(day, interval)):
+            if close <= local:
+                return close.astimezone(timezone.utc)
+
+    raise ValueError(f"Aucune clôture trouvée pour {source} {interval}")
@@ -0,0 +1,56 @@
+from typing import Optional
+
+import numpy as np
+
+from candles import CandleSeries
+
+# Colonnes d'une kline Binance (open_time, OHLCV, close_time, quote_volume, trades, taker x2, ignore)
+KLINE_FIELDS = 12
+
+# Crochets et guillemets supprimés : il ne reste que des nombres séparés par des virgules
+_JSON_SYNTAX = b'[]"'
+
+
+def parse_klines(payload: bytes) -> np.ndarray:
+    """
+    Décode la réponse brute de /api/v3/klines en une passe
+
+    Le JSON n'est pas désérialisé : la syntaxe est retirée des octets reçus
+    puis tous les nombres (y compris les prix transmis en chaînes) sont lus
+    directement en float64 par numpy. Aucune liste ni chaîne Python
+    intermédiaire n'est créée. Les horodatages (ms, < 2^53) restent exacts.
+
+    Les 12 colonnes sont décodées : la matrice alimente CandleStore, qui
+    enregistre et resample aussi les volumes taker, et numpy ne sait pas
+    sauter des champs pendant la lecture ; isoler les colonnes utiles
+    demanderait un découpage en Python, plus coûteux que la seule colonne
+    `ignore` décodée pour rien.
+
+    Args:
+        payload: Corps de la réponse HTTP (JSON, liste de klines)
+
+    Returns:
+        Matrice float64 (bougies x 12), dans l'ordre des colonnes Binance
+
+    Raises:
+        ValueError: Corps qui n'est pas une liste de klines (erreur Binance {"code", "msg"})
+    """
+    if payload.lstrip()[:1] == b'{':
+        raise ValueError(f"Réponse klines invalide: {payload[:200].decode(errors='replace')}")
+
+    body = payload.translate(None, _JSON_SYNTAX)
+    if not body.strip():
+        return np.empty((0, KLINE_FIELDS), dtype=np.float64)
+
+    try:
+        values = np.fromstring(body, dtype=np.float64, sep=',')
+    except ValueError:
+        raise ValueError(f"Réponse klines invalide: {payload[:200].decode(errors='replace')}") from None
+    if values.size % KLINE_FIELDS:
+        raise ValueError(f"Réponse klines invalide ({values.size} valeurs, multiple de {KLINE_FIELDS} attendu)")
+    return values.reshape(-1, KLINE_FIELDS)
+
+
+def parse_candles(payload: bytes, symbol: Optional[str] = None, interval: Optional[str] = None) -> CandleSeries:
+    """Réponse brute de /api/v3/klines -> CandleSeries (colonnes jamais lues ignorées)"""
+    return CandleSeries.from_matrix(parse_klines(payload), symbol, interval)
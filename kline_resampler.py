@@ -0,0 +1,54 @@
+from typing import List
+
+from intervals import bucket_open, interval_to_ms
+
+
+def resample_klines(klines: List[list], target_interval: str) -> List[list]:
+    """
+    Agrège des klines Binance vers un interval supérieur
+
+    Les bougies sont regroupées par tranche UTC (00:00, 04:00, ... pour 4h),
+    exactement comme Binance construit ses propres bougies.
+
+    Args:
+        klines: Klines triées par heure d'ouverture (format brut Binance)
+        target_interval: Interval cible ('1h', '4h', '1d')
+
+    Returns:
+        Klines agrégées au format Binance (12 colonnes)
+    """
+    step = interval_to_ms(target_interval)
+    resampled = []
+    current = None
+
+    for k in klines:
+        open_time = bucket_open(int(k[0]), target_interval)
+
+        if current is None or current[0] != open_time:
+            current = [
+                open_time,
+                float(k[1]),             # open
+                float(k[2]),             # high
+                float(k[3]),             # low
+                float(k[4]),             # close
+                float(k[5]),             # volume
+                open_time + step - 1,    # close_time
+                float(k[7]),             # quote_volume
+                int(k[8]),               # trades
+                float(k[9]),             # taker_buy_base
+                float(k[10]),            # taker_buy_quote
+                '0'
+            ]
+            resampled.append(current)
+            continue
+
+        current[2] = max(current[2], float(k[2]))
+        current[3] = min(current[3], float(k[3]))
+        current[4] = float(k[4])
+        current[5] += float(k[5])
+        current[7] += float(k[7])
+        current[8] += int(k[8])
+        current[9] += float(k[9])
+        current[10] += float(k[10])
+
+    return resampled
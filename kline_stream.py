@@ -0,0 +1,275 @@
+import asyncio
+import inspect
+import json
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+from candle_store import CandleStore
+from intervals import interval_to_ms
+
+DEFAULT_STREAM_URL = "wss://stream.binance.com:9443/stream"
+
+
+def kline_from_event(k: Dict) -> list:
+    """Convertit le champ 'k' d'un évènement kline WebSocket au format REST Binance"""
+    return [
+        k['t'], k['o'], k['h'], k['l'], k['c'], k['v'],
+        k['T'], k['q'], k['n'], k['V'], k['Q'], '0'
+    ]
+
+
+def kline_event(symbol: str, interval: str, kline: list, closed: bool) -> Dict:
+    """Construit un message de combined stream Binance à partir d'une kline REST"""
+    return {
+        'stream': f"{symbol.lower()}@kline_{interval}",
+        'data': {
+            'e': 'kline',
+            'E': int(kline[6]),
+            's': symbol,
+            'k': {
+                't': int(kline[0]), 'T': int(kline[6]), 's': symbol, 'i': interval,
+                'o': str(kline[1]), 'h': str(kline[2]), 'l': str(kline[3]), 'c': str(kline[4]),
+                'v': str(kline[5]), 'n': int(kline[8]), 'x': closed,
+                'q': str(kline[7]), 'V': str(kline[9]), 'Q': str(kline[10])
+            }
+        }
+    }
+
+
+class BinanceKlineStream:
+    """Flux WebSocket des klines Binance (combined streams) remplaçant le polling REST"""
+
+    def __init__(self, candle_store: Optional[CandleStore] = None, url: str = DEFAULT_STREAM_URL,
+                 interval: str = '15m', close_intervals: Iterable[str] = ('15m', '1h', '4h', '1d'),
+                 reconnect_delay: float = 5, max_concurrent_listeners: int = 8):
+        """
+        Args:
+            candle_store: Stockage où sont ajoutées les bougies clôturées
+            url: URL des combined streams (Binance ou serveur local)
+            interval: Interval souscrit pour chaque symbole
+            close_intervals: Intervals pour lesquels un évènement de clôture est émis
+                (les intervals supérieurs sont déduits de la clôture de `interval`)
+            reconnect_delay: Délai avant reconnexion (secondes)
+            max_concurrent_listeners: Notifications de clôture traitées en parallèle
+                (au-delà, la lecture du flux attend qu'une notification se termine)
+        """
+        self.candle_store = candle_store
+        self.url = url
+        self.interval = interval
+        base_ms = interval_to_ms(interval)
+        self.close_intervals = [
+            tf for tf in close_intervals
+            if interval_to_ms(tf) >= base_ms and interval_to_ms(tf) % base_ms == 0
+        ]
+        dropped = sorted(set(close_intervals) - set(self.close_intervals), key=interval_to_ms)
+        if dropped:
+            print(f"⚠️ Flux klines: clôtures {', '.join(dropped)} non émises (non multiples de {interval}) "
+                  f"- à vérifier par polling")
+        self.reconnect_delay = reconnect_delay
+        self.max_concurrent_listeners = max_concurrent_listeners
+
+        self.symbols: List[str] = []
+        # {(symbol, interval): {'closed': kline, 'current': kline}}
+        self.latest: Dict[Tuple[str, str], Dict[str, list]] = {}
+        self._listeners: List[Callable] = []
+        # Notifications en cours (créées dans la boucle qui lit le flux)
+        self._listener_semaphore: Optional[asyncio.Semaphore] = None
+        self._listener_tasks: set = set()
+        self._ws = None
+        self._running = False
+
+    def add_listener(self, callback: Callable):
+        """
+        Enregistre un callback appelé à chaque clôture de bougie
+
+        Le callback reçoit (symbol, interval, kline) et peut être une coroutine.
+        """
+        self._listeners.append(callback)
+
+    def set_symbols(self, symbols: Iterable[str]):
+        """Met à jour les symboles suivis (reconnexion si le flux est actif)"""
+        symbols = sorted({s.upper() for s in symbols if s})
+        if symbols == self.symbols:
+            return
+
+        self.symbols = symbols
+        if self._ws is not None and not self._ws.closed:
+            asyncio.ensure_future(self._ws.close())
+
+    def is_running(self) -> bool:
+        """Vrai si la boucle de réception tourne"""
+        return self._running
+
+    def get_latest(self, symbol: str) -> Dict[str, list]:
+        """Dernières bougies clôturée et en cours d'un symbole"""
+        return self.latest.get((symbol.upper(), self.interval), {})
+
+    def _stream_url(self) -> str:
+        streams = "/".join(f"{s.lower()}@kline_{self.interval}" for s in self.symbols)
+        return f"{self.url}?streams={streams}"
+
+    async def run(self):
+        """Boucle principale : connexion, réception, reconnexion automatique"""
+        self._running = True
+
+        async with aiohttp.ClientSession() as session:
+            while self._running:
+                if not self.symbols:
+                    await asyncio.sleep(self.reconnect_delay)
+                    continue
+
+                try:
+                    async with session.ws_connect(self._stream_url(), heartbeat=60) as ws:
+                        self._ws = ws
+                        print(f"✅ Flux klines connecté - {len(self.symbols)} symbole(s) en {self.interval}")
+
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                await self._handle_message(json.loads(msg.data))
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                except Exception as e:
+                    print(f"⚠️ Flux klines déconnecté: {e}")
+                finally:
+                    self._ws = None
+
+                if self._running:
+                    await asyncio.sleep(self.reconnect_delay)
+
+    async def stop(self):
+        """Arrête le flux (les notifications en cours sont annulées)"""
+        self._running = False
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+        for task in list(self._listener_tasks):
+            task.cancel()
+
+    async def _handle_message(self, message: Dict):
+        """Traite un message kline (combined stream ou stream simple)"""
+        data = message.get('data', message)
+        if data.get('e') != 'kline':
+            return
+
+        k = data['k']
+        symbol = k['s']
+        kline = kline_from_event(k)
+
+        state = self.latest.setdefault((symbol, k['i']), {})
+        state['current'] = kline
+
+        if not k['x']:
+            return
+
+        state['closed'] = kline
+
+        if self.candle_store is not None:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self.candle_store.ingest_klines, symbol, k['i'], [kline])
+
+        # La clôture de la bougie de base clôture aussi les intervals supérieurs alignés
+        close_ms = int(k['T']) + 1
+        for tf in self.close_intervals:
+            if close_ms % interval_to_ms(tf) == 0:
+                await self._start_notify(symbol, tf, kline)
+
+    async def _start_notify(self, symbol: str, interval: str, kline: list):
+        """
+        Lance les listeners de clôture dans une tâche séparée
+
+        La réception continue pendant l'évaluation des alertes (toutes les
+        clôtures d'une même minute arrivent en rafale) ; au plus
+        max_concurrent_listeners notifications tournent en même temps.
+        """
+        if self._listener_semaphore is None:
+            self._listener_semaphore = asyncio.Semaphore(self.max_concurrent_listeners)
+        await self._listener_semaphore.acquire()
+
+        task = asyncio.get_event_loop().create_task(self._notify(symbol, interval, kline))
+        self._listener_tasks.add(task)
+
+        def done(finished: asyncio.Future):
+            self._listener_tasks.discard(finished)
+            self._listener_semaphore.release()
+
+        task.add_done_callback(done)
+
+    async def _notify(self, symbol: str, interval: str, kline: list):
+        """Appelle les listeners de clôture"""
+        for callback in self._listeners:
+            try:
+                result = callback(symbol, interval, kline)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"❌ Erreur listener flux klines ({symbol} {interval}): {e}")
+
+
+class LocalKlineStreamServer:
+    """Serveur WebSocket local imitant les combined streams Binance (tests hors ligne)"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.host = host
+        self.port = port
+        self._runner = None
+        self._clients: List[Tuple[web.WebSocketResponse, set]] = []
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/stream"
+
+    async def start(self) -> str:
+        """Démarre le serveur et retourne l'URL à donner à BinanceKlineStream"""
+        app = web.Application()
+        app.router.add_get('/stream', self._handle_ws)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+        # Port réellement attribué si port=0
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.url
+
+    async def stop(self):
+        """Ferme les connexions et arrête le serveur"""
+        for ws, _ in list(self._clients):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        streams = set(filter(None, request.query.get('streams', '').split('/')))
+        client = (ws, streams)
+        self._clients.append(client)
+
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                # Support des messages SUBSCRIBE/UNSUBSCRIBE de l'API Binance
+                request_msg = json.loads(msg.data)
+                if request_msg.get('method') == 'SUBSCRIBE':
+                    streams.update(request_msg.get('params', []))
+                elif request_msg.get('method') == 'UNSUBSCRIBE':
+                    streams.difference_update(request_msg.get('params', []))
+                await ws.send_json({'result': None, 'id': request_msg.get('id')})
+        finally:
+            self._clients.remove(client)
+
+        return ws
+
+    async def publish(self, message: Dict):
+        """Envoie un message de combined stream aux clients abonnés"""
+        for ws, streams in list(self._clients):
+            if message['stream'] in streams and not ws.closed:
+                await ws.send_json(message)
+
+    async def publish_kline(self, symbol: str, interval: str, kline: list, closed: bool = True):
+        """Envoie une kline (format REST) comme évènement de stream"""
+        await self.publish(kline_event(symbol, interval, kline, closed))
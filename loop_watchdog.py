@@ -0,0 +1,176 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from metrics import metrics
+
+# Frames conservées par blocage (les plus proches de l'appel bloquant)
+STACK_DEPTH = 12
+
+
+def describe_task(task: Optional[asyncio.Task]) -> str:
+    """
+    Nom lisible d'une tâche asyncio
+
+    Les commandes slash sont renommées "/commande" (hook before_invoke du bot),
+    les tâches nommées gardent leur nom, les autres sont décrites par leur coroutine.
+    """
+    if task is None:
+        return "callback (hors tâche)"
+
+    name = task.get_name()
+    if not name.startswith('Task-'):
+        return name
+
+    coro = task.get_coro()
+    qualname = getattr(coro, '__qualname__', None) or type(coro).__name__
+    return qualname.replace('.<locals>', '')
+
+
+class LoopWatchdog:
+    """
+    Surveillance du retard de la boucle asyncio
+
+    Une coroutine se réveille toutes les `interval` secondes et mesure son
+    retard (histogramme loop_lag_seconds). Un thread compagnon détecte les
+    blocages en cours : au-delà de `threshold`, il capture la pile du thread
+    de la boucle (sys._current_frames) et la tâche en cours d'exécution
+    (commande slash, tâche de fond ou callback). Le blocage est enregistré
+    à la reprise de la boucle, avec sa durée réelle.
+    """
+
+    def __init__(self, threshold: float = 0.2, interval: float = 0.1, history: int = 50):
+        """
+        Args:
+            threshold: Retard (secondes) à partir duquel un blocage est enregistré
+            interval: Période du battement de la boucle
+            history: Nombre de blocages conservés
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = deque(maxlen=history)
+        # {tâche: {'count', 'total', 'max'}} depuis le démarrage
+        self.offenders: Dict[str, Dict] = {}
+        self.started_at: Optional[float] = None
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        # Battement attendu : (numéro, échéance time.monotonic())
+        self._beat = (0, 0.0)
+        # Capture du thread compagnon pour le battement en retard
+        self._capture: Optional[Dict] = None
+
+    def start(self):
+        """Démarre la surveillance de la boucle courante (à appeler depuis la boucle)"""
+        if self.is_running():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._running = True
+        self.started_at = time.time()
+        self._task = self._loop.create_task(self._heartbeat(), name="loop_watchdog")
+        self._thread = threading.Thread(target=self._watch, daemon=True, name="loop-watchdog")
+        self._thread.start()
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stop(self):
+        self._running = False
+        if self._task is not None:
+            self._task.cancel()
+
+    def tag_current_task(self, name: str):
+        """Nomme la tâche courante (commande slash) pour l'attribution des blocages"""
+        task = asyncio.current_task()
+        if task is not None:
+            task.set_name(name)
+
+    async def _heartbeat(self):
+        sequence = 0
+        while True:
+            sequence += 1
+            deadline = time.monotonic() + self.interval
+            with self._lock:
+                self._beat = (sequence, deadline)
+            await asyncio.sleep(self.interval)
+
+            lag = max(0.0, time.monotonic() - deadline)
+            metrics.observe('loop_lag_seconds', lag)
+            if lag >= self.threshold:
+                with self._lock:
+                    capture = self._capture if self._capture and self._capture['beat'] == sequence else None
+                    self._capture = None
+                self._record(lag, capture)
+
+    def _watch(self):
+        """Thread compagnon : capture la pile pendant que la boucle est bloquée"""
+        period = min(self.interval, self.threshold) / 2
+        while self._running:
+            time.sleep(period)
+            with self._lock:
+                sequence, deadline = self._beat
+                captured = self._capture is not None and self._capture['beat'] == sequence
+            overdue = time.monotonic() - deadline
+            if overdue < self.threshold or captured:
+                continue
+
+            capture = {
+                'beat': sequence,
+                'task': describe_task(asyncio.current_task(self._loop)),
+                'stack': self._loop_stack(),
+            }
+            with self._lock:
+                self._capture = capture
+
+    def _loop_stack(self) -> List[str]:
+        """Pile actuelle du thread de la boucle ("fichier:ligne fonction - code")"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return []
+        lines = []
+        for entry in traceback.extract_stack(frame)[-STACK_DEPTH:]:
+            filename = entry.filename.rsplit('/', 1)[-1]
+            lines.append(f"{filename}:{entry.lineno} {entry.name} - {(entry.line or '').strip()}")
+        return lines
+
+    def _record(self, lag: float, capture: Optional[Dict]):
+        task = capture['task'] if capture else "inconnue (blocage plus court que la détection)"
+        stack = capture['stack'] if capture else []
+        self.stalls.append({
+            'at': datetime.now(),
+            'seconds': lag,
+            'task': task,
+            'stack': stack,
+        })
+
+        offender = self.offenders.setdefault(task, {'count': 0, 'total': 0.0, 'max': 0.0})
+        offender['count'] += 1
+        offender['total'] += lag
+        offender['max'] = max(offender['max'], lag)
+        metrics.inc('loop_stalls_total', task=task)
+
+        where = f" ({stack[-1].split(' - ')[0]})" if stack else ""
+        print(f"⚠️ Boucle asyncio bloquée {lag * 1000:.0f} ms - {task}{where}")
+
+    def top_offenders(self, limit: int = 5) -> List[tuple]:
+        """Tâches ayant le plus bloqué la boucle (temps cumulé décroissant)"""
+        return sorted(self.offenders.items(), key=lambda item: item[1]['total'], reverse=True)[:limit]
+
+    def get_status(self) -> Dict:
+        return {
+            'running': self.is_running(),
+            'threshold': self.threshold,
+            'interval': self.interval,
+            'stalls': sum(offender['count'] for offender in self.offenders.values()),
+            'uptime': time.time() - self.started_at if self.started_at else 0.0,
+        }
@@ -1,20 +1,49 @@
 from binance.client import Client
+import asyncio
 import yfinance as yf
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import json
 import os
-import requests
+from candle_store import CandleStore
+from async_market_client import AsyncBinanceClient
+from webhook_delivery import WebhookDispatcher
+from alert_state import AlertStateStore
+from binance_weight import kline_weight, weight_tracker
+from ma_engine import IncrementalMAEngine
+from candles import CandleSeries
+from yahoo_batch import download_histories
+from indicators import sma_matrix, sma_at, evaluate_ma_system, cross_type
+from intervals import last_candle_close
+from metrics import metrics
 
 class MAAlertMonitor:
     """Surveillance des croisements et alignements de moyennes mobiles"""
     
-    def __init__(self, config_file: str = "ma_alerts_config.json"):
+    def __init__(self, config_file: str = "ma_alerts_config.json", candle_store: Optional[CandleStore] = None,
+                 async_client: Optional[AsyncBinanceClient] = None,
+                 dispatcher: Optional[WebhookDispatcher] = None,
+                 state_store: Optional[AlertStateStore] = None, workers=None):
+        """
+        Args:
+            workers: MonitorWorkerPool optionnel (évaluation crypto répartie sur plusieurs processus)
+        """
         self.config_file = config_file
         self.config = self._load_config()
         self.binance_client = Client()
-        self.alert_history = {}  # Pour éviter spam
+        self.async_client = async_client or AsyncBinanceClient()
+        self.candle_store = candle_store or CandleStore()
+        self.dispatcher = dispatcher or WebhookDispatcher()  # Envoi des webhooks en arrière-plan
+        self.workers = workers
+        self.ma_engine = IncrementalMAEngine()  # MA crypto mises à jour bougie par bougie
+        self.last_evaluated = {}  # {(symbol, timeframe): clôture de la dernière bougie terminée évaluée}
+        self.last_cycle_stats = {}  # Travail effectué / évité au dernier cycle
+        # Cooldowns et derniers états MA conservés entre les redémarrages
+        self.state_store = state_store or AlertStateStore()
+        self.state_store.prune_cooldowns('ma_alerts', self.config['cooldown_hours'] * 3600)
+        self.alert_history = self.state_store.load_cooldowns('ma_alerts')  # Pour éviter spam
         
         # Deux systèmes de MA
         self.ma_system1 = [7, 13, 20, 25, 32, 50, 100, 200, 300]  # Court terme (ajout MA7 et MA20)
@@ -129,6 +158,25 @@ class MAAlertMonitor:
     def _mark_alert_sent(self, alert_key: str):
         """Marque qu'une alerte a été envoyée"""
         self.alert_history[alert_key] = datetime.now()
+        self.state_store.mark_sent('ma_alerts', alert_key, self.alert_history[alert_key])
+
+    def needs_warmup(self) -> bool:
+        """Warm-up silencieux nécessaire uniquement si aucun état n'a jamais été enregistré"""
+        return not self.state_store.has_ma_state()
+
+    def _ma_state(self, data: Dict, evaluation: Dict) -> Dict:
+        """Dernier état évalué d'une série (enregistré par symbole, timeframe, système)"""
+        candles = data.get('candles')
+        candle = None
+        if candles is not None and len(candles):
+            candle = candles.timestamp(-1).isoformat()
+
+        return {
+            'candle': candle,
+            'ma_values': {str(p): float(v) for p, v in data['ma_values'].items() if v == v},
+            'order': evaluation['order'],
+            'alignment': evaluation['alignment']
+        }
 
     def get_signal_priority(self, ma_fast: int, ma_slow: int, is_multiple_cross: bool = False) -> Dict:
         """
@@ -197,7 +245,7 @@ class MAAlertMonitor:
         Calcule le score EMA Cascade Unified v2.0 (sur 100 points)
 
         Args:
-            data: Données MA avec df pandas
+            data: Données MA avec les bougies (CandleSeries)
             signal_tf: Timeframe du signal ('15m', '1h', '4h', '1d')
 
         Returns:
@@ -213,10 +261,10 @@ class MAAlertMonitor:
                 'conviction_emoji': str
             }
         """
-        df = data['df']
+        candles = data['candles']
         ma_values = data['ma_values']
 
-        if len(df) < 2:
+        if len(candles) < 2:
             return {'total_score': 0, 'tradable': False}
 
         # ===== TIER 1: Direction Daily (35 points) =====
@@ -240,9 +288,9 @@ class MAAlertMonitor:
 
         # ADX Daily - Simulé avec volatilité (5 pts)
         # Note: ADX réel nécessite calcul complexe, ici on simule avec range
-        if len(df) >= 14:
-            recent_high = df['high'].tail(14).max()
-            recent_low = df['low'].tail(14).min()
+        if len(candles) >= 14:
+            recent_high = np.nanmax(candles.high[-14:])
+            recent_low = np.nanmin(candles.low[-14:])
             price_range_pct = ((recent_high - recent_low) / recent_low) * 100
             if price_range_pct > 10:  # Forte volatilité = trend fort
                 tier1_score += 5
@@ -262,9 +310,9 @@ class MAAlertMonitor:
         tier2_score += tier2_base_map.get(signal_tf, 6)
 
         # Volume spike (12 pts max) - Simulé avec volume actuel vs moyenne
-        if 'volume' in df.columns:
-            current_vol = df['volume'].iloc[-1]
-            avg_vol = df['volume'].tail(20).mean()
+        if not np.isnan(candles.volume).all():
+            current_vol = candles.volume[-1]
+            avg_vol = np.nanmean(candles.volume[-20:])
             if current_vol > avg_vol * 1.5:  # >150%
                 tier2_score += 12
             elif current_vol > avg_vol * 1.2:  # >120%
@@ -273,8 +321,9 @@ class MAAlertMonitor:
                 tier2_score += 4
 
         # RSI simulation (5 pts) - Basé sur momentum
-        if len(df) >= 14:
-            gains = df['close'].diff().tail(14)
+        if len(candles) >= 14:
+            # 14 dernières variations de clôture (13 si la série n'a que 14 bougies)
+            gains = np.diff(candles.close[-15:])
             avg_gain = gains[gains > 0].mean() if len(gains[gains > 0]) > 0 else 0
             avg_loss = abs(gains[gains < 0].mean()) if len(gains[gains < 0]) > 0 else 0
             if avg_loss > 0:
@@ -349,49 +398,53 @@ class MAAlertMonitor:
             'conviction_tier': conviction_tier
         }
 
-    def get_crypto_ma_data(self, symbol: str, timeframe: str, ma_system: List[int]) -> Optional[Dict]:
-        """Récupère les MA pour une crypto"""
+    def _binance_interval(self, timeframe: str) -> str:
+        """Convertit un timeframe en interval Binance"""
+        interval_map = {
+            '5m': Client.KLINE_INTERVAL_5MINUTE,
+            '15m': Client.KLINE_INTERVAL_15MINUTE,
+            '1h': Client.KLINE_INTERVAL_1HOUR,
+            '4h': Client.KLINE_INTERVAL_4HOUR,
+            '1d': Client.KLINE_INTERVAL_1DAY,
+        }
+        return interval_map.get(timeframe, Client.KLINE_INTERVAL_1DAY)
+    
+    def _all_periods(self) -> List[int]:
+        """Union des MA des deux systèmes (une seule récupération par actif/timeframe)"""
+        return sorted(set(self.ma_system1) | set(self.ma_system2))
+    
+    def get_crypto_ma_data(self, symbol: str, timeframe: str, ma_system: List[int],
+                           candles: Optional[CandleSeries] = None) -> Optional[Dict]:
+        """
+        Récupère les MA pour une crypto
+        
+        Args:
+            candles: Bougies déjà récupérées (check_all_assets_async), sinon lues via le stockage
+        """
         try:
-            interval_map = {
-                '5m': Client.KLINE_INTERVAL_5MINUTE,
-                '15m': Client.KLINE_INTERVAL_15MINUTE,
-                '1h': Client.KLINE_INTERVAL_1HOUR,
-                '4h': Client.KLINE_INTERVAL_4HOUR,
-                '1d': Client.KLINE_INTERVAL_1DAY,
-            }
-            
-            binance_interval = interval_map.get(timeframe, Client.KLINE_INTERVAL_1DAY)
-            limit = max(ma_system) + 50
-            
-            klines = self.binance_client.get_klines(
-                symbol=symbol,
-                interval=binance_interval,
-                limit=limit
-            )
-            
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            
-            df['close'] = df['close'].astype(float)
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+            if candles is None:
+                candles = self.candle_store.get_candles(
+                    self.binance_client,
+                    symbol,
+                    self._binance_interval(timeframe),
+                    max(ma_system) + 50,
+                    priority='low'
+                )
             
-            # Calculer les MA
-            ma_values = {}
-            for period in ma_system:
-                df[f'MA{period}'] = df['close'].rolling(window=period).mean()
-                ma_values[period] = df[f'MA{period}'].iloc[-1]
+            # MA incrémentales : seules les bougies terminées depuis le dernier cycle sont ajoutées
+            now_ms = int(datetime.now().timestamp() * 1000)
+            with metrics.timer('stage_seconds', monitor='ma', stage='ma_compute'):
+                ma_state = self.ma_engine.update(symbol, timeframe, candles, ma_system, now_ms)
             
-            current_price = df['close'].iloc[-1]
+            current_price = float(candles.close[-1])
             
             return {
                 'symbol': symbol,
                 'timeframe': timeframe,
                 'current_price': current_price,
-                'ma_values': ma_values,
-                'df': df,
+                'ma_values': ma_state['current'],
+                'ma_prev_values': ma_state['previous'],
+                'candles': candles,
                 'timestamp': datetime.now()
             }
             
@@ -399,57 +452,94 @@ class MAAlertMonitor:
             print(f"❌ Erreur crypto MA {symbol}: {e}")
             return None
     
-    def get_stock_ma_data(self, symbol: str, timeframe: str, ma_system: List[int]) -> Optional[Dict]:
-        """Récupère les MA pour une action"""
+    def _stock_history_params(self, timeframe: str) -> Tuple[str, str]:
+        """Interval et période yfinance d'un timeframe (4h est reconstruit depuis 1h)"""
+        interval_map = {
+            '1h': '1h',
+            '4h': '1h',
+            '1d': '1d'
+        }
+        
+        period_map = {
+            '1h': '60d',
+            '4h': '60d',
+            '1d': 'max'
+        }
+        
+        return interval_map.get(timeframe, '1d'), period_map.get(timeframe, 'max')
+    
+    def prefetch_stock_histories(self, timeframe: str, cache: Optional[Dict] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Télécharge l'historique de toutes les actions surveillées en une requête groupée
+        
+        Args:
+            cache: Dict {(interval, période): historiques} partagé pendant un cycle
+                   (1h et 4h utilisent le même téléchargement)
+        """
+        params = self._stock_history_params(timeframe)
+        if cache is not None and params in cache:
+            return cache[params]
+        
+        yf_interval, period = params
+        histories = download_histories(self.config['assets']['stocks'], period, yf_interval)
+        if cache is not None:
+            cache[params] = histories
+        return histories
+    
+    def get_stock_ma_data(self, symbol: str, timeframe: str, ma_system: List[int],
+                          history: Optional[pd.DataFrame] = None) -> Optional[Dict]:
+        """
+        Récupère les MA pour une action
+        
+        Args:
+            history: Historique déjà téléchargé (prefetch_stock_histories), sinon Ticker.history
+        """
         try:
-            ticker = yf.Ticker(symbol)
-            
-            interval_map = {
-                '1h': '1h',
-                '4h': '1h',
-                '1d': '1d'
-            }
-            
-            period_map = {
-                '1h': '60d',
-                '4h': '60d',
-                '1d': 'max'
-            }
-            
-            yf_interval = interval_map.get(timeframe, '1d')
-            period = period_map.get(timeframe, 'max')
-            
-            df = ticker.history(period=period, interval=yf_interval)
+            if history is not None:
+                df = history.copy()
+            else:
+                yf_interval, period = self._stock_history_params(timeframe)
+                with metrics.timer('fetch_seconds', source='yahoo'):
+                    df = yf.Ticker(symbol).history(period=period, interval=yf_interval)
             
             if df.empty:
                 return None
             
-            df.columns = df.columns.str.lower()
-            
-            # Resample pour 4h si nécessaire
-            if timeframe == '4h':
-                df = df.resample('4h').agg({
-                    'open': 'first',
-                    'high': 'max',
-                    'low': 'min',
-                    'close': 'last',
-                    'volume': 'sum'
-                }).dropna()
+            with metrics.timer('stage_seconds', monitor='ma', stage='parse'):
+                df.columns = df.columns.str.lower()
+                
+                # Resample pour 4h si nécessaire
+                if timeframe == '4h':
+                    df = df.resample('4h').agg({
+                        'open': 'first',
+                        'high': 'max',
+                        'low': 'min',
+                        'close': 'last',
+                        'volume': 'sum'
+                    }).dropna()
+                
+                # Lignes sans clôture (séances incomplètes Yahoo) : ignorées
+                df = df.dropna(subset=['close'])
+                if df.empty:
+                    return None
+                
+                candles = CandleSeries.from_frame(df, symbol, timeframe)
             
-            # Calculer les MA
-            ma_values = {}
-            for period in ma_system:
-                df[f'MA{period}'] = df['close'].rolling(window=period).mean()
-                ma_values[period] = df[f'MA{period}'].iloc[-1]
+            # Calculer toutes les MA en une passe
+            with metrics.timer('stage_seconds', monitor='ma', stage='ma_compute'):
+                ma_matrix = sma_matrix(candles.close, ma_system)
+                ma_values = sma_at(ma_matrix, ma_system, -1)
+                ma_prev_values = sma_at(ma_matrix, ma_system, -2)
             
-            current_price = df['close'].iloc[-1]
+            current_price = float(candles.close[-1])
             
             return {
                 'symbol': symbol,
                 'timeframe': timeframe,
                 'current_price': current_price,
                 'ma_values': ma_values,
-                'df': df,
+                'ma_prev_values': ma_prev_values,
+                'candles': candles,
                 'timestamp': datetime.now()
             }
             
@@ -460,12 +550,13 @@ class MAAlertMonitor:
     def detect_cross(self, data: Dict, ma_fast: int, ma_slow: int) -> Optional[str]:
         """Détecte un croisement entre deux MA"""
         try:
-            df = data['df']
+            ma_values = data['ma_values']
+            ma_prev_values = data['ma_prev_values']
             
-            ma_fast_current = df[f'MA{ma_fast}'].iloc[-1]
-            ma_slow_current = df[f'MA{ma_slow}'].iloc[-1]
-            ma_fast_prev = df[f'MA{ma_fast}'].iloc[-2]
-            ma_slow_prev = df[f'MA{ma_slow}'].iloc[-2]
+            ma_fast_current = ma_values[ma_fast]
+            ma_slow_current = ma_values[ma_slow]
+            ma_fast_prev = ma_prev_values[ma_fast]
+            ma_slow_prev = ma_prev_values[ma_slow]
             
             if pd.isna(ma_fast_current) or pd.isna(ma_slow_current):
                 return None
@@ -486,27 +577,19 @@ class MAAlertMonitor:
             print(f"❌ Erreur détection croisement: {e}")
             return None
     
-    def check_alignment(self, data: Dict, ma_system: List[int]) -> Optional[str]:
+    def evaluate_system(self, data: Dict, ma_system: List[int]) -> Dict:
+        """Croisements, croisements multiples et alignement d'un système en une passe"""
+        return evaluate_ma_system(ma_system, data['ma_values'], data['ma_prev_values'])
+    
+    def check_alignment(self, data: Dict, ma_system: List[int], evaluation: Optional[Dict] = None) -> Optional[str]:
         """Vérifie l'alignement des MA"""
-        ma_values = data['ma_values']
-        
-        if not all(period in ma_values for period in ma_system):
+        if not all(period in data['ma_values'] for period in ma_system):
             return None
         
-        sorted_by_value = sorted([(p, ma_values[p]) for p in ma_system], key=lambda x: x[1], reverse=True)
-        current_order = [p for p, _ in sorted_by_value]
-        
-        # Alignement haussier
-        expected_bullish = sorted(ma_system)
-        if current_order == expected_bullish:
-            return 'bullish_alignment'
-        
-        # Alignement baissier
-        expected_bearish = sorted(ma_system, reverse=True)
-        if current_order == expected_bearish:
-            return 'bearish_alignment'
+        if evaluation is None:
+            evaluation = self.evaluate_system(data, ma_system)
         
-        return None
+        return evaluation['alignment']
     
     def check_compression(self, data: Dict, ma_system: List[int]) -> Optional[float]:
         """Vérifie la compression des MA"""
@@ -526,7 +609,8 @@ class MAAlertMonitor:
 
         return compression_pct
 
-    def _detect_multiple_crosses(self, data: Dict, ma_system: List[int]) -> Dict[int, List[int]]:
+    def _detect_multiple_crosses(self, data: Dict, ma_system: List[int],
+                                 evaluation: Optional[Dict] = None) -> Dict[int, List[int]]:
         """
         Détecte si une MA rapide croise plusieurs MA en même temps
 
@@ -534,31 +618,13 @@ class MAAlertMonitor:
             Dict {ma_fast: [list of MA crossed]}
             Ex: {13: [25, 32]} signifie que MA13 croise MA25 ET MA32
         """
-        multiple_crosses = {}
-        df = data['df']
+        if evaluation is None:
+            evaluation = self.evaluate_system(data, ma_system)
 
-        if len(df) < 2:
-            return multiple_crosses
-
-        # Pour chaque MA rapide du système
-        for i, ma_fast in enumerate(ma_system[:-1]):  # Exclure la dernière
-            crossed_mas = []
-
-            # Vérifier croisement avec toutes les MA plus lentes
-            for ma_slow in ma_system[i+1:]:
-                cross_type = self.detect_cross(data, ma_fast, ma_slow)
-
-                if cross_type:  # Si croisement détecté
-                    crossed_mas.append(ma_slow)
-
-            # Ne garder que si au moins 2 MA sont croisées
-            if len(crossed_mas) >= 2:
-                multiple_crosses[ma_fast] = crossed_mas
-
-        return multiple_crosses
+        return evaluation['multiple_crosses']
     
-    def send_discord_alert(self, alert_type: str, data: Dict, details: Dict):
-        """Envoie une alerte Discord - FORMAT CLAIR avec routing par webhook"""
+    def _alert_webhook(self, alert_type: str) -> Tuple[Optional[str], Optional[str]]:
+        """Webhook d'un type d'alerte : (clé de routage, URL), None si non configuré"""
         
         # Router vers le bon webhook selon le type d'alerte
         webhook_map = {
@@ -575,7 +641,7 @@ class MAAlertMonitor:
         webhook_key = webhook_map.get(alert_type)
         if not webhook_key:
             print(f"⚠️  Type d'alerte inconnu: {alert_type}")
-            return
+            return None, None
         
         # Récupérer l'URL du webhook
         webhooks = self.config.get('webhooks', {})
@@ -583,8 +649,33 @@ class MAAlertMonitor:
         
         if not webhook_url:
             print(f"⚠️  Webhook non configuré pour: {webhook_key}")
+            return webhook_key, None
+        
+        return webhook_key, webhook_url
+    
+    def send_discord_alert(self, alert_type: str, data: Dict, details: Dict, embed: Optional[Dict] = None):
+        """
+        Envoie une alerte Discord - FORMAT CLAIR avec routing par webhook
+        
+        Args:
+            embed: Embed déjà construit (workers multi-process), sinon construit depuis data
+        """
+        webhook_key, webhook_url = self._alert_webhook(alert_type)
+        if not webhook_url:
             return
         
+        if embed is None:
+            with metrics.timer('stage_seconds', monitor='ma', stage='embed'):
+                embed = self.build_alert_embed(alert_type, data, details)
+            if embed is None:
+                return
+        
+        # Envoi en arrière-plan (regroupement des embeds, 429 et nouvelles tentatives)
+        self.dispatcher.send(webhook_url, embed,
+                             label=f"Alerte MA envoyée: {alert_type} → {webhook_key} - {data['symbol']}")
+    
+    def build_alert_embed(self, alert_type: str, data: Dict, details: Dict) -> Dict:
+        """Construit l'embed Discord d'une alerte MA"""
         alert_configs = {
             'golden_cross': {
                 'emoji': '🟢',
@@ -630,7 +721,7 @@ class MAAlertMonitor:
         
         config = alert_configs.get(alert_type)
         if not config:
-            return
+            return None
         
         symbol_display = data['symbol'].replace('USDT', '').replace('BUSD', '')
         
@@ -783,63 +874,314 @@ class MAAlertMonitor:
             "timestamp": data['timestamp'].isoformat()
         }
         
-        payload = {"embeds": [embed]}
+        return embed
+    
+    def plan_binance_cycle(self, timeframes: Optional[List[str]] = None) -> Dict:
+        """Coût prévu d'un cycle crypto (pire cas : historique complet re-téléchargé)"""
+        timeframes = self.config['timeframes'] if timeframes is None else timeframes
+        weight = kline_weight(max(self._all_periods()) + 50)
+        requests = [weight] * (len(self.config['assets']['crypto']) * len(timeframes))
+        return weight_tracker.plan_cycle('ma_alerts', requests, self.config.get('check_interval_minutes'))
+    
+    def _last_closed_candle(self, market: str, timeframe: str):
+        """Clôture de la dernière bougie terminée des données utilisées pour un timeframe"""
+        if market == 'crypto':
+            return last_candle_close('binance', self._binance_interval(timeframe))
         
-        try:
-            response = requests.post(webhook_url, json=payload)
-            if response.status_code == 204:
-                print(f"✅ Alerte MA envoyée: {alert_type} → {webhook_key} - {data['symbol']}")
-            else:
-                print(f"❌ Erreur webhook: {response.status_code}")
-        except Exception as e:
-            print(f"❌ Erreur envoi: {e}")
+        # Actions : 4h reconstruit depuis 1h, les autres timeframes suivent l'interval yfinance
+        yf_interval, _ = self._stock_history_params(timeframe)
+        return last_candle_close('yahoo', '4h' if timeframe == '4h' else yf_interval)
+    
+    def _series_to_check(self, market: str, symbols: List[str], timeframe: str, force: bool = False) -> List[str]:
+        """Symboles dont une nouvelle bougie a clôturé depuis la dernière évaluation"""
+        if force:
+            return list(symbols)
+        closed = self._last_closed_candle(market, timeframe)
+        return [symbol for symbol in symbols if self.last_evaluated.get((symbol, timeframe)) != closed]
+    
+    async def prefetch_crypto_candles(self, timeframes: Optional[List[str]] = None,
+                                      force: bool = False) -> Dict[Tuple[str, str], CandleSeries]:
+        """
+        Récupère en parallèle les bougies de toutes les cryptos et timeframes
+        
+        Args:
+            timeframes: Timeframes à récupérer, tous ceux de la configuration par défaut
+            force: Récupérer aussi les séries sans nouvelle bougie terminée
+        
+        Returns:
+            {(symbol, timeframe): bougies} (les échecs sont ignorés et refaits en synchrone)
+        """
+        timeframes = self.config['timeframes'] if timeframes is None else timeframes
+        self.plan_binance_cycle(timeframes)
+        limit = max(self._all_periods()) + 50
+        jobs = [
+            (crypto, timeframe)
+            for timeframe in timeframes
+            for crypto in self._series_to_check('crypto', self.config['assets']['crypto'], timeframe, force)
+        ]
+        
+        results = await asyncio.gather(*(
+            self.candle_store.get_candles_async(
+                self.async_client, crypto, self._binance_interval(timeframe), limit, priority='low'
+            )
+            for crypto, timeframe in jobs
+        ), return_exceptions=True)
+        
+        prefetched = {}
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Préchargement klines {job[0]} {job[1]}: {result}")
+                continue
+            prefetched[job] = result
+        return prefetched
+    
+    async def check_all_assets_async(self, silent_mode: bool = False, markets: Optional[List[str]] = None,
+                                     timeframes: Optional[List[str]] = None, force: bool = False) -> List[Dict]:
+        """
+        Vérifie tous les actifs : klines crypto récupérées en parallèle sur la boucle,
+        puis évaluation (yfinance et webhooks restent synchrones) dans un thread
+        
+        Avec des workers multi-process, les cryptos sont récupérées et évaluées
+        dans les workers ; seuls les cooldowns et l'envoi restent ici.
+        """
+        if markets is None:
+            markets = ['crypto', 'stocks']
+        
+        prefetched = {}
+        evaluated = {}
+        if 'crypto' in markets and self.workers is not None:
+            series = [
+                (crypto, timeframe)
+                for timeframe in (self.config['timeframes'] if timeframes is None else timeframes)
+                for crypto in self._series_to_check('crypto', self.config['assets']['crypto'], timeframe, force)
+            ]
+            # États enregistrés des séries pas encore évaluées depuis le démarrage (croisements manqués)
+            saved = {
+                (crypto, timeframe): self.saved_states(crypto, timeframe)
+                for crypto, timeframe in series
+                if (crypto, timeframe) not in self.last_evaluated
+            }
+            evaluated = await self.workers.evaluate_ma(self.config, series, silent_mode, saved)
+        elif 'crypto' in markets:
+            prefetched = await self.prefetch_crypto_candles(timeframes, force)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.check_all_assets, silent_mode, markets,
+                                          prefetched, timeframes, force, evaluated)
     
-    def check_all_assets(self, silent_mode: bool = False) -> List[Dict]:
+    def check_all_assets(self, silent_mode: bool = False, markets: Optional[List[str]] = None,
+                         prefetched: Optional[Dict[Tuple[str, str], CandleSeries]] = None,
+                         timeframes: Optional[List[str]] = None, force: bool = False,
+                         evaluated: Optional[Dict[Tuple[str, str], Optional[Dict]]] = None) -> List[Dict]:
         """
         Vérifie tous les actifs et envoie des alertes si nécessaire
         
+        Les séries (symbole, timeframe) sans nouvelle bougie terminée depuis leur
+        dernière évaluation ne sont ni récupérées ni évaluées (voir last_cycle_stats).
+        
         Args:
             silent_mode: Si True, ne pas envoyer d'alertes (mode warm-up)
+            markets: Marchés à vérifier ('crypto', 'stocks'), tous par défaut
+            prefetched: Bougies crypto déjà récupérées {(symbol, timeframe): CandleSeries}
+            timeframes: Timeframes à vérifier (ceux qui viennent de clôturer),
+                        tous ceux de la configuration par défaut
+            force: Évaluer aussi les séries inchangées (test manuel)
+            evaluated: Séries crypto déjà évaluées par les workers {(symbol, timeframe): résultat}
+                       (None : données indisponibles) ; les autres sont vérifiées ici
         """
+        prefetched = prefetched or {}
+        evaluated = evaluated or {}
+        stock_cache = {}  # Téléchargements Yahoo groupés, par (interval, période)
         alerts_sent = []
+        started = datetime.now()
+        stats = {'evaluated': 0, 'skipped': 0}
+
+        if markets is None:
+            markets = ['crypto', 'stocks']
+        if timeframes is None:
+            timeframes = self.config['timeframes']
         
-        for timeframe in self.config['timeframes']:
-            # Cryptos - Système 1
-            for crypto in self.config['assets']['crypto']:
-                data1 = self.get_crypto_ma_data(crypto, timeframe, self.ma_system1)
-                if data1:
-                    alerts = self._check_asset_alerts(data1, self.ma_system1, 'system1', silent_mode)
-                    alerts_sent.extend(alerts)
-                
-                # Système 2
-                data2 = self.get_crypto_ma_data(crypto, timeframe, self.ma_system2)
-                if data2:
-                    alerts = self._check_asset_alerts(data2, self.ma_system2, 'system2', silent_mode)
-                    alerts_sent.extend(alerts)
+        if 'crypto' in markets and not prefetched:
+            self.plan_binance_cycle(timeframes)
+        
+        for timeframe in timeframes:
+            # Cryptos
+            if 'crypto' in markets:
+                cryptos = self.config['assets']['crypto']
+                changed = self._series_to_check('crypto', cryptos, timeframe, force)
+                stats['skipped'] += len(cryptos) - len(changed)
+                stats['evaluated'] += len(changed)
+                for crypto in changed:
+                    if (crypto, timeframe) in evaluated:
+                        alerts_sent.extend(self._apply_worker_result(
+                            crypto, timeframe, evaluated[(crypto, timeframe)], silent_mode
+                        ))
+                        continue
+                    alerts_sent.extend(self.check_asset(
+                        crypto, timeframe, silent_mode, market='crypto',
+                        candles=prefetched.get((crypto, timeframe))
+                    ))
             
-            # Stocks - Système 1
-            for stock in self.config['assets']['stocks']:
-                data1 = self.get_stock_ma_data(stock, timeframe, self.ma_system1)
-                if data1:
-                    alerts = self._check_asset_alerts(data1, self.ma_system1, 'system1', silent_mode)
-                    alerts_sent.extend(alerts)
-                
-                # Système 2
-                data2 = self.get_stock_ma_data(stock, timeframe, self.ma_system2)
-                if data2:
-                    alerts = self._check_asset_alerts(data2, self.ma_system2, 'system2', silent_mode)
-                    alerts_sent.extend(alerts)
+            # Stocks
+            if 'stocks' in markets and self.config['assets']['stocks']:
+                stocks = self.config['assets']['stocks']
+                changed = self._series_to_check('stocks', stocks, timeframe, force)
+                stats['skipped'] += len(stocks) - len(changed)
+                stats['evaluated'] += len(changed)
+                if changed:
+                    histories = self.prefetch_stock_histories(timeframe, stock_cache)
+                    for stock in changed:
+                        alerts_sent.extend(self.check_asset(
+                            stock, timeframe, silent_mode, market='stocks',
+                            history=histories.get(stock)
+                        ))
+        
+        stats['alerts'] = len(alerts_sent)
+        stats['duration'] = (datetime.now() - started).total_seconds()
+        stats['timestamp'] = started
+        self.last_cycle_stats = stats
+        metrics.inc('series_total', stats['evaluated'], monitor='ma', result='evaluated')
+        metrics.inc('series_total', stats['skipped'], monitor='ma', result='skipped')
+        metrics.inc('alerts_total', stats['alerts'], monitor='ma')
+        if stats['skipped']:
+            print(f"⏭️ MA: {stats['skipped']} série(s) sans nouvelle bougie ignorée(s), {stats['evaluated']} évaluée(s)")
         
         return alerts_sent
 
-    def _check_asset_alerts(self, data: Dict, ma_system: List[int], system_name: str, silent_mode: bool = False) -> List[Dict]:
+    def check_asset(self, symbol: str, timeframe: str, silent_mode: bool = False, market: str = 'crypto',
+                    candles: Optional[CandleSeries] = None, history: Optional[pd.DataFrame] = None) -> List[Dict]:
         """
-        Vérifie les alertes pour un actif
+        Vérifie un actif sur un timeframe (appelé aussi à chaque clôture de bougie en streaming)
+
+        Args:
+            symbol: Symbole Binance ou yfinance
+            timeframe: Timeframe ('15m', '1h', '4h', '1d')
+            silent_mode: Si True, ne pas envoyer d'alertes
+            market: 'crypto' ou 'stocks'
+            candles: Bougies crypto déjà récupérées (optionnel)
+            history: Historique action déjà téléchargé (optionnel)
+        """
+        closed = self._last_closed_candle(market, timeframe)
+        result = self.evaluate_asset(symbol, timeframe, market, candles, history, self.saved_states(symbol, timeframe))
+        if result is None:
+            return []
+
+        self.last_evaluated[(symbol, timeframe)] = closed
+        return self.apply_evaluation(symbol, timeframe, result, silent_mode)
+
+    def saved_states(self, symbol: str, timeframe: str) -> Dict[str, Dict]:
+        """Derniers états MA enregistrés d'une série ({système: état}, conservés après redémarrage)"""
+        states = {}
+        for system_name in ('system1', 'system2'):
+            state = self.state_store.get_ma_state(symbol, timeframe, system_name)
+            if state is not None:
+                states[system_name] = state
+        return states
+
+    def _restored_prev_values(self, view: Dict, saved: Optional[Dict]) -> Optional[Dict[int, float]]:
+        """
+        MA de la dernière bougie évaluée, si des bougies n'ont pas été évaluées depuis
+
+        Après un arrêt du bot, les croisements survenus pendant l'arrêt sont
+        détectés en comparant les MA actuelles à celles de l'état enregistré
+        plutôt qu'à celles de l'avant-dernière bougie.
+        """
+        candles = view.get('candles')
+        if not saved or not saved.get('candle') or candles is None or len(candles) < 2:
+            return None
+
+        try:
+            if pd.Timestamp(saved['candle']) >= candles.timestamp(-2):
+                return None
+        except (TypeError, ValueError):
+            return None
+
+        values = {int(period): value for period, value in saved['ma_values'].items()}
+        return {period: values.get(period, value) for period, value in view['ma_prev_values'].items()}
+
+    def evaluate_asset(self, symbol: str, timeframe: str, market: str = 'crypto',
+                       candles: Optional[CandleSeries] = None, history: Optional[pd.DataFrame] = None,
+                       saved_states: Optional[Dict[str, Dict]] = None) -> Optional[Dict]:
+        """
+        Récupère les données d'un actif et détecte les signaux des deux systèmes MA
+
+        Aucun envoi ni cooldown ici (exécutable dans un worker multi-process).
+
+        Args:
+            saved_states: Derniers états MA enregistrés ({système: état}, voir saved_states)
+
+        Returns:
+            {'data', 'states': {système: état MA}, 'candidates': [signaux]} ou None
+        """
+        # Une seule récupération par (actif, timeframe) : union des MA des deux systèmes
+        all_periods = self._all_periods()
+
+        if market == 'crypto':
+            data = self.get_crypto_ma_data(symbol, timeframe, all_periods, candles)
+        else:
+            data = self.get_stock_ma_data(symbol, timeframe, all_periods, history)
+
+        if not data:
+            return None
+
+        result = {'data': data, 'states': {}, 'candidates': []}
+        with metrics.timer('stage_seconds', monitor='ma', stage='evaluate'):
+            for system_name, ma_system in (('system1', self.ma_system1), ('system2', self.ma_system2)):
+                view = self._system_view(data, ma_system)
+                restored = self._restored_prev_values(view, (saved_states or {}).get(system_name))
+                if restored is not None:
+                    view['ma_prev_values'] = restored
+                # Tous les croisements et l'alignement du système en une seule opération
+                evaluation = self.evaluate_system(view, ma_system)
+                result['states'][system_name] = self._ma_state(view, evaluation)
+                result['candidates'].extend(self._alert_candidates(view, ma_system, system_name, evaluation))
+        return result
+
+    def apply_evaluation(self, symbol: str, timeframe: str, result: Dict, silent_mode: bool = False) -> List[Dict]:
+        """
+        Enregistre les états MA d'une évaluation puis envoie ses alertes
 
         Args:
             silent_mode: Si True, marquer les alertes SANS les envoyer
         """
-        alerts = []
+        for system_name, state in result['states'].items():
+            self.state_store.set_ma_state(symbol, timeframe, system_name, state)
+        return self.deliver_candidates(result['candidates'], silent_mode)
+
+    def _apply_worker_result(self, symbol: str, timeframe: str, result: Optional[Dict],
+                             silent_mode: bool = False) -> List[Dict]:
+        """Enregistre et envoie une série évaluée par un worker multi-process"""
+        if result is None:
+            return []
+
+        self.last_evaluated[(symbol, timeframe)] = result['closed']
+        return self.apply_evaluation(symbol, timeframe, result, silent_mode)
+
+    def _system_view(self, data: Dict, ma_system: List[int]) -> Dict:
+        """Vue des données limitée aux MA d'un système (le DataFrame est partagé)"""
+        view = dict(data)
+        view['ma_values'] = {p: data['ma_values'][p] for p in ma_system if p in data['ma_values']}
+        view['ma_prev_values'] = {p: data['ma_prev_values'][p] for p in ma_system if p in data['ma_prev_values']}
+        return view
+
+    def _alert_candidates(self, data: Dict, ma_system: List[int], system_name: str, evaluation: Dict) -> List[Dict]:
+        """
+        Signaux détectés pour un actif, avant cooldown et envoi
+
+        Returns:
+            [{'alert_key', 'alert_type', 'data', 'details', 'alert'}] ; 'alert' est
+            le résumé retourné par check_all_assets
+        """
+        candidates = []
+
+        def add(alert_key: str, alert_type: str, details: Dict, alert: Dict):
+            candidates.append({
+                'alert_key': alert_key,
+                'alert_type': alert_type,
+                'data': data,
+                'details': details,
+                'alert': alert
+            })
 
         # 1. Croisements de paires spécifiques
         if self.config['alert_types']['golden_cross'] or self.config['alert_types']['death_cross']:
@@ -850,33 +1192,29 @@ class MAAlertMonitor:
                     if ma_fast not in ma_system or ma_slow not in ma_system:
                         continue
 
-                    cross_type = self.detect_cross(data, ma_fast, ma_slow)
+                    cross = cross_type(evaluation, ma_fast, ma_slow)
 
-                    if cross_type:
+                    if cross:
                         # Golden/Death Cross pour MA50×MA200
                         is_golden_death = (ma_fast == 50 and ma_slow == 200)
 
                         if is_golden_death:
-                            alert_type = 'golden_cross' if cross_type == 'golden_cross' else 'death_cross'
+                            alert_type = 'golden_cross' if cross == 'golden_cross' else 'death_cross'
                         else:
-                            alert_type = 'bullish_cross' if cross_type == 'golden_cross' else 'bearish_cross'
+                            alert_type = 'bullish_cross' if cross == 'golden_cross' else 'bearish_cross'
 
                         alert_key = f"{data['symbol']}_{data['timeframe']}_{system_name}_{ma_fast}_{ma_slow}_{alert_type}"
 
-                        if self._can_send_alert(alert_key):
-                            if not silent_mode:
-                                self.send_discord_alert(alert_type, data, {
-                                    'ma_fast': ma_fast,
-                                    'ma_slow': ma_slow
-                                })
-                            self._mark_alert_sent(alert_key)
-                            alerts.append({
-                                'symbol': data['symbol'],
-                                'type': alert_type,
-                                'system': system_name,
-                                'ma_fast': ma_fast,
-                                'ma_slow': ma_slow
-                            })
+                        add(alert_key, alert_type, {
+                            'ma_fast': ma_fast,
+                            'ma_slow': ma_slow
+                        }, {
+                            'symbol': data['symbol'],
+                            'type': alert_type,
+                            'system': system_name,
+                            'ma_fast': ma_fast,
+                            'ma_slow': ma_slow
+                        })
 
             # B) Croisements MA112 avec long terme (système 2)
             if system_name == 'system2':
@@ -884,67 +1222,55 @@ class MAAlertMonitor:
                     if ma_fast not in ma_system or ma_slow not in ma_system:
                         continue
 
-                    cross_type = self.detect_cross(data, ma_fast, ma_slow)
+                    cross = cross_type(evaluation, ma_fast, ma_slow)
 
-                    if cross_type:
-                        alert_type = 'bullish_cross' if cross_type == 'golden_cross' else 'bearish_cross'
+                    if cross:
+                        alert_type = 'bullish_cross' if cross == 'golden_cross' else 'bearish_cross'
                         alert_key = f"{data['symbol']}_{data['timeframe']}_{system_name}_MA112_{ma_slow}_{alert_type}"
 
-                        if self._can_send_alert(alert_key):
-                            if not silent_mode:
-                                self.send_discord_alert(alert_type, data, {
-                                    'ma_fast': ma_fast,
-                                    'ma_slow': ma_slow
-                                })
-                            self._mark_alert_sent(alert_key)
-                            alerts.append({
-                                'symbol': data['symbol'],
-                                'type': f'ma112_cross_{ma_slow}',
-                                'system': system_name,
-                                'ma_fast': ma_fast,
-                                'ma_slow': ma_slow
-                            })
+                        add(alert_key, alert_type, {
+                            'ma_fast': ma_fast,
+                            'ma_slow': ma_slow
+                        }, {
+                            'symbol': data['symbol'],
+                            'type': f'ma112_cross_{ma_slow}',
+                            'system': system_name,
+                            'ma_fast': ma_fast,
+                            'ma_slow': ma_slow
+                        })
 
             # C) Détection de croisements multiples (MA basse croise 2+ MA en même temps)
             # Uniquement système 1
             if system_name == 'system1':
-                multiple_crosses = self._detect_multiple_crosses(data, ma_system)
+                multiple_crosses = self._detect_multiple_crosses(data, ma_system, evaluation)
 
                 for ma_fast, crossed_mas in multiple_crosses.items():
                     if len(crossed_mas) >= 2:  # Minimum 2 MA croisées
                         alert_key = f"{data['symbol']}_{data['timeframe']}_{system_name}_multiple_MA{ma_fast}"
 
-                        if self._can_send_alert(alert_key):
-                            if not silent_mode:
-                                self.send_discord_alert('multiple_cross', data, {
-                                    'ma_fast': ma_fast,
-                                    'crossed_mas': crossed_mas
-                                })
-                            self._mark_alert_sent(alert_key)
-                            alerts.append({
-                                'symbol': data['symbol'],
-                                'type': 'multiple_cross',
-                                'system': system_name,
-                                'ma_fast': ma_fast,
-                                'crossed_count': len(crossed_mas)
-                            })
+                        add(alert_key, 'multiple_cross', {
+                            'ma_fast': ma_fast,
+                            'crossed_mas': crossed_mas
+                        }, {
+                            'symbol': data['symbol'],
+                            'type': 'multiple_cross',
+                            'system': system_name,
+                            'ma_fast': ma_fast,
+                            'crossed_count': len(crossed_mas)
+                        })
         
         # 2. Alignement
         if self.config['alert_types']['alignment']:
-            alignment = self.check_alignment(data, ma_system)
+            alignment = self.check_alignment(data, ma_system, evaluation)
             
             if alignment:
                 alert_key = f"{data['symbol']}_{data['timeframe']}_{system_name}_{alignment}"
                 
-                if self._can_send_alert(alert_key):
-                    if not silent_mode:
-                        self.send_discord_alert(alignment, data, {})
-                    self._mark_alert_sent(alert_key)
-                    alerts.append({
-                        'symbol': data['symbol'],
-                        'type': alignment,
-                        'system': system_name
-                    })
+                add(alert_key, alignment, {}, {
+                    'symbol': data['symbol'],
+                    'type': alignment,
+                    'system': system_name
+                })
         
         # 3. Compression
         if self.config['alert_types']['compression']:
@@ -953,19 +1279,35 @@ class MAAlertMonitor:
             if compression and compression < self.config['compression_threshold']:
                 alert_key = f"{data['symbol']}_{data['timeframe']}_{system_name}_compression"
                 
-                if self._can_send_alert(alert_key):
-                    if not silent_mode:
-                        self.send_discord_alert('compression', data, {
-                            'compression': compression
-                        })
-                    self._mark_alert_sent(alert_key)
-                    alerts.append({
-                        'symbol': data['symbol'],
-                        'type': 'compression',
-                        'compression': compression,
-                        'system': system_name
-                    })
+                add(alert_key, 'compression', {
+                    'compression': compression
+                }, {
+                    'symbol': data['symbol'],
+                    'type': 'compression',
+                    'compression': compression,
+                    'system': system_name
+                })
         
+        return candidates
+
+    def deliver_candidates(self, candidates: List[Dict], silent_mode: bool = False) -> List[Dict]:
+        """
+        Applique les cooldowns et envoie les alertes détectées
+
+        Les candidats venant des workers multi-process portent un embed déjà
+        construit ('embed') à la place des données complètes.
+        """
+        alerts = []
+        for candidate in candidates:
+            alert_key = candidate['alert_key']
+            if not self._can_send_alert(alert_key):
+                continue
+
+            if not silent_mode:
+                self.send_discord_alert(candidate['alert_type'], candidate['data'], candidate['details'],
+                                        embed=candidate.get('embed'))
+            self._mark_alert_sent(alert_key)
+            alerts.append(candidate['alert'])
         return alerts
     
     def sync_assets_from_managers(self, crypto_symbols: List[str], stock_symbols: List[str]):
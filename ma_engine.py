@@ -0,0 +1,152 @@
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from candles import CandleSeries
+from intervals import interval_to_ms
+
+# Recalcul complet de la somme toutes les N mises à jour (dérive des flottants)
+RESYNC_EVERY = 1000
+
+
+class RingBufferMA:
+    """Moyenne mobile simple incrémentale : buffer circulaire de taille fixe + somme courante"""
+
+    __slots__ = ('period', '_buffer', '_index', '_count', '_sum', '_updates', '_prev')
+
+    def __init__(self, period: int):
+        self.period = period
+        self._buffer = np.zeros(period, dtype=np.float64)
+        self._index = 0
+        self._count = 0
+        self._sum = 0.0
+        self._updates = 0
+        self._prev = float('nan')
+
+    def push(self, value: float):
+        """Ajoute la clôture d'une bougie terminée (O(1))"""
+        self._prev = self.value()
+
+        if self._count == self.period:
+            self._sum -= self._buffer[self._index]
+        else:
+            self._count += 1
+
+        self._buffer[self._index] = value
+        self._sum += value
+        self._index = (self._index + 1) % self.period
+
+        self._updates += 1
+        if self._updates % RESYNC_EVERY == 0:
+            self._sum = float(self._buffer[:self._count].sum())
+
+    def value(self) -> float:
+        """MA sur les `period` dernières bougies terminées"""
+        if self._count < self.period:
+            return float('nan')
+        return self._sum / self.period
+
+    def previous(self) -> float:
+        """MA avant la dernière bougie ajoutée"""
+        return self._prev
+
+    def peek(self, value: float) -> float:
+        """MA si `value` était ajoutée, sans modifier l'état (bougie en cours)"""
+        if self._count < self.period - 1:
+            return float('nan')
+        if self._count == self.period - 1:
+            return (self._sum + value) / self.period
+        # Buffer plein : _index pointe sur la valeur la plus ancienne
+        return (self._sum - self._buffer[self._index] + value) / self.period
+
+
+class IncrementalMAEngine:
+    """État des MA par (symbole, timeframe, période), mis à jour à chaque nouvelle bougie"""
+
+    def __init__(self):
+        # {(symbol, timeframe): {'last_open': int, 'mas': {period: RingBufferMA}}}
+        self._series: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def _seed(self, closed: List[Tuple[int, float]], periods: List[int]) -> Dict:
+        """Initialise les buffers avec les dernières bougies terminées"""
+        mas = {}
+        for period in periods:
+            ma = RingBufferMA(period)
+            # period + 1 valeurs pour disposer aussi de la MA précédente
+            for _, close in closed[-(period + 1):]:
+                ma.push(close)
+            mas[period] = ma
+
+        return {
+            'last_open': closed[-1][0] if closed else None,
+            'mas': mas
+        }
+
+    def update(self, symbol: str, timeframe: str, candles: CandleSeries, periods: List[int], now_ms: int) -> Dict:
+        """
+        Intègre les nouvelles bougies et retourne les MA actuelles et précédentes
+
+        Seules les bougies terminées depuis le dernier appel sont ajoutées ;
+        la bougie en cours (close_time >= now_ms) est évaluée sans modifier l'état.
+
+        Args:
+            candles: Bougies triées (CandleSeries)
+            periods: Périodes de MA à calculer
+            now_ms: Heure actuelle (ms UTC)
+
+        Returns:
+            {'current': {period: value}, 'previous': {period: value}}
+        """
+        in_progress = len(candles) > 0 and int(candles.close_time[-1]) >= now_ms
+        closed_candles = candles[:-1] if in_progress else candles
+        closed = list(zip(closed_candles.open_time.tolist(), closed_candles.close.tolist()))
+
+        key = (symbol, timeframe)
+        step = interval_to_ms(timeframe)
+
+        with self._lock:
+            state = self._series.get(key)
+
+            new = []
+            if state is not None and state['last_open'] is not None:
+                new = [(t, c) for t, c in closed if t > state['last_open']]
+
+            contiguous = (
+                state is not None
+                and set(periods) <= set(state['mas'])
+                and (not new or new[0][0] == state['last_open'] + step)
+                and (new or not closed or closed[-1][0] == state['last_open'])
+            )
+
+            if not contiguous:
+                state = self._seed(closed, periods)
+                self._series[key] = state
+            else:
+                for open_time, close in new:
+                    for ma in state['mas'].values():
+                        ma.push(close)
+                    state['last_open'] = open_time
+
+            current = {}
+            previous = {}
+            for period in periods:
+                ma = state['mas'][period]
+                if in_progress:
+                    current[period] = ma.peek(float(candles.close[-1]))
+                    previous[period] = ma.value()
+                else:
+                    current[period] = ma.value()
+                    previous[period] = ma.previous()
+
+        return {'current': current, 'previous': previous}
+
+    def reset(self, symbol: str = None):
+        """Oublie l'état (d'un symbole ou de tous)"""
+        with self._lock:
+            if symbol is None:
+                self._series.clear()
+            else:
+                for key in [k for k in self._series if k[0] == symbol]:
+                    del self._series[key]
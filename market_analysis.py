@@ -2,33 +2,24 @@ from binance.client import Client
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
+import numpy as np
 import yfinance as yf
+from candle_store import CandleStore
+from async_market_client import AsyncBinanceClient
+from binance_weight import ENDPOINT_WEIGHTS, weight_tracker
+from indicators import sma_matrix, sma_at
+from candles import CandleSeries
+from metrics import metrics
 
 class BinanceMarketAnalyzer:
     """Analyseur de marché pour crypto via Binance"""
     
-    def __init__(self):
+    def __init__(self, candle_store: Optional[CandleStore] = None,
+                 async_client: Optional[AsyncBinanceClient] = None):
         self.client = None
-        self._init_client()
-    
-    def _init_client(self, max_retries=5, retry_delay=10):
-        """Initialiser le client Binance avec retry"""
-        import time
+        self.candle_store = candle_store or CandleStore()
+        self.async_client = async_client or AsyncBinanceClient()
         
-        for attempt in range(max_retries):
-            try:
-                self.client = Client()
-                print(f"✅ Binance client connecté")
-                return
-            except Exception as e:
-                print(f"⚠️ Tentative {attempt + 1}/{max_retries} - Erreur Binance: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                else:
-                    print("❌ Impossible de se connecter à Binance après plusieurs tentatives")
-                    # Créer un client sans ping
-                    self.client = Client(requests_params={'timeout': 10})
-                    
         self.ma_periods = [112, 336, 375, 448, 750]
         
         # Mapping des intervals utilisateur vers Binance
@@ -51,6 +42,26 @@ class BinanceMarketAnalyzer:
             'daily': 1000,
         }
         
+        self._init_client()
+    
+    def _init_client(self, max_retries=5, retry_delay=10):
+        """Initialiser le client Binance avec retry"""
+        import time
+        
+        for attempt in range(max_retries):
+            try:
+                self.client = Client()
+                print(f"✅ Binance client connecté")
+                return
+            except Exception as e:
+                print(f"⚠️ Tentative {attempt + 1}/{max_retries} - Erreur Binance: {e}")
+                if attempt < max_retries - 1:
+                    time.sleep(retry_delay)
+                else:
+                    print("❌ Impossible de se connecter à Binance après plusieurs tentatives")
+                    # Créer un client sans ping
+                    self.client = Client(requests_params={'timeout': 10})
+        
     def get_binance_interval(self, interval_str: str) -> str:
         """Convertit un interval utilisateur en interval Binance"""
         return self.interval_map.get(interval_str.lower(), Client.KLINE_INTERVAL_1DAY)
@@ -67,7 +78,7 @@ class BinanceMarketAnalyzer:
         }
         return labels.get(interval_str.lower(), 'Daily')
         
-    def get_historical_data(self, symbol: str, interval: str = '1d', limit: int = None) -> pd.DataFrame:
+    def get_historical_data(self, symbol: str, interval: str = '1d', limit: int = None) -> CandleSeries:
         """
         Récupère les données historiques depuis Binance
         
@@ -77,7 +88,7 @@ class BinanceMarketAnalyzer:
             limit: Nombre de périodes à récupérer
             
         Returns:
-            DataFrame avec OHLCV + moyennes mobiles
+            Bougies OHLCV (les MA sont calculées par compute_moving_averages)
         """
         try:
             binance_interval = self.get_binance_interval(interval)
@@ -85,57 +96,66 @@ class BinanceMarketAnalyzer:
             if limit is None:
                 limit = self.period_limits.get(interval.lower(), 1000)
             
-            # Récupérer les klines
-            klines = self.client.get_klines(
-                symbol=symbol,
-                interval=binance_interval,
-                limit=limit
+            # Récupérer les bougies (stockage local + bougies manquantes uniquement)
+            candles = self.candle_store.get_candles(
+                self.client,
+                symbol,
+                binance_interval,
+                limit
             )
             
-            if not klines:
-                raise ValueError(f"Aucune donnée pour {symbol}")
-            
-            # Convertir en DataFrame
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
+            return self._require_candles(symbol, candles)
             
-            # Convertir les types
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df['open'] = df['open'].astype(float)
-            df['high'] = df['high'].astype(float)
-            df['low'] = df['low'].astype(float)
-            df['close'] = df['close'].astype(float)
-            df['volume'] = df['volume'].astype(float)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des données: {e}")
+    
+    async def get_historical_data_async(self, symbol: str, interval: str = '1d', limit: int = None) -> CandleSeries:
+        """Version asynchrone de get_historical_data (client HTTP asyncio, sans thread)"""
+        try:
+            binance_interval = self.get_binance_interval(interval)
             
-            df.set_index('timestamp', inplace=True)
+            if limit is None:
+                limit = self.period_limits.get(interval.lower(), 1000)
             
-            # Calculer les moyennes mobiles
-            for period in self.ma_periods:
-                df[f'MA{period}'] = df['close'].rolling(window=period).mean()
+            candles = await self.candle_store.get_candles_async(
+                self.async_client,
+                symbol,
+                binance_interval,
+                limit
+            )
             
-            return df
+            return self._require_candles(symbol, candles)
             
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des données: {e}")
     
-    def check_ma_alignment(self, df: pd.DataFrame) -> Dict:
+    def _require_candles(self, symbol: str, candles: CandleSeries) -> CandleSeries:
+        """Bougies lues en colonnes depuis le stockage (erreur si la série est vide)"""
+        if not len(candles):
+            raise ValueError(f"Aucune donnée pour {symbol}")
+        
+        return candles
+    
+    def compute_moving_averages(self, candles: CandleSeries) -> np.ndarray:
+        """MA de toutes les périodes en une passe (périodes x bougies)"""
+        return sma_matrix(candles.close, self.ma_periods)
+    
+    def check_ma_alignment(self, candles: CandleSeries, ma_matrix: np.ndarray) -> Dict:
         """
         Vérifie l'alignement des moyennes mobiles
         
+        Args:
+            candles: Bougies OHLCV
+            ma_matrix: MA (périodes x bougies) issues de compute_moving_averages
+        
         Returns:
             Dict avec les informations d'alignement
         """
-        latest = df.iloc[-1]
-        
-        # Récupérer les valeurs des MA
-        ma_values = {}
-        for period in self.ma_periods:
-            ma_col = f'MA{period}'
-            if ma_col in latest and pd.notna(latest[ma_col]):
-                ma_values[period] = latest[ma_col]
+        ma_values = {
+            period: value
+            for period, value in sma_at(ma_matrix, self.ma_periods).items()
+            if pd.notna(value)
+        }
         
         if len(ma_values) != len(self.ma_periods):
             return {
@@ -163,7 +183,7 @@ class BinanceMarketAnalyzer:
         
         is_compressed = compression_pct < 5.0
         
-        current_price = latest['close']
+        current_price = float(candles.close[-1])
         
         price_above_all = all(current_price > ma for ma in ma_vals)
         price_below_all = all(current_price < ma for ma in ma_vals)
@@ -179,20 +199,20 @@ class BinanceMarketAnalyzer:
             'price_above_all_ma': price_above_all,
             'price_below_all_ma': price_below_all,
             'current_order': current_order,
-            'timestamp': latest.name
+            'timestamp': candles.timestamp(-1)
         }
     
-    def get_ma_distances(self, df: pd.DataFrame) -> Dict:
+    def get_ma_distances(self, ma_matrix: np.ndarray) -> Dict:
         """Calcule les distances entre les MA consécutives"""
-        latest = df.iloc[-1]
+        latest = sma_at(ma_matrix, self.ma_periods)
         distances = {}
         
         for i in range(len(self.ma_periods) - 1):
             ma1 = self.ma_periods[i]
             ma2 = self.ma_periods[i + 1]
             
-            ma1_val = latest[f'MA{ma1}']
-            ma2_val = latest[f'MA{ma2}']
+            ma1_val = latest[ma1]
+            ma2_val = latest[ma2]
             
             if pd.notna(ma1_val) and pd.notna(ma2_val):
                 distance_pct = abs((ma1_val - ma2_val) / ma2_val) * 100
@@ -209,23 +229,21 @@ class BinanceMarketAnalyzer:
             interval: Timeframe ('5m', '15m', '1h', '4h', '1d')
         """
         try:
-            df = self.get_historical_data(symbol, interval=interval)
-            alignment = self.check_ma_alignment(df)
-            
-            if alignment['status'] != 'success':
-                return alignment
+            candles = self.get_historical_data(symbol, interval=interval)
+            return self._analyze_candles(candles, symbol, interval)
             
-            distances = self.get_ma_distances(df)
-            
-            alignment['ma_distances'] = distances
-            alignment['symbol'] = symbol
-            alignment['interval'] = interval
-            alignment['interval_label'] = self.get_interval_label(interval)
-            alignment['data_points'] = len(df)
-            alignment['period_start'] = df.index[0]
-            alignment['period_end'] = df.index[-1]
-            
-            return alignment
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e),
+                'symbol': symbol
+            }
+    
+    async def analyze_symbol_async(self, symbol: str, interval: str = '1d') -> Dict:
+        """Version asynchrone de analyze_symbol (à attendre directement depuis la boucle du bot)"""
+        try:
+            candles = await self.get_historical_data_async(symbol, interval=interval)
+            return self._analyze_candles(candles, symbol, interval)
             
         except Exception as e:
             return {
@@ -234,13 +252,45 @@ class BinanceMarketAnalyzer:
                 'symbol': symbol
             }
     
+    def _analyze_candles(self, candles: CandleSeries, symbol: str, interval: str) -> Dict:
+        """Alignement, compression et distances des MA à partir des bougies"""
+        ma_matrix = self.compute_moving_averages(candles)
+        alignment = self.check_ma_alignment(candles, ma_matrix)
+        
+        if alignment['status'] != 'success':
+            return alignment
+        
+        distances = self.get_ma_distances(ma_matrix)
+        
+        alignment['ma_distances'] = distances
+        alignment['symbol'] = symbol
+        alignment['interval'] = interval
+        alignment['interval_label'] = self.get_interval_label(interval)
+        alignment['data_points'] = len(candles)
+        alignment['period_start'] = candles.timestamp(0)
+        alignment['period_end'] = candles.timestamp(-1)
+        
+        return alignment
+    
     def test_symbol_exists(self, binance_symbol: str) -> bool:
         """Teste si un symbole existe sur Binance"""
         try:
-            ticker = self.client.get_ticker(symbol=binance_symbol)
+            weight_tracker.acquire(ENDPOINT_WEIGHTS['ticker_24hr'])
+            try:
+                ticker = self.client.get_ticker(symbol=binance_symbol)
+            finally:
+                weight_tracker.record_client_response(self.client)
             return ticker is not None
         except:
             return False
+    
+    async def test_symbol_exists_async(self, binance_symbol: str) -> bool:
+        """Version asynchrone de test_symbol_exists"""
+        try:
+            ticker = await self.async_client.get_ticker(binance_symbol)
+            return ticker is not None
+        except Exception:
+            return False
 
 
 class YFinanceMarketAnalyzer:
@@ -298,7 +348,7 @@ class YFinanceMarketAnalyzer:
         
         return period_map.get(yf_interval, 'max')
         
-    def get_historical_data(self, symbol: str, interval: str = '1d') -> pd.DataFrame:
+    def get_historical_data(self, symbol: str, interval: str = '1d') -> CandleSeries:
         """
         Récupère les données historiques depuis yfinance
         
@@ -307,7 +357,7 @@ class YFinanceMarketAnalyzer:
             interval: Interval ('5m', '15m', '1h', '4h', '1d')
             
         Returns:
-            DataFrame avec OHLCV + moyennes mobiles
+            Bougies OHLCV (les MA sont calculées par compute_moving_averages)
         """
         try:
             # Créer le ticker
@@ -319,7 +369,8 @@ class YFinanceMarketAnalyzer:
             # Récupérer les données
             if yf_interval == '4h':
                 # Yahoo ne supporte pas 4h natif, on récupère 1h et on resample
-                df = ticker.history(period=period, interval='1h')
+                with metrics.timer('fetch_seconds', source='yahoo'):
+                    df = ticker.history(period=period, interval='1h')
                 if not df.empty:
                     # Renommer avant resample
                     df.columns = df.columns.str.lower()
@@ -332,10 +383,15 @@ class YFinanceMarketAnalyzer:
                         'volume': 'sum'
                     }).dropna()
             else:
-                df = ticker.history(period=period, interval=yf_interval)
+                with metrics.timer('fetch_seconds', source='yahoo'):
+                    df = ticker.history(period=period, interval=yf_interval)
                 if not df.empty:
                     df.columns = df.columns.str.lower()
             
+            # Lignes sans clôture (séances incomplètes Yahoo) : ignorées comme dans les MA
+            if not df.empty:
+                df = df.dropna(subset=['close'])
+            
             if df.empty or len(df) == 0:
                 raise ValueError(f"Aucune donnée pour {symbol}")
             
@@ -343,30 +399,26 @@ class YFinanceMarketAnalyzer:
             if not isinstance(df.index, pd.DatetimeIndex):
                 df.index = pd.to_datetime(df.index)
             
-            # Calculer les moyennes mobiles
-            for period in self.ma_periods:
-                df[f'MA{period}'] = df['close'].rolling(window=period).mean()
-            
-            # Garder seulement les lignes où toutes les MA sont calculées
-            df = df.dropna(subset=[f'MA{period}' for period in self.ma_periods])
-            
-            if len(df) == 0:
+            # Il faut au moins max(ma_periods) bougies pour calculer toutes les MA
+            if len(df) < max(self.ma_periods):
                 raise ValueError(f"Pas assez de données historiques pour {symbol} sur {interval} (besoin de 750+ périodes)")
             
-            return df
+            return CandleSeries.from_frame(df, symbol, interval)
             
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des données: {e}")
     
-    def check_ma_alignment(self, df: pd.DataFrame) -> Dict:
+    def compute_moving_averages(self, candles: CandleSeries) -> np.ndarray:
+        """MA de toutes les périodes en une passe (périodes x bougies)"""
+        return sma_matrix(candles.close, self.ma_periods)
+    
+    def check_ma_alignment(self, candles: CandleSeries, ma_matrix: np.ndarray) -> Dict:
         """Vérifie l'alignement des moyennes mobiles"""
-        latest = df.iloc[-1]
-        
-        ma_values = {}
-        for period in self.ma_periods:
-            ma_col = f'MA{period}'
-            if ma_col in latest and pd.notna(latest[ma_col]):
-                ma_values[period] = latest[ma_col]
+        ma_values = {
+            period: value
+            for period, value in sma_at(ma_matrix, self.ma_periods).items()
+            if pd.notna(value)
+        }
         
         if len(ma_values) != len(self.ma_periods):
             return {
@@ -392,7 +444,7 @@ class YFinanceMarketAnalyzer:
         
         is_compressed = compression_pct < 5.0
         
-        current_price = latest['close']
+        current_price = float(candles.close[-1])
         
         price_above_all = all(current_price > ma for ma in ma_vals)
         price_below_all = all(current_price < ma for ma in ma_vals)
@@ -408,20 +460,20 @@ class YFinanceMarketAnalyzer:
             'price_above_all_ma': price_above_all,
             'price_below_all_ma': price_below_all,
             'current_order': current_order,
-            'timestamp': latest.name
+            'timestamp': candles.timestamp(-1)
         }
     
-    def get_ma_distances(self, df: pd.DataFrame) -> Dict:
+    def get_ma_distances(self, ma_matrix: np.ndarray) -> Dict:
         """Calcule les distances entre les MA consécutives"""
-        latest = df.iloc[-1]
+        latest = sma_at(ma_matrix, self.ma_periods)
         distances = {}
         
         for i in range(len(self.ma_periods) - 1):
             ma1 = self.ma_periods[i]
             ma2 = self.ma_periods[i + 1]
             
-            ma1_val = latest[f'MA{ma1}']
-            ma2_val = latest[f'MA{ma2}']
+            ma1_val = latest[ma1]
+            ma2_val = latest[ma2]
             
             if pd.notna(ma1_val) and pd.notna(ma2_val):
                 distance_pct = abs((ma1_val - ma2_val) / ma2_val) * 100
@@ -438,21 +490,28 @@ class YFinanceMarketAnalyzer:
             interval: Timeframe ('5m', '15m', '1h', '4h', '1d')
         """
         try:
-            df = self.get_historical_data(symbol, interval=interval)
-            alignment = self.check_ma_alignment(df)
+            candles = self.get_historical_data(symbol, interval=interval)
+            ma_matrix = self.compute_moving_averages(candles)
+            
+            # Garder seulement les bougies où toutes les MA sont calculées
+            warmup = max(self.ma_periods) - 1
+            candles = candles[warmup:]
+            ma_matrix = ma_matrix[:, warmup:]
+            
+            alignment = self.check_ma_alignment(candles, ma_matrix)
             
             if alignment['status'] != 'success':
                 return alignment
             
-            distances = self.get_ma_distances(df)
+            distances = self.get_ma_distances(ma_matrix)
             
             alignment['ma_distances'] = distances
             alignment['symbol'] = symbol
             alignment['interval'] = interval
             alignment['interval_label'] = self.get_interval_label(interval)
-            alignment['data_points'] = len(df)
-            alignment['period_start'] = df.index[0]
-            alignment['period_end'] = df.index[-1]
+            alignment['data_points'] = len(candles)
+            alignment['period_start'] = candles.timestamp(0)
+            alignment['period_end'] = candles.timestamp(-1)
             
             return alignment
             
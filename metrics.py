@@ -0,0 +1,230 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# Bornes des buckets (secondes) : progression géométrique de 50 µs à ~2 min
+BUCKET_BOUNDS = [0.00005 * 1.25 ** i for i in range(66)]
+
+
+class Histogram:
+    """
+    Histogramme à buckets fixes (coût constant par mesure)
+
+    Les quantiles sont estimés par interpolation dans le bucket concerné :
+    précision d'environ 12 %, suffisante pour repérer l'étape qui domine.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'Histogram'):
+        """Ajoute les mesures d'un autre histogramme (mêmes buckets)"""
+        for index, bucket_count in enumerate(other.counts):
+            self.counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Quantile estimé (q entre 0 et 1)"""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKET_BOUNDS[index - 1] if index > 0 else 0.0
+                upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(value, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+        }
+
+
+class MetricsRegistry:
+    """
+    Mesures des étapes chaudes (fetch, parsing, MA, évaluation, webhooks, cycles)
+
+    Durées en secondes, une série par (nom, labels). Exposées par /bot_stats
+    et au format texte Prometheus (MetricsServer).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self.started_at = time.time()
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Mesure la durée du bloc (enregistrée même en cas d'exception)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def drain(self) -> Dict:
+        """
+        Retire et retourne les mesures accumulées (envoyées par les workers multi-process)
+
+        Returns:
+            {'histograms': {(nom, labels): Histogram}, 'counters': {(nom, labels): valeur}}
+        """
+        with self._lock:
+            data = {'histograms': self._histograms, 'counters': self._counters}
+            self._histograms = {}
+            self._counters = {}
+        return data
+
+    def merge(self, data: Dict):
+        """Ajoute des mesures retournées par drain() (autre processus)"""
+        with self._lock:
+            for key, other in data['histograms'].items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram()
+                histogram.merge(other)
+            for key, value in data['counters'].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+            {'histograms': {nom: [(labels, résumé)]}, 'counters': {nom: [(labels, valeur)]}}
+        """
+        with self._lock:
+            histograms = [(name, dict(labels), h.summary()) for (name, labels), h in self._histograms.items()]
+            counters = [(name, dict(labels), value) for (name, labels), value in self._counters.items()]
+
+        result = {'histograms': {}, 'counters': {}, 'uptime': time.time() - self.started_at}
+        for name, labels, summary in sorted(histograms, key=lambda item: (item[0], sorted(item[1].items()))):
+            result['histograms'].setdefault(name, []).append((labels, summary))
+        for name, labels, value in sorted(counters, key=lambda item: (item[0], sorted(item[1].items()))):
+            result['counters'].setdefault(name, []).append((labels, value))
+        return result
+
+    def prometheus_text(self, prefix: str = "tradebot_") -> str:
+        """Export au format texte Prometheus (summary avec quantiles 0.5/0.95/0.99)"""
+        snapshot = self.snapshot()
+        lines: List[str] = []
+
+        for name, series in snapshot['histograms'].items():
+            metric = prefix + name
+            lines.append(f"# TYPE {metric} summary")
+            for labels, summary in series:
+                for quantile, key in (('0.5', 'p50'), ('0.95', 'p95'), ('0.99', 'p99')):
+                    lines.append(f"{metric}{_labels(labels, quantile=quantile)} {summary[key]:.6f}")
+                lines.append(f"{metric}_sum{_labels(labels)} {summary['sum']:.6f}")
+                lines.append(f"{metric}_count{_labels(labels)} {summary['count']}")
+
+        for name, series in snapshot['counters'].items():
+            metric = prefix + name
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in series:
+                lines.append(f"{metric}{_labels(labels)} {value:g}")
+
+        lines.append(f"# TYPE {prefix}uptime_seconds gauge")
+        lines.append(f"{prefix}uptime_seconds {snapshot['uptime']:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+
+def _labels(labels: Dict, **extra) -> str:
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+class MetricsServer:
+    """Serveur HTTP local exposant /metrics (thread dédié, indépendant de la boucle asyncio)"""
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = "127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="metrics-http").start()
+        print(f"📈 Métriques Prometheus: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+# Mesures partagées par tous les modules du processus
+metrics = MetricsRegistry()
@@ -0,0 +1,298 @@
+import asyncio
+import multiprocessing
+import threading
+import zlib
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from alert_state import AlertStateStore
+from candle_store import CandleStore
+from ma_alerts import MAAlertMonitor
+from metrics import metrics
+from volume_monitor import VolumeMonitor
+from webhook_delivery import WebhookDispatcher
+
+# Moniteur du processus worker (créé une fois par processus, MA incrémentales conservées)
+_monitor = None
+
+
+def _init_worker(kind: str, config_file: Optional[str], candles_db: str):
+    """
+    Initialise le moniteur d'un processus worker
+
+    Cooldowns, états MA et webhooks restent dans le processus principal : le
+    worker n'a qu'un état et une outbox en mémoire, jamais utilisés pour l'envoi.
+    Ses mesures sont renvoyées avec chaque shard (voir _shard_result).
+    """
+    global _monitor
+    # Mesures héritées du processus principal au fork : déjà comptées
+    metrics.reset()
+    monitor_class = MAAlertMonitor if kind == 'ma' else VolumeMonitor
+    kwargs = {
+        'candle_store': CandleStore(candles_db),
+        'dispatcher': WebhookDispatcher(':memory:'),
+        'state_store': AlertStateStore(':memory:', flush_interval=3600)
+    }
+    if config_file:
+        kwargs['config_file'] = config_file
+    _monitor = monitor_class(**kwargs)
+
+
+def _ping() -> bool:
+    return True
+
+
+def _worker_main(conn: Connection, kind: str, config_file: Optional[str], candles_db: str):
+    """Boucle d'un processus worker : (fonction, arguments) reçus, (succès, résultat) renvoyé"""
+    _init_worker(kind, config_file, candles_db)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        func, args = message
+        try:
+            reply = (True, func(*args))
+        except Exception as e:
+            reply = (False, RuntimeError(f"{type(e).__name__}: {e}"))
+        conn.send(reply)
+
+
+def _shard_result(results: Dict) -> Dict:
+    """Résultats d'un shard et mesures (fetch, étapes) prises pendant son évaluation"""
+    return {'results': results, 'metrics': metrics.drain()}
+
+
+class WorkerDied(Exception):
+    """Processus worker arrêté (jamais recréé, voir MonitorWorkerPool)"""
+
+
+def _evaluate_ma_shard(series: List[Tuple[str, str]], config: Dict, silent_mode: bool,
+                       saved: Dict[Tuple[str, str], Dict]) -> Dict:
+    """
+    Récupère et évalue les séries crypto d'un shard (dans le worker)
+
+    Les états MA enregistrés viennent du processus principal (`saved`), seul
+    propriétaire de l'état persistant.
+
+    Returns:
+        _shard_result de {(symbol, timeframe): {'closed', 'states', 'candidates'} ou None si
+        données indisponibles}. Les candidats ne contiennent que le symbole et l'embed déjà construit.
+    """
+    _monitor.config = config
+    results = {}
+    for symbol, timeframe in series:
+        closed = _monitor._last_closed_candle('crypto', timeframe)
+        result = _monitor.evaluate_asset(symbol, timeframe, 'crypto',
+                                         saved_states=saved.get((symbol, timeframe), {}))
+        if result is None:
+            results[(symbol, timeframe)] = None
+            continue
+
+        candidates = []
+        for candidate in result['candidates']:
+            # Embed (score cascade EMA compris) calculé ici plutôt que dans le processus principal
+            data = candidate['data']
+            embed = None
+            if not silent_mode:
+                embed = _monitor.build_alert_embed(candidate['alert_type'], data, candidate['details'])
+            candidates.append({
+                **candidate,
+                'data': {'symbol': data['symbol'], 'timeframe': data['timeframe']},
+                'embed': embed
+            })
+
+        results[(symbol, timeframe)] = {
+            'closed': closed,
+            'states': result['states'],
+            'candidates': candidates
+        }
+    return _shard_result(results)
+
+
+def _evaluate_volume_shard(symbols: List[str], config: Dict) -> Dict:
+    """
+    Récupère les volumes crypto d'un shard (dans le worker)
+
+    Returns:
+        _shard_result de {symbol: données du pic, ou None si pas de pic / données indisponibles}
+    """
+    _monitor.config = config
+    results = {}
+    for symbol in symbols:
+        data = _monitor.get_crypto_volume_data(symbol)
+        results[symbol] = data if data and _monitor.detect_spike(data) else None
+    return _shard_result(results)
+
+
+class MonitorWorkerPool:
+    """
+    Workers multi-process pour les grandes listes de surveillance
+
+    Les séries crypto sont réparties sur N processus ; un symbole est
+    toujours envoyé au même processus, dont le moteur de MA incrémentales
+    reste chaud d'un cycle à l'autre. Chaque worker récupère et évalue son
+    shard puis ne renvoie que les résultats compacts (signaux, embeds,
+    états MA). Le processus principal reste seul propriétaire des
+    cooldowns, de l'état persistant et des webhooks.
+
+    Les processus sont créés par fork, tous dans start(), appelé au
+    démarrage tant que le processus principal n'a qu'un thread (un fork
+    depuis un processus multi-thread peut hériter de verrous pris). Ils ne
+    sont jamais recréés : le shard d'un worker arrêté, ou sans réponse après
+    `timeout` (worker alors terminé), est évalué dans le processus principal,
+    comme sans workers. Chaque processus suit son
+    propre poids Binance, resynchronisé à chaque réponse par l'en-tête
+    X-MBX-USED-WEIGHT (compteur par IP, commun à tous les processus).
+    """
+
+    def __init__(self, kind: str, workers: int, config_file: Optional[str] = None,
+                 candles_db: str = "candles.db", timeout: float = 300):
+        """
+        Args:
+            kind: 'ma' (MAAlertMonitor) ou 'volume' (VolumeMonitor)
+            workers: Nombre de processus
+            config_file: Fichier de configuration du moniteur (défaut du moniteur sinon)
+            candles_db: Base de bougies partagée avec le processus principal
+            timeout: Durée max d'un shard (secondes) ; au-delà le worker est arrêté
+        """
+        self.kind = kind
+        self.size = workers
+        self.timeout = timeout
+        self._initargs = (kind, config_file, candles_db)
+        self._context = multiprocessing.get_context('fork')
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self._conns: List[Optional[Connection]] = [None] * workers
+        # Une requête à la fois par worker (envoi puis réponse sur le même pipe)
+        self._locks = [threading.Lock() for _ in range(workers)]
+        self.stats = {'shards': 0, 'failures': 0}
+
+    def start(self):
+        """Crée tous les processus maintenant (une seule fois, avant les threads du bot)"""
+        if any(process is not None for process in self._processes):
+            return
+        if threading.active_count() > 1:
+            print(f"⚠️ Workers {self.kind} créés alors que {threading.active_count()} threads tournent "
+                  f"(fork non sûr)")
+
+        for index in range(self.size):
+            parent_conn, child_conn = self._context.Pipe()
+            process = self._context.Process(
+                target=_worker_main, args=(child_conn,) + self._initargs,
+                name=f"{self.kind}-worker-{index}", daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._processes[index] = process
+            self._conns[index] = parent_conn
+
+        for index in range(self.size):
+            try:
+                self._call(index, _ping)
+            except WorkerDied:
+                pass
+
+    def _call(self, index: int, func: Callable, *args):
+        """Exécute func(*args) dans le worker `index` (bloquant, appelé hors de la boucle)"""
+        with self._locks[index]:
+            conn = self._conns[index]
+            if conn is None:
+                raise WorkerDied(f"Worker {self.kind} #{index} arrêté")
+            try:
+                conn.send((func, args))
+                if not conn.poll(self.timeout):
+                    # Worker bloqué (requête sans fin, verrou hérité du fork) : arrêté
+                    self._mark_dead(index, f"aucune réponse en {self.timeout:g} s")
+                    raise WorkerDied(f"Worker {self.kind} #{index} bloqué")
+                ok, result = conn.recv()
+            except (EOFError, OSError) as e:
+                self._mark_dead(index, repr(e))
+                raise WorkerDied(f"Worker {self.kind} #{index} arrêté") from e
+        if not ok:
+            raise result
+        return result
+
+    def _mark_dead(self, index: int, reason: str):
+        """Retire un worker (jamais recréé) ; appelé sous son verrou"""
+        conn = self._conns[index]
+        self._conns[index] = None
+        if conn is not None:
+            conn.close()
+        process = self._processes[index]
+        if process is not None and process.is_alive():
+            process.terminate()
+        print(f"⚠️ Worker {self.kind} #{index} arrêté ({reason}) - son shard sera évalué dans le processus principal")
+
+    def shard_of(self, symbol: str) -> int:
+        """Processus d'un symbole (stable entre les cycles et les redémarrages)"""
+        return zlib.crc32(symbol.encode()) % self.size
+
+    async def _map(self, func: Callable, items: List, symbol_of: Callable, *args) -> Dict[Hashable, Optional[Dict]]:
+        """
+        Répartit items sur les processus et fusionne les résultats des shards réussis
+
+        Les mesures des workers sont ajoutées au registre du processus principal
+        (/bot_stats, /metrics).
+        """
+        shards: Dict[int, List] = {}
+        for item in items:
+            shards.setdefault(self.shard_of(symbol_of(item)), []).append(item)
+
+        loop = asyncio.get_running_loop()
+        indexes = list(shards)
+        results = await asyncio.gather(*(
+            loop.run_in_executor(None, self._call, index, func, shards[index], *args)
+            for index in indexes
+        ), return_exceptions=True)
+
+        merged = {}
+        for index, result in zip(indexes, results):
+            self.stats['shards'] += 1
+            if isinstance(result, BaseException):
+                # Shard non évalué : le moniteur le vérifie lui-même dans le processus principal
+                self.stats['failures'] += 1
+                if not isinstance(result, WorkerDied):
+                    print(f"❌ Worker {self.kind} #{index}: {result!r}")
+                continue
+            metrics.merge(result['metrics'])
+            merged.update(result['results'])
+        return merged
+
+    async def evaluate_ma(self, config: Dict, series: List[Tuple[str, str]], silent_mode: bool = False,
+                          saved: Optional[Dict[Tuple[str, str], Dict]] = None) -> Dict[Tuple[str, str], Optional[Dict]]:
+        """
+        Évalue des séries crypto (symbol, timeframe) dans les workers
+
+        Args:
+            saved: États MA enregistrés {(symbol, timeframe): {système: état}}
+        """
+        return await self._map(_evaluate_ma_shard, series, lambda item: item[0], config, silent_mode, saved or {})
+
+    async def evaluate_volume(self, config: Dict, symbols: List[str]) -> Dict[str, Optional[Dict]]:
+        """Récupère les volumes crypto dans les workers"""
+        return await self._map(_evaluate_volume_shard, symbols, lambda item: item, config)
+
+    def status(self) -> Dict:
+        return {
+            'workers': self.size,
+            'alive': sum(1 for conn in self._conns if conn is not None),
+            **self.stats
+        }
+
+    def shutdown(self):
+        for index, conn in enumerate(self._conns):
+            if conn is not None:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+                conn.close()
+                self._conns[index] = None
+        for process in self._processes:
+            if process is not None:
+                process.join(timeout=2)
+                if process.is_alive():
+                    process.terminate()
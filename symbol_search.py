@@ -1,34 +1,241 @@
+import bisect
+import heapq
+import threading
+import time
 from binance.client import Client
 import yfinance as yf
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Set
+from binance_weight import ENDPOINT_WEIGHTS, weight_tracker
+
+# Longueur max des n-grammes indexés (recherche par sous-chaîne)
+NGRAM_SIZE = 3
+
+# Asset de cotation préféré par défaut (classement précalculé dans l'index)
+DEFAULT_QUOTE = 'USDT'
+
+# Borne supérieure des clés commençant par un préfixe donné
+_PREFIX_END = '\U0010ffff'
+
+class SymbolIndex:
+    """
+    Index immuable des paires Binance (construit une fois par rafraîchissement)
+
+    - préfixes : baseAsset et symboles triés, plage trouvée par bisect
+    - sous-chaînes : n-grammes (1 à NGRAM_SIZE caractères) -> paires, intersection
+      des ensembles puis vérification
+    Les résultats sont classés : symbole exact, baseAsset exact, préfixe du
+    baseAsset, préfixe du symbole, puis sous-chaîne ; à rang égal, l'asset de
+    cotation préféré d'abord, puis les symboles les plus courts.
+    """
+
+    def __init__(self, symbols: List[Dict]):
+        self.symbols = symbols
+        self.built_at = time.time()
+        self.by_symbol = {s['symbol']: i for i, s in enumerate(symbols)}
+        self.by_base: Dict[str, List[int]] = {}
+
+        self._grams: Dict[str, Set[int]] = {}
+        for i, s in enumerate(symbols):
+            self.by_base.setdefault(s['baseAsset'], []).append(i)
+            for text in (s['baseAsset'], s['symbol']):
+                for size in range(1, NGRAM_SIZE + 1):
+                    for start in range(len(text) - size + 1):
+                        self._grams.setdefault(text[start:start + size], set()).add(i)
+
+        # (clés triées, paire de chaque clé) pour les recherches par préfixe
+        self._bases = self._sorted_keys('baseAsset')
+        self._symbols = self._sorted_keys('symbol')
+        # Listes partagées par l'autocomplétion (mêmes objets jusqu'au prochain index)
+        self.base_assets = list(self.by_base)
+        self.pair_symbols = list(self.by_symbol)
+
+        # Rang de chaque paire à pertinence égale (cotation par défaut, symbole court)
+        self._rank = [0] * len(symbols)
+        for rank, i in enumerate(sorted(range(len(symbols)), key=lambda i: (
+                symbols[i]['quoteAsset'] != DEFAULT_QUOTE, len(symbols[i]['symbol']), symbols[i]['symbol']))):
+            self._rank[i] = rank
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def _sorted_keys(self, field: str) -> tuple:
+        ordered = sorted((s[field], i) for i, s in enumerate(self.symbols))
+        return [key for key, _ in ordered], [i for _, i in ordered]
+
+    @staticmethod
+    def _prefixed(sorted_keys: tuple, query: str) -> List[int]:
+        """Paires dont la clé commence par `query` (plage contiguë des clés triées)"""
+        keys, ids = sorted_keys
+        lo = bisect.bisect_left(keys, query)
+        hi = bisect.bisect_left(keys, query + _PREFIX_END, lo)
+        return ids[lo:hi]
+
+    def _containing(self, query: str) -> Set[int]:
+        """Paires dont le baseAsset ou le symbole contient `query`"""
+        if len(query) <= NGRAM_SIZE:
+            return self._grams.get(query, set())
+
+        grams = sorted(
+            (self._grams.get(query[start:start + NGRAM_SIZE], set())
+             for start in range(len(query) - NGRAM_SIZE + 1)),
+            key=len
+        )
+        candidates = set.intersection(*grams)
+        return {
+            i for i in candidates
+            if query in self.symbols[i]['baseAsset'] or query in self.symbols[i]['symbol']
+        }
+
+    def _ranked(self, ids: Iterable[int], quote_asset: str, limit: int) -> List[int]:
+        if quote_asset == DEFAULT_QUOTE:
+            return heapq.nsmallest(limit, ids, key=self._rank.__getitem__)
+        symbols, rank = self.symbols, self._rank
+        return heapq.nsmallest(limit, ids, key=lambda i: (symbols[i]['quoteAsset'] != quote_asset, rank[i]))
+
+    def search(self, query: str, quote_asset: str = 'USDT', limit: int = 10) -> List[Dict]:
+        """Paires correspondant à `query` (déjà en majuscules), classées par pertinence"""
+        if not query or limit <= 0:
+            return []
+
+        results: List[int] = []
+        seen: Set[int] = set()
+
+        def take(ids: Iterable[int]):
+            fresh = [i for i in ids if i not in seen] if seen else ids
+            for i in self._ranked(fresh, quote_asset, limit - len(results)):
+                results.append(i)
+                seen.add(i)
+
+        if query in self.by_symbol:
+            take([self.by_symbol[query]])
+        take(self.by_base.get(query, []))
+
+        # Les rangs suivants ne sont calculés que s'il reste de la place
+        if len(results) < limit:
+            take(self._prefixed(self._bases, query))
+        if len(results) < limit:
+            take(self._prefixed(self._symbols, query))
+        if len(results) < limit:
+            take(self._containing(query))
+
+        return [self.symbols[i] for i in results]
+
 
 class BinanceSymbolSearch:
-    """Recherche de symboles sur Binance"""
+    """
+    Recherche de symboles sur Binance
+
+    Les paires sont indexées (SymbolIndex) et l'index est reconstruit en
+    arrière-plan toutes les `ttl` secondes : les nouvelles paires apparaissent
+    sans redémarrage. Le nouvel index remplace l'ancien en une affectation,
+    les recherches en cours ne voient jamais d'index partiel.
+    """
     
-    def __init__(self):
+    def __init__(self, ttl: float = 3600, retry_delay: float = 60):
+        """
+        Args:
+            ttl: Durée de validité de l'index (secondes)
+            retry_delay: Délai avant une nouvelle tentative après un échec
+        """
         self.client = Client()
-        self._all_symbols = None
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+        self._index: Optional[SymbolIndex] = None
+        self._refresh_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._next_attempt = 0.0
+    
+    def _fetch_symbols(self) -> List[Dict]:
+        """Paires en cours de trading (exchangeInfo)"""
+        weight_tracker.acquire(ENDPOINT_WEIGHTS['exchange_info'])
+        try:
+            exchange_info = self.client.get_exchange_info()
+        finally:
+            weight_tracker.record_client_response(self.client)
+        return [
+            {
+                'symbol': s['symbol'],
+                'baseAsset': s['baseAsset'],
+                'quoteAsset': s['quoteAsset'],
+                'status': s['status']
+            }
+            for s in exchange_info['symbols']
+            if s['status'] == 'TRADING'
+        ]
+    
+    def refresh(self) -> bool:
+        """
+        Reconstruit l'index depuis Binance (l'ancien index reste servi en cas d'échec)
+        
+        Returns:
+            True si l'index a été remplacé
+        """
+        with self._refresh_lock:
+            return self._rebuild()
+    
+    def _rebuild(self) -> bool:
+        try:
+            index = SymbolIndex(self._fetch_symbols())
+        except Exception as e:
+            print(f"Erreur lors de la récupération des symboles: {e}")
+            self._next_attempt = time.time() + self.retry_delay
+            return False
+        
+        previous = self._index
+        self._index = index
+        self._next_attempt = index.built_at + self.ttl
+        
+        if previous is not None:
+            added = len(set(index.by_symbol) - set(previous.by_symbol))
+            removed = len(set(previous.by_symbol) - set(index.by_symbol))
+            if added or removed:
+                print(f"🔄 Index des symboles Binance: {len(index)} paires (+{added} / -{removed})")
+        return True
+    
+    def start(self):
+        """Rafraîchit l'index en arrière-plan (thread dédié, premier chargement immédiat)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="symbol-index-refresh")
+        self._thread.start()
+    
+    def stop(self):
+        self._stopping.set()
+    
+    def _run(self):
+        while not self._stopping.is_set():
+            if time.time() >= self._next_attempt:
+                self.refresh()
+            self._stopping.wait(max(1.0, self._next_attempt - time.time()))
+    
+    def get_index(self) -> SymbolIndex:
+        """
+        Index courant
+        
+        Premier appel sans thread de rafraîchissement : chargement synchrone.
+        Index expiré : servi tel quel pendant qu'un rafraîchissement est lancé.
+        """
+        index = self._index
+        if index is None:
+            with self._refresh_lock:
+                if self._index is None and not self._rebuild():
+                    return SymbolIndex([])
+            return self._index
         
+        if time.time() >= self._next_attempt and not self._refresh_lock.locked() \
+                and (self._thread is None or not self._thread.is_alive()):
+            threading.Thread(target=self.refresh, daemon=True, name="symbol-index-refresh").start()
+        return index
+    
+    def loaded_index(self) -> Optional[SymbolIndex]:
+        """Index courant sans chargement ni rafraîchissement (None avant le premier chargement)"""
+        return self._index
+    
     def get_all_symbols(self) -> List[Dict]:
-        """Récupère tous les symboles Binance (avec cache)"""
-        if self._all_symbols is None:
-            try:
-                exchange_info = self.client.get_exchange_info()
-                self._all_symbols = [
-                    {
-                        'symbol': s['symbol'],
-                        'baseAsset': s['baseAsset'],
-                        'quoteAsset': s['quoteAsset'],
-                        'status': s['status']
-                    }
-                    for s in exchange_info['symbols']
-                    if s['status'] == 'TRADING'
-                ]
-            except Exception as e:
-                print(f"Erreur lors de la récupération des symboles: {e}")
-                self._all_symbols = []
-        
-        return self._all_symbols
+        """Récupère tous les symboles Binance (index courant)"""
+        return self.get_index().symbols
     
     def search(self, query: str, quote_asset: str = 'USDT', limit: int = 10) -> List[Dict]:
         """
@@ -40,39 +247,9 @@ class BinanceSymbolSearch:
             limit: Nombre max de résultats
             
         Returns:
-            Liste de symboles correspondants
+            Liste de symboles correspondants (exacts d'abord, puis préfixes, puis partiels)
         """
-        query = query.upper().strip()
-        all_symbols = self.get_all_symbols()
-        
-        # Filtrer les symboles qui correspondent
-        results = []
-        exact_matches = []
-        partial_matches = []
-        
-        for s in all_symbols:
-            base = s['baseAsset']
-            symbol = s['symbol']
-            
-            # Match exact sur baseAsset
-            if base == query:
-                if s['quoteAsset'] == quote_asset:
-                    exact_matches.insert(0, s)  # Priorité à USDT
-                else:
-                    exact_matches.append(s)
-            
-            # Match partiel
-            elif query in base or query in symbol:
-                if s['quoteAsset'] == quote_asset:
-                    partial_matches.insert(0, s)
-                else:
-                    partial_matches.append(s)
-        
-        # Combiner les résultats (exact d'abord, puis partiel)
-        results = exact_matches + partial_matches
-        
-        # Limiter les résultats
-        return results[:limit]
+        return self.get_index().search(query.upper().strip(), quote_asset, limit)
     
     def get_best_match(self, query: str) -> Optional[str]:
         """
@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autocomplete import MAX_CHOICES, AutocompleteIndex
+
+
+class AutocompleteIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.configured = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+        self.universe = [f"B{i:03d}USDT" for i in range(100)] + ['BTCUSDT', 'BNBUSDT', 'BTC']
+        self.index = AutocompleteIndex(lambda: self.configured, lambda: self.universe)
+
+    def test_exact_then_recent_then_alphabetical(self):
+        self.index.record('bnbusdt')
+        self.assertEqual(self.index.complete('b', limit=4), ['BNBUSDT', 'BTCUSDT', 'B000USDT', 'B001USDT'])
+        # Correspondance exacte avant les usages récents
+        self.assertEqual(self.index.complete('BTC', limit=3), ['BTC', 'BTCUSDT'])
+
+    def test_recent_order_and_unknown_entries(self):
+        self.index.record('B050USDT')
+        self.index.record('B010USDT')
+        # Entrée utilisée mais absente de toutes les sources : jamais suggérée
+        self.index.record('OLDUSDT')
+        self.assertEqual(self.index.complete('', limit=3), ['B010USDT', 'B050USDT', 'BTCUSDT'])
+        self.assertEqual(self.index.complete('O'), [])
+
+    def test_source_priority(self):
+        # Symboles configurés (première source) avant l'univers Binance
+        self.assertEqual(self.index.complete('', limit=4), ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'B000USDT'])
+
+    def test_limit_is_25(self):
+        choices = self.index.complete('B')
+        self.assertEqual(len(choices), MAX_CHOICES)
+        self.assertEqual(len(set(choices)), MAX_CHOICES)
+
+    def test_case_insensitive(self):
+        self.configured.append('dogeUSDT')
+        self.assertEqual(self.index.complete('  doGe '), ['DOGEUSDT'])
+        self.assertEqual(self.index.complete('sol'), ['SOLUSDT'])
+
+    def test_resorted_when_a_source_changes(self):
+        self.assertEqual(self.index.complete('A'), [])
+        self.configured = self.configured + ['ADAUSDT', 'AAVEUSDT']
+        self.assertEqual(self.index.complete('A'), ['AAVEUSDT', 'ADAUSDT'])
+
+        # Même contenu dans une nouvelle liste : pas de retri, même résultat
+        self.configured = list(self.configured)
+        self.assertEqual(self.index.complete('A'), ['AAVEUSDT', 'ADAUSDT'])
+
+        self.universe = self.universe + ['AVAXUSDT']
+        self.assertEqual(self.index.complete('A'), ['AAVEUSDT', 'ADAUSDT', 'AVAXUSDT'])
+
+        self.configured = ['SOLUSDT']
+        self.assertEqual(self.index.complete('A'), ['AVAXUSDT'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import binance_weight
+from binance_weight import BinanceRateLimited, BinanceWeightTracker, kline_weight
+
+
+class Clock:
+    """Remplace le module time de binance_weight (sleep avance l'heure)"""
+
+    def __init__(self, now: float):
+        self.now = now
+        self.slept = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.slept += seconds
+        self.now += seconds
+
+
+class BinanceWeightTrackerTest(unittest.TestCase):
+    def setUp(self):
+        # 10 s après le début d'une minute
+        self.clock = Clock(1_700_000_040.0 + 10)
+        patcher = mock.patch.object(binance_weight, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Budgets : 70 (cycles), 95 (commandes)
+        self.tracker = BinanceWeightTracker(limit=100)
+
+    def test_kline_weight(self):
+        self.assertEqual([kline_weight(limit) for limit in (1, 99, 100, 499, 500, 1000, 1500)],
+                         [1, 1, 2, 2, 5, 5, 10])
+
+    def test_low_priority_keeps_a_margin_for_commands(self):
+        self.assertEqual(self.tracker._reserve(60, 'low'), 0)
+        delay = self.tracker._reserve(20, 'low')
+        self.assertAlmostEqual(delay, 50.05)
+        self.assertEqual(self.tracker.status()['deferred'], 1)
+
+        # Les commandes utilisent la marge jusqu'à 95
+        self.assertEqual(self.tracker._reserve(20, 'high'), 0)
+        self.assertEqual(self.tracker.used_weight(), 80)
+        self.assertGreater(self.tracker._reserve(20, 'high'), 0)
+        self.assertEqual(self.tracker.status()['deferred'], 1)
+
+    def test_heavy_request_passes_alone_at_window_start(self):
+        self.assertEqual(self.tracker._reserve(80, 'low'), 0)
+        self.assertGreater(self.tracker._reserve(1, 'low'), 0)
+
+    def test_window_rollover(self):
+        self.tracker._reserve(70, 'low')
+        self.tracker.acquire(10, 'low')
+
+        # Attente jusqu'à la minute suivante, puis compteurs remis à zéro
+        self.assertAlmostEqual(self.clock.slept, 50.05)
+        self.assertEqual(self.tracker.used_weight(), 10)
+        self.assertEqual(self.tracker.status()['peak'], 70)
+
+    def test_reported_weight_includes_other_processes(self):
+        self.tracker._reserve(5, 'low')
+        self.tracker.record_headers({'X-MBX-USED-WEIGHT-1M': '68'}, 200)
+        self.assertEqual(self.tracker.used_weight(), 68)
+        self.assertGreater(self.tracker._reserve(5, 'low'), 0)
+        self.assertEqual(self.tracker._reserve(5, 'high'), 0)
+
+        # En-tête plus ancien (plus petit) : ignoré ; invalide : ignoré
+        self.tracker.record_headers({'x-mbx-used-weight-1m': '10'})
+        self.tracker.record_headers({'X-MBX-USED-WEIGHT-1M': 'abc'})
+        self.assertEqual(self.tracker.used_weight(), 73)
+
+    def test_ban(self):
+        self.tracker.record_headers({'Retry-After': '30'}, 429)
+        self.assertAlmostEqual(self.tracker.status()['banned_for'], 30)
+
+        with self.assertRaises(BinanceRateLimited):
+            self.tracker._reserve(1, 'high')
+        self.assertAlmostEqual(self.tracker._reserve(1, 'low'), 30)
+
+        # Les cycles attendent la fin du bannissement
+        self.tracker.acquire(1, 'low')
+        self.assertAlmostEqual(self.clock.slept, 30)
+        self.assertEqual(self.tracker._reserve(1, 'high'), 0)
+
+    def test_ban_without_retry_after_lasts_until_next_window(self):
+        self.tracker.record_headers({}, 418)
+        self.assertAlmostEqual(self.tracker.status()['banned_for'], 50)
+
+    def test_plan_cycle(self):
+        plan = self.tracker.plan_cycle('volume', [5] * 30, 5)
+        self.assertEqual(plan, {'weight': 150, 'requests': 30, 'minutes': 3, 'interval_minutes': 5})
+        self.assertEqual(self.tracker.status()['cycles']['volume'], plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
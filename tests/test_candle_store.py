@@ -0,0 +1,116 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import candle_store
+from candle_store import CandleStore
+
+HOUR_MS = 3_600_000
+
+
+class Clock:
+    """Remplace le module time de candle_store (heure contrôlée par le test)"""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+class HourlyMarket:
+    """Client Binance minimal : bougies 1h, la dernière est en cours jusqu'à sa clôture"""
+
+    def __init__(self, clock: Clock, first_open_ms: int):
+        self.clock = clock
+        self.first_open_ms = first_open_ms
+        self.requests = 0
+
+    def _kline(self, open_ms: int, now_ms: int) -> list:
+        # Bougie en cours : clôture provisoire 50.0 ; bougie terminée : 100 + numéro
+        closed = now_ms >= open_ms + HOUR_MS
+        close = 100.0 + (open_ms - self.first_open_ms) // HOUR_MS if closed else 50.0
+        return [open_ms, "1", "200", "1", str(close), "10", open_ms + HOUR_MS - 1, "10", 1, "5", "5", "0"]
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 500, startTime=None, endTime=None):
+        self.requests += 1
+        now_ms = int(self.clock.now * 1000)
+        opens = range(self.first_open_ms, now_ms - now_ms % HOUR_MS + 1, HOUR_MS)
+        klines = [self._kline(open_ms, now_ms) for open_ms in opens]
+        if startTime is not None:
+            klines = [k for k in klines if k[0] >= startTime][:limit]
+        else:
+            if endTime is not None:
+                klines = [k for k in klines if k[0] <= endTime]
+            klines = klines[-limit:]
+        return klines
+
+
+class AsyncHourlyMarket(HourlyMarket):
+    """Équivalent AsyncBinanceClient : chaque requête rend la main à la boucle"""
+
+    async def get_klines_matrix(self, symbol: str, interval: str, priority: str = 'high', **params):
+        await asyncio.sleep(0.01)
+        return self.get_klines(symbol, interval, **params)
+
+
+class CandleStoreFreshnessTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = CandleStore(os.path.join(self.directory, "candles.db"), base_interval='1h',
+                                 derived_intervals=(), max_age_seconds=60)
+        self.first_open_ms = 1_700_000_000_000 - 1_700_000_000_000 % HOUR_MS
+        # 20 s avant la clôture de la 20e bougie
+        close_ms = self.first_open_ms + 20 * HOUR_MS
+        self.clock = Clock(close_ms / 1000 - 20)
+        self.market = HourlyMarket(self.clock, self.first_open_ms)
+        patcher = mock.patch.object(candle_store, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_fetch_just_before_and_after_close(self):
+        before = self.store.get_klines(self.market, 'TESTUSDT', '1h', 5)
+        self.assertEqual(before[-1][4], 50.0)
+        requests = self.market.requests
+
+        # Vérification 5 s après la clôture : la série synchronisée 25 s plus tôt n'est plus fraîche
+        self.clock.now += 25
+        after = self.store.get_klines(self.market, 'TESTUSDT', '1h', 5)
+        self.assertGreater(self.market.requests, requests)
+        self.assertEqual(after[-2][0], before[-1][0])
+        self.assertEqual(after[-2][4], 119.0)
+        self.assertEqual(after[-1][4], 50.0)
+
+    def test_fresh_within_current_candle(self):
+        self.store.get_klines(self.market, 'TESTUSDT', '1h', 5)
+        requests = self.market.requests
+
+        self.clock.now += 10
+        self.store.get_klines(self.market, 'TESTUSDT', '1h', 5)
+        self.assertEqual(self.market.requests, requests)
+
+    def test_async_calls_of_a_series_are_serialized(self):
+        market = AsyncHourlyMarket(self.clock, self.first_open_ms)
+
+        async def fetch_twice():
+            return await asyncio.gather(*(
+                self.store.get_klines_async(market, 'TESTUSDT', '1h', 5) for _ in range(2)
+            ))
+
+        first, second = asyncio.run(fetch_twice())
+        # Le second appel attend le premier et trouve la série fraîche
+        self.assertEqual(market.requests, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(first, self.store.get_klines(self.market, 'TESTUSDT', '1h', 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
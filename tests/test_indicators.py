@@ -0,0 +1,128 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import cross_type, evaluate_ma_system, sma_at, sma_matrix
+
+PERIODS = [3, 7, 25]
+SYSTEM1 = [7, 13, 20, 25, 32, 50, 100, 200, 300]
+
+
+def baseline_detect_cross(ma_values, ma_prev_values, ma_fast, ma_slow):
+    """MAAlertMonitor.detect_cross d'origine (une paire à la fois)"""
+    fast, slow = ma_values[ma_fast], ma_values[ma_slow]
+    fast_prev, slow_prev = ma_prev_values[ma_fast], ma_prev_values[ma_slow]
+    if pd.isna(fast) or pd.isna(slow) or pd.isna(fast_prev) or pd.isna(slow_prev):
+        return None
+    if fast_prev <= slow_prev and fast > slow:
+        return 'golden_cross'
+    if fast_prev >= slow_prev and fast < slow:
+        return 'death_cross'
+    return None
+
+
+def baseline_alignment(ma_values, ma_system):
+    """MAAlertMonitor.check_alignment d'origine (tri des valeurs)"""
+    order = [p for p, _ in sorted([(p, ma_values[p]) for p in ma_system], key=lambda x: x[1], reverse=True)]
+    if order == sorted(ma_system):
+        return 'bullish_alignment'
+    if order == sorted(ma_system, reverse=True):
+        return 'bearish_alignment'
+    return None
+
+
+class SmaMatrixTest(unittest.TestCase):
+    def assertMatchesRolling(self, values: np.ndarray):
+        matrix = sma_matrix(values, PERIODS)
+        for row, period in enumerate(PERIODS):
+            expected = pd.Series(values).rolling(period).mean().to_numpy()
+            np.testing.assert_allclose(matrix[row], expected, rtol=1e-9, equal_nan=True)
+
+    def test_matches_pandas_rolling(self):
+        rng = np.random.default_rng(1)
+        self.assertMatchesRolling(100 + rng.standard_normal(200).cumsum())
+
+    def test_nan_only_affects_windows_containing_it(self):
+        values = np.arange(20, dtype=np.float64)
+        values[3] = np.nan
+        self.assertMatchesRolling(values)
+
+        tail = sma_matrix(values, [3])[0, -3:]
+        np.testing.assert_allclose(tail, [16.0, 17.0, 18.0])
+
+    def test_nan_runs_and_short_series(self):
+        rng = np.random.default_rng(2)
+        values = 50 + rng.standard_normal(120).cumsum()
+        values[[0, 10, 11, 12, 60, 119]] = np.nan
+        self.assertMatchesRolling(values)
+        self.assertMatchesRolling(values[:5])
+        self.assertEqual(sma_matrix([], PERIODS).shape, (3, 0))
+
+
+class EvaluateMASystemTest(unittest.TestCase):
+    def assertMatchesBaseline(self, closes: np.ndarray, system: list):
+        matrix = sma_matrix(closes, system)
+        crosses = 0
+        for index in range(1, len(closes)):
+            current = sma_at(matrix, system, index)
+            previous = sma_at(matrix, system, index - 1)
+            evaluation = evaluate_ma_system(system, current, previous)
+
+            multiple = {}
+            for i, ma_fast in enumerate(system):
+                crossed = []
+                for ma_slow in system[i + 1:]:
+                    expected = baseline_detect_cross(current, previous, ma_fast, ma_slow)
+                    self.assertEqual(cross_type(evaluation, ma_fast, ma_slow), expected)
+                    if expected:
+                        crossed.append(ma_slow)
+                        crosses += 1
+                if len(crossed) >= 2:
+                    multiple[ma_fast] = crossed
+            self.assertEqual(evaluation['multiple_crosses'], multiple)
+
+            if not any(pd.isna(value) for value in current.values()):
+                self.assertEqual(evaluation['alignment'], baseline_alignment(current, system))
+        return crosses
+
+    def test_random_walk_matches_baseline(self):
+        rng = np.random.default_rng(4)
+        closes = 100 + rng.standard_normal(1200).cumsum()
+        # Assez de croisements pour que la comparaison porte sur quelque chose
+        self.assertGreater(self.assertMatchesBaseline(closes, SYSTEM1), 100)
+
+    def test_ties_and_flat_series(self):
+        # Valeurs entières répétées : MA égales, croisements depuis une égalité
+        rng = np.random.default_rng(5)
+        closes = rng.integers(0, 3, 400).astype(np.float64)
+        self.assertMatchesBaseline(closes, [2, 3, 5, 8])
+        self.assertMatchesBaseline(np.full(50, 10.0), [2, 3, 5])
+
+    def test_alignment(self):
+        rising = np.arange(1, 60, dtype=np.float64)
+        matrix = sma_matrix(rising, [5, 10, 20])
+        evaluation = evaluate_ma_system([5, 10, 20], sma_at(matrix, [5, 10, 20]), sma_at(matrix, [5, 10, 20], -2))
+        self.assertEqual(evaluation['alignment'], 'bullish_alignment')
+        self.assertEqual(evaluation['order'], [5, 10, 20])
+
+        matrix = sma_matrix(rising[::-1], [5, 10, 20])
+        evaluation = evaluate_ma_system([5, 10, 20], sma_at(matrix, [5, 10, 20]), sma_at(matrix, [5, 10, 20], -2))
+        self.assertEqual(evaluation['alignment'], 'bearish_alignment')
+
+    def test_missing_history(self):
+        evaluation = evaluate_ma_system([7, 25], {7: 2.0, 25: 1.0}, {7: float('nan'), 25: 1.5})
+        self.assertIsNone(cross_type(evaluation, 7, 25))
+        self.assertIsNone(cross_type(evaluation, 7, 99))
+
+        evaluation = evaluate_ma_system([7, 25], {7: 2.0, 25: float('nan')}, {7: 1.0, 25: 1.5})
+        self.assertIsNone(evaluation['order'])
+        self.assertIsNone(evaluation['alignment'])
+
+
+if __name__ == "__main__":
+    unittest.main()
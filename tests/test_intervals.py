@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_scheduler import CandleCloseScheduler
+from intervals import NY_TZ, last_candle_close, next_candle_close
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def new_york(*args) -> datetime:
+    return datetime(*args, tzinfo=NY_TZ)
+
+
+class BinanceCloseTest(unittest.TestCase):
+    def test_4h_boundaries(self):
+        self.assertEqual(next_candle_close('binance', '4h', utc(2024, 3, 1, 13, 5)), utc(2024, 3, 1, 16))
+        # Exactement à la clôture : la suivante
+        self.assertEqual(next_candle_close('binance', '4h', utc(2024, 3, 1, 16)), utc(2024, 3, 1, 20))
+        self.assertEqual(next_candle_close('binance', '4h', utc(2024, 3, 1, 22, 30)), utc(2024, 3, 2))
+        self.assertEqual(last_candle_close('binance', '4h', utc(2024, 3, 1, 13, 5)), utc(2024, 3, 1, 12))
+
+    def test_1d_boundaries(self):
+        self.assertEqual(next_candle_close('binance', '1d', utc(2024, 2, 29, 23, 59)), utc(2024, 3, 1))
+        self.assertEqual(next_candle_close('binance', 'daily', utc(2024, 3, 1)), utc(2024, 3, 2))
+        # Week-end : les cryptos clôturent tous les jours
+        self.assertEqual(next_candle_close('binance', '1d', utc(2024, 3, 2, 12)), utc(2024, 3, 3))
+        self.assertEqual(last_candle_close('binance', '1d', utc(2024, 3, 2, 12)), utc(2024, 3, 2))
+
+
+class YahooCloseTest(unittest.TestCase):
+    # 1er mars 2024 : vendredi ; le lundi suivant (11 mars) est après le passage à l'heure d'été
+    def test_friday_session(self):
+        self.assertEqual(next_candle_close('yahoo', '1h', new_york(2024, 3, 1, 14, 45)), new_york(2024, 3, 1, 15, 30))
+        # Dernière bougie 1h raccourcie à la clôture de 16:00
+        self.assertEqual(next_candle_close('yahoo', '1h', new_york(2024, 3, 1, 15, 40)), new_york(2024, 3, 1, 16))
+        self.assertEqual(next_candle_close('yahoo', '15m', new_york(2024, 3, 1, 15, 50)), new_york(2024, 3, 1, 16))
+        self.assertEqual(next_candle_close('yahoo', '1d', new_york(2024, 3, 1, 10)), new_york(2024, 3, 1, 16))
+
+    def test_friday_evening_goes_to_monday(self):
+        friday_evening = new_york(2024, 3, 1, 18)
+        self.assertEqual(next_candle_close('yahoo', '1h', friday_evening), new_york(2024, 3, 4, 10, 30))
+        self.assertEqual(next_candle_close('yahoo', '1d', friday_evening), new_york(2024, 3, 4, 16))
+        self.assertEqual(last_candle_close('yahoo', '1d', friday_evening), new_york(2024, 3, 1, 16))
+
+    def test_weekend(self):
+        saturday = new_york(2024, 3, 9, 12)
+        self.assertEqual(next_candle_close('yahoo', '15m', saturday), new_york(2024, 3, 11, 9, 45))
+        # 4h reconstruit par resample : bornes alignées sur minuit (12:00 puis clôture de séance)
+        self.assertEqual(next_candle_close('yahoo', '4h', saturday), new_york(2024, 3, 11, 12))
+        self.assertEqual(last_candle_close('yahoo', '1h', saturday), new_york(2024, 3, 8, 16))
+        # Heure d'été : 9:45 à New York = 13:45 UTC (14:45 UTC la semaine précédente)
+        self.assertEqual(next_candle_close('yahoo', '15m', saturday), utc(2024, 3, 11, 13, 45))
+        self.assertEqual(next_candle_close('yahoo', '15m', new_york(2024, 3, 2, 12)), utc(2024, 3, 4, 14, 45))
+
+
+class SchedulerClosesTest(unittest.TestCase):
+    def test_closes_are_grouped_by_time(self):
+        scheduler = CandleCloseScheduler()
+        job = {'timeframes': lambda: {'crypto': ['15m', '1h', '4h', '1d'], 'stocks': ['1h', '1d']}}
+        closes = scheduler._closes(job, utc(2024, 3, 1, 15, 59))
+
+        self.assertEqual(closes[utc(2024, 3, 1, 16)], {'crypto': ['15m', '1h', '4h']})
+        self.assertEqual(closes[utc(2024, 3, 2)], {'crypto': ['1d']})
+        # 10:59 à New York : bougie 1h de 10:30 clôturée à 11:30
+        self.assertEqual(closes[new_york(2024, 3, 1, 11, 30)], {'stocks': ['1h']})
+        self.assertEqual(closes[new_york(2024, 3, 1, 16)], {'stocks': ['1d']})
+
+
+if __name__ == "__main__":
+    unittest.main()
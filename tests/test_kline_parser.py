@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candles import CandleSeries
+from kline_parser import KLINE_FIELDS, parse_candles, parse_klines
+
+
+def klines(count: int = 50) -> list:
+    """Klines au format de l'API (prix et volumes en chaînes)"""
+    rng = np.random.default_rng(7)
+    rows = []
+    open_ms = 1_700_000_000_000
+    for _ in range(count):
+        price = 30_000 + rng.random() * 1_000
+        rows.append([
+            open_ms, f"{price:.8f}", f"{price + 50:.8f}", f"{price - 50:.8f}", f"{price + 10:.8f}",
+            f"{rng.random() * 100:.8f}", open_ms + 899_999, f"{rng.random() * 1e6:.8f}",
+            int(rng.integers(0, 10_000)), f"{rng.random() * 50:.8f}", f"{rng.random() * 5e5:.8f}", "0"
+        ])
+        open_ms += 900_000
+    return rows
+
+
+class ParseKlinesTest(unittest.TestCase):
+    def test_matches_json_loads(self):
+        rows = klines()
+        payload = json.dumps(rows, separators=(',', ':')).encode()
+
+        matrix = parse_klines(payload)
+        expected = np.array([[float(value) for value in row] for row in json.loads(payload)])
+        self.assertEqual(matrix.shape, (len(rows), KLINE_FIELDS))
+        np.testing.assert_array_equal(matrix, expected)
+        # Horodatages exacts une fois reconvertis en entiers
+        self.assertEqual(matrix[:, 0].astype(np.int64).tolist(), [row[0] for row in rows])
+
+        # Espaces de json.dumps par défaut
+        np.testing.assert_array_equal(parse_klines(json.dumps(rows).encode()), expected)
+
+    def test_candles_match_from_klines(self):
+        payload = json.dumps(klines()).encode()
+        parsed = parse_candles(payload, 'BTCUSDT', '15m')
+        expected = CandleSeries.from_klines(json.loads(payload), 'BTCUSDT', '15m')
+        for column in ('open_time', 'close_time', 'open', 'high', 'low', 'close', 'volume', 'quote_volume'):
+            np.testing.assert_array_equal(getattr(parsed, column), getattr(expected, column))
+
+    def test_empty_response(self):
+        self.assertEqual(parse_klines(b'[]').shape, (0, KLINE_FIELDS))
+
+    def test_binance_error_body(self):
+        for payload in (b'{"code":-1121,"msg":"Invalid symbol."}',
+                        b' {"code":-1003,"msg":"Too many requests."}',
+                        b'<html>502 Bad Gateway</html>',
+                        b'[[1,"2","3"]]'):
+            with self.subTest(payload=payload):
+                with self.assertRaises(ValueError):
+                    parse_klines(payload)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kline_resampler import resample_klines
+
+QUARTER_MS = 900_000
+DAY_MS = 86_400_000
+# 13:30 UTC : premières tranches 1h/4h/1d incomplètes
+START_MS = 1_700_000_000_000 - 1_700_000_000_000 % DAY_MS + 13 * 3_600_000 + 2 * QUARTER_MS
+
+
+def fixture(count: int = 400) -> list:
+    """Klines 15m au format de l'API (chaînes), avec un trou de 3 bougies"""
+    rng = np.random.default_rng(6)
+    klines = []
+    price = 100.0
+    for index in range(count):
+        if 200 <= index < 203:
+            continue
+        open_ms = START_MS + index * QUARTER_MS
+        open_price = price
+        price = max(1.0, price + rng.standard_normal())
+        high = max(open_price, price) + rng.random()
+        low = min(open_price, price) - rng.random()
+        volume = rng.random() * 10
+        klines.append([
+            open_ms, f"{open_price:.2f}", f"{high:.2f}", f"{low:.2f}", f"{price:.2f}", f"{volume:.4f}",
+            open_ms + QUARTER_MS - 1, f"{volume * price:.4f}", int(rng.integers(1, 100)),
+            f"{volume / 2:.4f}", f"{volume * price / 2:.4f}", "0"
+        ])
+    return klines
+
+
+def expected(klines: list, step_ms: int) -> list:
+    """Agrégation de référence avec pandas (tranches UTC alignées sur l'epoch)"""
+    df = pd.DataFrame(klines, columns=[
+        'open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+        'quote_volume', 'trades', 'taker_buy_base', 'taker_buy_quote', 'ignore'
+    ])
+    numeric = ['open', 'high', 'low', 'close', 'volume', 'quote_volume', 'taker_buy_base', 'taker_buy_quote']
+    df[numeric] = df[numeric].astype(float)
+    df['bucket'] = df['open_time'] // step_ms * step_ms
+    grouped = df.groupby('bucket', sort=True).agg({
+        'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum',
+        'quote_volume': 'sum', 'trades': 'sum', 'taker_buy_base': 'sum', 'taker_buy_quote': 'sum'
+    })
+    return [
+        [int(bucket), row.open, row.high, row.low, row.close, row.volume, int(bucket) + step_ms - 1,
+         row.quote_volume, int(row.trades), row.taker_buy_base, row.taker_buy_quote, '0']
+        for bucket, row in grouped.iterrows()
+    ]
+
+
+class ResampleKlinesTest(unittest.TestCase):
+    def assertKlinesEqual(self, actual: list, reference: list):
+        self.assertEqual(len(actual), len(reference))
+        for got, want in zip(actual, reference):
+            self.assertEqual(got[0], want[0])
+            self.assertEqual(got[6], want[6])
+            self.assertEqual(got[8], want[8])
+            self.assertEqual(got[11], '0')
+            np.testing.assert_allclose([got[i] for i in (1, 2, 3, 4, 5, 7, 9, 10)],
+                                       [want[i] for i in (1, 2, 3, 4, 5, 7, 9, 10)], rtol=1e-12)
+
+    def test_matches_pandas_aggregation(self):
+        klines = fixture()
+        for interval, step_ms in (('1h', 3_600_000), ('4h', 14_400_000), ('1d', DAY_MS)):
+            with self.subTest(interval=interval):
+                self.assertKlinesEqual(resample_klines(klines, interval), expected(klines, step_ms))
+
+    def test_buckets_are_aligned_on_utc(self):
+        resampled = resample_klines(fixture(), '4h')
+        # 13:30 → tranche 12:00-16:00, puis 16:00, 20:00, 00:00...
+        self.assertEqual(resampled[0][0], START_MS - 6 * QUARTER_MS)
+        self.assertTrue(all(k[0] % 14_400_000 == 0 for k in resampled))
+        self.assertEqual(resampled[1][0] - resampled[0][0], 14_400_000)
+
+    def test_partial_first_bucket(self):
+        klines = fixture()
+        first_hour = resample_klines(klines, '1h')[0]
+        # 13:30 et 13:45 seulement
+        self.assertEqual(first_hour[1], float(klines[0][1]))
+        self.assertEqual(first_hour[4], float(klines[1][4]))
+        self.assertEqual(first_hour[8], klines[0][8] + klines[1][8])
+
+    def test_empty(self):
+        self.assertEqual(resample_klines([], '1h'), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
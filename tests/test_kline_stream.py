@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_store import CandleStore
+from kline_stream import BinanceKlineStream, LocalKlineStreamServer
+
+QUARTER_MS = 900_000
+# Ouverture alignée sur une bougie 4h
+START_MS = 1_700_000_000_000 - 1_700_000_000_000 % (4 * 3_600_000)
+
+
+def kline(index: int) -> list:
+    open_ms = START_MS + index * QUARTER_MS
+    close = str(100.0 + index)
+    return [open_ms, close, close, close, close, "10", open_ms + QUARTER_MS - 1, "1000", 5, "4", "400", "0"]
+
+
+async def wait_until(condition, timeout: float = 5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Condition non atteinte")
+        await asyncio.sleep(0.01)
+
+
+class KlineStreamTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.store = CandleStore(os.path.join(tempfile.mkdtemp(), "candles.db"))
+        self.server = LocalKlineStreamServer()
+        url = await self.server.start()
+
+        self.stream = BinanceKlineStream(candle_store=self.store, url=url, interval='15m',
+                                         close_intervals=('15m', '1h', '4h'), reconnect_delay=0.1)
+        self.closes = []
+        self.failures = 0
+
+        def failing_listener(symbol, interval, kline):
+            self.failures += 1
+            raise RuntimeError("listener en erreur")
+
+        async def recording_listener(symbol, interval, kline):
+            self.closes.append((symbol, interval, kline[0]))
+
+        self.stream.add_listener(failing_listener)
+        self.stream.add_listener(recording_listener)
+        self.stream.set_symbols(['BTCUSDT'])
+        self.task = asyncio.get_running_loop().create_task(self.stream.run())
+        await wait_until(lambda: self.server._clients)
+
+    async def asyncTearDown(self):
+        await self.stream.stop()
+        await self.server.stop()
+        self.task.cancel()
+        self.store.close()
+
+    async def test_in_progress_kline_is_not_stored(self):
+        await self.server.publish_kline('BTCUSDT', '15m', kline(0), closed=False)
+        await wait_until(lambda: self.stream.get_latest('BTCUSDT').get('current'))
+
+        self.assertNotIn('closed', self.stream.get_latest('BTCUSDT'))
+        self.assertEqual(self.store.read_klines('BTCUSDT', '15m', 10), [])
+        self.assertEqual(self.closes, [])
+
+    async def test_closed_klines_are_stored_and_derived_closes_fire(self):
+        for index in range(16):
+            await self.server.publish_kline('BTCUSDT', '15m', kline(index), closed=False)
+            await self.server.publish_kline('BTCUSDT', '15m', kline(index), closed=True)
+        await wait_until(lambda: len(self.closes) == 21)
+
+        stored = self.store.read_klines('BTCUSDT', '15m', 100)
+        self.assertEqual([k[0] for k in stored], [kline(index)[0] for index in range(16)])
+        self.assertEqual(stored[-1][4], 115.0)
+
+        by_interval = {}
+        for symbol, interval, open_ms in self.closes:
+            by_interval.setdefault(interval, set()).add(open_ms)
+        self.assertEqual(len(by_interval['15m']), 16)
+        # 1h et 4h émis à la clôture de la dernière bougie 15m de chaque période alignée
+        self.assertEqual(by_interval['1h'], {kline(index)[0] for index in (3, 7, 11, 15)})
+        self.assertEqual(by_interval['4h'], {kline(15)[0]})
+
+        # Un listener en erreur n'arrête ni la réception ni les autres listeners
+        self.assertEqual(self.failures, 21)
+        self.assertTrue(self.stream.is_running())
+        self.assertFalse(self.task.done())
+
+
+if __name__ == "__main__":
+    unittest.main()
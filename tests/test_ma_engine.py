@@ -0,0 +1,138 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candles import CandleSeries
+from ma_engine import RESYNC_EVERY, IncrementalMAEngine, RingBufferMA
+
+HOUR_MS = 3_600_000
+START_MS = 1_700_000_000_000 - 1_700_000_000_000 % HOUR_MS
+PERIODS = [7, 25, 99]
+
+
+def closes(count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 30_000 + rng.standard_normal(count).cumsum() * 50
+
+
+def series(values: np.ndarray, first: int = 0) -> CandleSeries:
+    klines = []
+    for index, close in enumerate(values, start=first):
+        open_ms = START_MS + index * HOUR_MS
+        klines.append([open_ms, close, close, close, close, 1.0, open_ms + HOUR_MS - 1, 1.0, 1, 0.0, 0.0, '0'])
+    return CandleSeries.from_klines(klines, 'BTCUSDT', '1h')
+
+
+def rolling(values: np.ndarray, period: int) -> np.ndarray:
+    return pd.Series(values).rolling(period).mean().to_numpy()
+
+
+class RingBufferMATest(unittest.TestCase):
+    def test_push_matches_rolling(self):
+        values = closes(300)
+        expected = rolling(values, 25)
+        ma = RingBufferMA(25)
+        for index, value in enumerate(values):
+            ma.push(value)
+            np.testing.assert_allclose(ma.value(), expected[index], rtol=1e-12, equal_nan=True)
+            if index:
+                np.testing.assert_allclose(ma.previous(), expected[index - 1], rtol=1e-12, equal_nan=True)
+
+    def test_peek_does_not_change_state(self):
+        values = closes(60)
+        ma = RingBufferMA(25)
+        for value in values[:-1]:
+            ma.push(value)
+        before = (ma.value(), ma.previous())
+
+        peeked = ma.peek(values[-1])
+        self.assertEqual((ma.value(), ma.previous()), before)
+
+        ma.push(values[-1])
+        self.assertAlmostEqual(peeked, ma.value(), places=9)
+        self.assertAlmostEqual(peeked, rolling(values, 25)[-1], places=9)
+
+    def test_peek_fills_the_last_slot(self):
+        ma = RingBufferMA(3)
+        ma.push(1.0)
+        self.assertTrue(np.isnan(ma.peek(2.0)))
+        ma.push(2.0)
+        self.assertEqual(ma.peek(6.0), 3.0)
+
+    def test_resync_removes_drift(self):
+        # Amplitudes très différentes : la somme courante dérive entre deux resynchronisations
+        rng = np.random.default_rng(3)
+        values = rng.choice([1e-3, 1e9], size=RESYNC_EVERY * 2) * rng.random(RESYNC_EVERY * 2)
+        ma = RingBufferMA(7)
+        for value in values[:RESYNC_EVERY]:
+            ma.push(value)
+
+        self.assertEqual(ma._sum, float(ma._buffer.sum()))
+        np.testing.assert_allclose(ma.value(), rolling(values[:RESYNC_EVERY], 7)[-1], rtol=1e-12)
+
+
+class IncrementalMAEngineTest(unittest.TestCase):
+    def assertMatchesRolling(self, result: dict, values: np.ndarray):
+        for period in PERIODS:
+            expected = rolling(values, period)
+            np.testing.assert_allclose(result['current'][period], expected[-1], rtol=1e-9)
+            np.testing.assert_allclose(result['previous'][period], expected[-2], rtol=1e-9)
+
+    def test_in_progress_candle_is_peeked(self):
+        values = closes(300)
+        engine = IncrementalMAEngine()
+        # Dernière bougie en cours : incluse dans la MA actuelle sans être enregistrée
+        now_ms = START_MS + 299 * HOUR_MS + 60_000
+        result = engine.update('BTCUSDT', '1h', series(values), PERIODS, now_ms)
+        self.assertMatchesRolling(result, values)
+        self.assertEqual(engine._series[('BTCUSDT', '1h')]['last_open'], START_MS + 298 * HOUR_MS)
+
+        # Même bougie en cours, clôture provisoire différente
+        values[-1] += 500
+        result = engine.update('BTCUSDT', '1h', series(values), PERIODS, now_ms + 60_000)
+        self.assertMatchesRolling(result, values)
+
+    def test_closed_candles_are_pushed_without_reseed(self):
+        values = closes(400)
+        engine = IncrementalMAEngine()
+        engine.update('BTCUSDT', '1h', series(values[:300]), PERIODS, START_MS + 300 * HOUR_MS)
+        mas = engine._series[('BTCUSDT', '1h')]['mas']
+
+        for end in range(301, 401, 7):
+            result = engine.update('BTCUSDT', '1h', series(values[end - 300:end], end - 300), PERIODS,
+                                   START_MS + end * HOUR_MS)
+            self.assertMatchesRolling(result, values[:end])
+        self.assertIs(engine._series[('BTCUSDT', '1h')]['mas'], mas)
+
+    def test_gap_reseeds(self):
+        values = closes(500)
+        engine = IncrementalMAEngine()
+        engine.update('BTCUSDT', '1h', series(values[:300]), PERIODS, START_MS + 300 * HOUR_MS)
+        mas = engine._series[('BTCUSDT', '1h')]['mas']
+
+        # Bougies 300 à 349 jamais reçues : la série n'est plus contiguë
+        window = values[350:500]
+        result = engine.update('BTCUSDT', '1h', series(window, 350), PERIODS, START_MS + 500 * HOUR_MS)
+        self.assertMatchesRolling(result, window)
+        self.assertIsNot(engine._series[('BTCUSDT', '1h')]['mas'], mas)
+
+    def test_resync_after_many_updates(self):
+        values = closes(RESYNC_EVERY + 400)
+        engine = IncrementalMAEngine()
+        engine.update('BTCUSDT', '1h', series(values[:300]), PERIODS, START_MS + 300 * HOUR_MS)
+
+        for end in range(301, len(values) + 1):
+            result = engine.update('BTCUSDT', '1h', series(values[end - 300:end], end - 300), PERIODS,
+                                   START_MS + end * HOUR_MS)
+        self.assertMatchesRolling(result, values)
+        for ma in engine._series[('BTCUSDT', '1h')]['mas'].values():
+            self.assertGreater(ma._updates, RESYNC_EVERY)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import monitor_workers
+from monitor_workers import MonitorWorkerPool, WorkerDied
+
+
+def _slow_shard(items, seconds):
+    time.sleep(seconds)
+    return {'results': {item: item for item in items}, 'metrics': {'histograms': {}, 'counters': {}}}
+
+
+class MonitorWorkerPoolTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.pool = MonitorWorkerPool('volume', 2, candles_db=os.path.join(directory, "candles.db"), timeout=0.5)
+        # Pas de moniteur dans les workers (hérité du fork) : seules les fonctions de test y tournent
+        with mock.patch.object(monitor_workers, '_init_worker', lambda *args: None):
+            self.pool.start()
+        self.addCleanup(self.pool.shutdown)
+
+    def test_hung_worker_is_stopped(self):
+        process = self.pool._processes[0]
+        with self.assertRaises(WorkerDied):
+            self.pool._call(0, time.sleep, 5)
+
+        process.join(timeout=2)
+        self.assertFalse(process.is_alive())
+        self.assertEqual(self.pool.status()['alive'], 1)
+        with self.assertRaises(WorkerDied):
+            self.pool._call(0, time.sleep, 0)
+
+    def test_hung_shard_is_left_to_the_main_process(self):
+        symbols = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT']
+        fast = asyncio.run(self.pool._map(_slow_shard, symbols, lambda item: item, 0))
+        self.assertEqual(set(fast), set(symbols))
+
+        started = time.monotonic()
+        slow = asyncio.run(self.pool._map(_slow_shard, symbols, lambda item: item, 5))
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual(slow, {})
+        self.assertEqual(self.pool.status()['alive'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
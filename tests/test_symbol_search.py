@@ -0,0 +1,97 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import symbol_search
+from symbol_search import NGRAM_SIZE, BinanceSymbolSearch, SymbolIndex
+
+
+def pair(base: str, quote: str) -> dict:
+    return {'symbol': base + quote, 'baseAsset': base, 'quoteAsset': quote, 'status': 'TRADING'}
+
+
+# Ordre proche de exchangeInfo
+PAIRS = [
+    pair('ETH', 'BTC'), pair('WBTC', 'USDT'), pair('BTC', 'EUR'), pair('BTC', 'USDC'), pair('BTC', 'USDT'),
+    pair('ETH', 'USDC'), pair('ETH', 'USDT'), pair('SOL', 'BTC'), pair('SOL', 'USDT'), pair('ETHFI', 'USDT'),
+    pair('ETHW', 'USDT'), pair('WBTC', 'BTC'), pair('BETH', 'ETH'), pair('BTCDOM', 'USDT'),
+]
+
+
+def baseline_best_match(symbols: list, query: str, quote_asset: str = 'USDT'):
+    """BinanceSymbolSearch.get_best_match d'origine (parcours complet de exchangeInfo)"""
+    exact_matches, partial_matches = [], []
+    for s in symbols:
+        if s['baseAsset'] == query:
+            (exact_matches.insert(0, s) if s['quoteAsset'] == quote_asset else exact_matches.append(s))
+        elif query in s['baseAsset'] or query in s['symbol']:
+            (partial_matches.insert(0, s) if s['quoteAsset'] == quote_asset else partial_matches.append(s))
+    results = exact_matches + partial_matches
+    return results[0]['symbol'] if results else None
+
+
+class SymbolIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SymbolIndex(PAIRS)
+
+    def symbols(self, query: str, **kwargs) -> list:
+        return [s['symbol'] for s in self.index.search(query, **kwargs)]
+
+    def test_exact_symbol_before_exact_base_asset(self):
+        # Asset fictif ETHBTC : la requête est à la fois une paire et un baseAsset
+        index = SymbolIndex(PAIRS + [pair('ETHBTC', 'USDT')])
+        self.assertEqual([s['symbol'] for s in index.search('ETHBTC')], ['ETHBTC', 'ETHBTCUSDT'])
+
+    def test_exact_base_then_prefix_then_substring(self):
+        self.assertEqual(self.symbols('ETH', limit=20), [
+            # baseAsset exact : USDT d'abord, puis symbole le plus court
+            'ETHUSDT', 'ETHBTC', 'ETHUSDC',
+            # préfixe du baseAsset
+            'ETHWUSDT', 'ETHFIUSDT',
+            # sous-chaîne
+            'BETHETH',
+        ])
+
+    def test_quote_asset_preference(self):
+        self.assertEqual(self.symbols('BTC', limit=3), ['BTCUSDT', 'BTCEUR', 'BTCUSDC'])
+        self.assertEqual(self.symbols('BTC', quote_asset='USDC', limit=3), ['BTCUSDC', 'BTCUSDT', 'BTCEUR'])
+        self.assertEqual(self.symbols('SOL'), ['SOLUSDT', 'SOLBTC'])
+
+    def test_substring_longer_than_ngrams(self):
+        for query in ('TCUSD', 'BTCUSDT', 'THBTCU', 'WBTCBTC', 'ETHUSDC', 'TCDOMU', 'BTCEURX'):
+            self.assertGreater(len(query), NGRAM_SIZE)
+            expected = {s['symbol'] for s in PAIRS if query in s['baseAsset'] or query in s['symbol']}
+            with self.subTest(query=query):
+                self.assertEqual(set(self.symbols(query, limit=50)), expected)
+
+    def test_limit(self):
+        self.assertEqual(len(self.symbols('T', limit=4)), 4)
+        self.assertEqual(self.symbols('', limit=4), [])
+        self.assertEqual(self.symbols('XYZ'), [])
+
+
+class BestMatchTest(unittest.TestCase):
+    def search(self, pairs: list) -> BinanceSymbolSearch:
+        with mock.patch.object(symbol_search, 'Client'):
+            search = BinanceSymbolSearch()
+        search._fetch_symbols = lambda: pairs
+        return search
+
+    def test_parity_with_baseline(self):
+        search = self.search(PAIRS)
+        for query in ('BTC', 'eth', 'SOL', 'BTCUSDT', 'ETHUSDT', 'BTCDOM', 'ETHFI', ' sol '):
+            with self.subTest(query=query):
+                self.assertEqual(search.get_best_match(query), baseline_best_match(PAIRS, query.upper().strip()))
+
+    def test_exact_pair_wins_regardless_of_exchange_order(self):
+        # L'ancien parcours retenait la dernière paire USDT contenant la requête (WBTCUSDT ici)
+        pairs = [p for p in PAIRS if p['symbol'] != 'WBTCUSDT'] + [pair('WBTC', 'USDT')]
+        self.assertEqual(baseline_best_match(pairs, 'BTCUSDT'), 'WBTCUSDT')
+        self.assertEqual(self.search(pairs).get_best_match('BTCUSDT'), 'BTCUSDT')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import webhook_delivery
+from webhook_delivery import WebhookDispatcher
+
+
+class DiscordStub:
+    """Serveur webhook local : enregistre les messages, réponses scriptées puis 204"""
+
+    def __init__(self):
+        self.messages = []
+        self.responses = []
+        self.reject_title = None
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                titles = [embed.get('title') for embed in body['embeds']]
+                if stub.responses:
+                    status, payload = stub.responses.pop(0)
+                elif stub.reject_title in titles:
+                    status, payload = 400, {'message': 'Invalid Form Body'}
+                else:
+                    status, payload = 204, None
+                stub.messages.append((status, titles))
+
+                data = json.dumps(payload).encode() if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def sent(self) -> list:
+        """Titres des embeds acceptés, dans l'ordre"""
+        return [title for status, titles in self.messages if status == 204 for title in titles]
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def embed(title: str, chars: int = 10) -> dict:
+    return {'title': title, 'description': 'x' * (chars - len(title))}
+
+
+class WebhookDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.db_file = os.path.join(tempfile.mkdtemp(), "webhooks.db")
+        self.stub = DiscordStub()
+        self.addCleanup(self.stub.stop)
+
+    def dispatcher(self) -> WebhookDispatcher:
+        dispatcher = WebhookDispatcher(self.db_file, timeout=2)
+        self.addCleanup(dispatcher.close)
+        return dispatcher
+
+    def queue(self, embeds: list):
+        """Écrit des embeds dans l'outbox sans les envoyer (repris au démarrage suivant)"""
+        with mock.patch.object(WebhookDispatcher, '_wake'):
+            dispatcher = WebhookDispatcher(self.db_file)
+            for item in embeds:
+                dispatcher.send(self.stub.url, item)
+            dispatcher.close()
+
+    def test_batches_of_ten_embeds(self):
+        self.queue([embed(f"e{i}") for i in range(25)])
+        self.assertTrue(self.dispatcher().flush(5))
+
+        self.assertEqual([len(titles) for _, titles in self.stub.messages], [10, 10, 5])
+        self.assertEqual(self.stub.sent(), [f"e{i}" for i in range(25)])
+
+    def test_batches_stay_under_6000_chars(self):
+        self.queue([embed(f"e{i}", 1000) for i in range(13)])
+        self.assertTrue(self.dispatcher().flush(5))
+
+        self.assertEqual([len(titles) for _, titles in self.stub.messages], [6, 6, 1])
+
+    def test_429_retry_after(self):
+        self.stub.responses.append((429, {'retry_after': 0.3, 'global': False}))
+        dispatcher = self.dispatcher()
+        started = time.monotonic()
+        dispatcher.send(self.stub.url, embed('alerte'))
+
+        self.assertTrue(dispatcher.flush(5))
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        self.assertEqual(self.stub.messages, [(429, ['alerte']), (204, ['alerte'])])
+        self.assertEqual(dispatcher.stats['rate_limited'], 1)
+
+    def test_5xx_is_postponed_and_survives_restart(self):
+        self.stub.responses.append((502, None))
+        with mock.patch.object(webhook_delivery, 'MAX_RETRY_DELAY', 1):
+            dispatcher = WebhookDispatcher(self.db_file, timeout=2)
+            dispatcher.send(self.stub.url, embed('alerte'))
+            deadline = time.monotonic() + 5
+            while not self.stub.messages and time.monotonic() < deadline:
+                time.sleep(0.02)
+            dispatcher.close()
+
+            self.assertEqual(self.stub.messages, [(502, ['alerte'])])
+
+            # Même outbox après redémarrage : l'alerte est renvoyée après le délai
+            restarted = self.dispatcher()
+            self.assertEqual(restarted.pending(), 1)
+            self.assertTrue(restarted.flush(5))
+
+        self.assertEqual(self.stub.sent(), ['alerte'])
+
+    def test_400_on_a_batch_falls_back_to_single_sends(self):
+        self.stub.reject_title = 'invalide'
+        self.queue([embed('a'), embed('invalide'), embed('b')])
+        dispatcher = self.dispatcher()
+
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(self.stub.messages[0], (400, ['a', 'invalide', 'b']))
+        self.assertEqual(self.stub.sent(), ['a', 'b'])
+        self.assertEqual(dispatcher.stats['dropped'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,44 @@
 from binance.client import Client
+import asyncio
 import yfinance as yf
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import json
 import os
-import requests
+from candle_store import CandleStore
+from async_market_client import AsyncBinanceClient
+from webhook_delivery import WebhookDispatcher
+from alert_state import AlertStateStore
+from binance_weight import kline_weight, weight_tracker
+from yahoo_batch import download_histories
+from indicators import sma_matrix, sma_at
+from candles import CandleSeries
+from metrics import metrics
 
 class VolumeMonitor:
     """Surveillance des volumes avec détection de pics"""
     
-    def __init__(self, config_file: str = "volume_config.json"):
+    def __init__(self, config_file: str = "volume_config.json", candle_store: Optional[CandleStore] = None,
+                 async_client: Optional[AsyncBinanceClient] = None,
+                 dispatcher: Optional[WebhookDispatcher] = None,
+                 state_store: Optional[AlertStateStore] = None, workers=None):
+        """
+        Args:
+            workers: MonitorWorkerPool optionnel (volumes crypto récupérés sur plusieurs processus)
+        """
         self.config_file = config_file
         self.config = self._load_config()
         self.binance_client = Client()
-        self.alert_history = {}  # {symbol: last_alert_timestamp}
+        self.async_client = async_client or AsyncBinanceClient()
+        self.candle_store = candle_store or CandleStore()
+        self.dispatcher = dispatcher or WebhookDispatcher()  # Envoi des webhooks en arrière-plan
+        self.workers = workers
+        # Cooldowns conservés entre les redémarrages
+        self.state_store = state_store or AlertStateStore()
+        self.state_store.prune_cooldowns('volume', self.config['cooldown_minutes'] * 60)
+        self.alert_history = self.state_store.load_cooldowns('volume')  # {symbol: last_alert_timestamp}
         
         # Périodes de moyennes mobiles pour le volume
         self.volume_ma_periods = [13, 25, 32, 100, 200, 300]
@@ -74,34 +98,58 @@ class VolumeMonitor:
     def _mark_alert_sent(self, symbol: str):
         """Marque qu'une alerte a été envoyée"""
         self.alert_history[symbol] = datetime.now()
+        self.state_store.mark_sent('volume', symbol, self.alert_history[symbol])
+    
+    def _volume_mas(self, volumes: np.ndarray) -> Dict[str, float]:
+        """
+        MA du volume sur les bougies complètes (une seule passe)
+        
+        Si l'historique est plus court qu'une période, la moyenne de tout l'historique est utilisée.
+        """
+        if len(volumes) == 0:
+            return {f'ma{period}': float('nan') for period in self.volume_ma_periods}
+        
+        with metrics.timer('stage_seconds', monitor='volume', stage='ma_compute'):
+            ma_matrix = sma_matrix(volumes, self.volume_ma_periods)
+        fallback = float(volumes.mean())
+        
+        volume_mas = {}
+        for period, value in sma_at(ma_matrix, self.volume_ma_periods).items():
+            volume_mas[f'ma{period}'] = value if not np.isnan(value) else fallback
+        return volume_mas
     
-    def get_crypto_volume_data(self, symbol: str) -> Optional[Dict]:
-        """Récupère les données de volume crypto (Binance)"""
+    def _crypto_limit(self) -> int:
+        """Bougies 1h nécessaires : MA les plus longues + bougie actuelle"""
+        return max(self.volume_ma_periods) + 2
+    
+    def get_crypto_volume_data(self, symbol: str, candles: Optional[CandleSeries] = None) -> Optional[Dict]:
+        """
+        Récupère les données de volume crypto (Binance)
+        
+        Args:
+            candles: Bougies 1h déjà récupérées (check_all_assets_async), sinon lues via le stockage
+        """
         try:
             # Récupérer suffisamment de bougies pour calculer les MA + volume actuel
-            max_period = max(self.volume_ma_periods)
-            klines_all = self.binance_client.get_klines(
-                symbol=symbol,
-                interval=Client.KLINE_INTERVAL_1HOUR,
-                limit=max_period + 2  # +2 pour avoir la bougie actuelle
-            )
+            if candles is None:
+                candles = self.candle_store.get_candles(
+                    self.binance_client,
+                    symbol,
+                    Client.KLINE_INTERVAL_1HOUR,
+                    self._crypto_limit(),
+                    priority='low'
+                )
             
-            # Volume et prix de la dernière bougie COMPLÈTE (avant-dernière)
-            last_complete_candle = klines_all[-2]
-            current_volume = float(last_complete_candle[5])  # Volume
-            current_price = float(last_complete_candle[4])   # Close
+            # La dernière bougie est en cours, sauf si elle vient de clôturer (mode streaming)
+            now_ms = int(datetime.now().timestamp() * 1000)
+            complete = candles if candles.close_time[-1] < now_ms else candles[:-1]
             
-            # Calculer les moyennes mobiles du volume (exclure la bougie en cours)
-            volume_mas = {}
-            volumes_history = [float(k[5]) for k in klines_all[:-1]]  # Toutes sauf la dernière
+            # Volume et prix de la dernière bougie COMPLÈTE
+            current_volume = float(complete.volume[-1])
+            current_price = float(complete.close[-1])
             
-            for period in self.volume_ma_periods:
-                if len(volumes_history) >= period:
-                    # Prendre les N dernières valeurs
-                    recent_volumes = volumes_history[-period:]
-                    volume_mas[f'ma{period}'] = sum(recent_volumes) / len(recent_volumes)
-                else:
-                    volume_mas[f'ma{period}'] = sum(volumes_history) / len(volumes_history)
+            # Calculer les moyennes mobiles du volume (exclure la bougie en cours)
+            volume_mas = self._volume_mas(complete.volume)
             
             # Références : MA25 pour court terme, MA300 pour long terme
             avg_volume_short = volume_mas.get('ma25', current_volume)
@@ -139,33 +187,33 @@ class VolumeMonitor:
             print(f"❌ Erreur crypto {symbol}: {e}")
             return None
     
-    def get_stock_volume_data(self, symbol: str) -> Optional[Dict]:
-        """Récupère les données de volume stock (Yahoo Finance)"""
+    def get_stock_volume_data(self, symbol: str, history: Optional[pd.DataFrame] = None) -> Optional[Dict]:
+        """
+        Récupère les données de volume stock (Yahoo Finance)
+        
+        Args:
+            history: Historique 1h déjà téléchargé (download_histories), sinon Ticker.history
+        """
         try:
-            ticker = yf.Ticker(symbol)
-            
-            # Données 1h sur période suffisante pour MA300
-            df = ticker.history(period="60d", interval="1h")
+            if history is not None:
+                df = history
+            else:
+                # Données 1h sur période suffisante pour MA300
+                with metrics.timer('fetch_seconds', source='yahoo'):
+                    df = yf.Ticker(symbol).history(period="60d", interval="1h")
             
             if df.empty or len(df) < 25:
                 return None
             
-            df.columns = df.columns.str.lower()
+            candles = CandleSeries.from_frame(df, symbol, '1h')
             
             # Volume actuel (dernière bougie)
-            current_volume = df['volume'].iloc[-1]
-            current_price = df['close'].iloc[-1]
+            current_volume = float(candles.volume[-1])
+            current_price = float(candles.close[-1])
             
             # Calculer les moyennes mobiles du volume : MA13, MA25, MA32, MA100, MA200, MA300
-            volume_mas = {}
-            
-            for period in self.volume_ma_periods:
-                if len(df) >= period + 1:
-                    # Exclure la bougie en cours
-                    volume_mas[f'ma{period}'] = df['volume'].iloc[-period-1:-1].mean()
-                else:
-                    # Si pas assez de données, utiliser ce qu'on a
-                    volume_mas[f'ma{period}'] = df['volume'].iloc[:-1].mean()
+            # (exclure la bougie en cours)
+            volume_mas = self._volume_mas(candles.volume[:-1])
             
             # Références : MA25 pour court terme, MA300 pour long terme
             avg_volume_short = volume_mas.get('ma25', current_volume)
@@ -333,49 +381,120 @@ class VolumeMonitor:
             "timestamp": data['timestamp'].isoformat()
         }
         
-        payload = {"embeds": [embed]}
-        
-        try:
-            response = requests.post(webhook_url, json=payload)
-            if response.status_code == 204:
-                print(f"✅ Alerte envoyée pour {data['symbol']}")
-                self._mark_alert_sent(data['symbol'])
-            else:
-                print(f"❌ Erreur webhook: {response.status_code}")
-        except Exception as e:
-            print(f"❌ Erreur envoi webhook: {e}")
+        # Envoi en arrière-plan : l'alerte est conservée dans l'outbox jusqu'à sa livraison
+        self.dispatcher.send(webhook_url, embed, label=f"Alerte envoyée pour {data['symbol']}")
+        self._mark_alert_sent(data['symbol'])
     
-    def check_all_assets(self) -> List[Dict]:
-        """Vérifie tous les actifs et envoie des alertes si nécessaire"""
+    def plan_binance_cycle(self) -> Dict:
+        """Coût prévu d'un cycle crypto (pire cas : historique complet re-téléchargé)"""
+        requests = [kline_weight(self._crypto_limit())] * len(self.config['assets']['crypto'])
+        return weight_tracker.plan_cycle('volume', requests, self.config.get('check_interval_minutes'))
+
+    async def prefetch_crypto_candles(self) -> Dict[str, CandleSeries]:
+        """
+        Récupère en parallèle les bougies 1h de toutes les cryptos
+
+        Returns:
+            {symbol: bougies} (les échecs sont ignorés et refaits en synchrone)
+        """
+        self.plan_binance_cycle()
+        cryptos = list(self.config['assets']['crypto'])
+        results = await asyncio.gather(*(
+            self.candle_store.get_candles_async(
+                self.async_client, crypto, Client.KLINE_INTERVAL_1HOUR, self._crypto_limit(), priority='low'
+            )
+            for crypto in cryptos
+        ), return_exceptions=True)
+
+        prefetched = {}
+        for crypto, result in zip(cryptos, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ Préchargement klines {crypto}: {result}")
+                continue
+            prefetched[crypto] = result
+        return prefetched
+
+    async def check_all_assets_async(self, markets: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Vérifie tous les actifs : klines crypto récupérées en parallèle sur la boucle,
+        puis évaluation (yfinance et webhooks restent synchrones) dans un thread
+
+        Avec des workers multi-process, les volumes crypto sont calculés dans
+        les workers ; seuls les cooldowns et l'envoi restent ici.
+        """
+        if markets is None:
+            markets = ['crypto', 'stocks']
+
+        prefetched = {}
+        evaluated = {}
+        if 'crypto' in markets and self.workers is not None:
+            evaluated = await self.workers.evaluate_volume(self.config, list(self.config['assets']['crypto']))
+        elif 'crypto' in markets:
+            prefetched = await self.prefetch_crypto_candles()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.check_all_assets, markets, prefetched, evaluated)
+
+    def check_all_assets(self, markets: Optional[List[str]] = None,
+                         prefetched: Optional[Dict[str, CandleSeries]] = None,
+                         evaluated: Optional[Dict[str, Optional[Dict]]] = None) -> List[Dict]:
+        """
+        Vérifie tous les actifs et envoie des alertes si nécessaire
+
+        Args:
+            markets: Marchés à vérifier ('crypto', 'stocks'), tous par défaut
+            prefetched: Bougies 1h crypto déjà récupérées {symbol: CandleSeries}
+            evaluated: Cryptos déjà vérifiées par les workers {symbol: données du pic ou None} ;
+                       les autres sont vérifiées ici
+        """
+        prefetched = prefetched or {}
+        evaluated = evaluated or {}
         alerts_sent = []
+
+        if markets is None:
+            markets = ['crypto', 'stocks']
         
         # Vérifier cryptos
-        for crypto in self.config['assets']['crypto']:
-            data = self.get_crypto_volume_data(crypto)
-            if data:
-                alert_level = self.detect_spike(data)
-                if alert_level:
-                    self.send_discord_alert(data, alert_level)
-                    alerts_sent.append({
-                        'symbol': crypto,
-                        'level': alert_level,
-                        'increase': data['increase_24h']
-                    })
+        if 'crypto' in markets:
+            if not prefetched:
+                self.plan_binance_cycle()
+            for crypto in self.config['assets']['crypto']:
+                if crypto in evaluated:
+                    alerts_sent.extend(self._check_spike(evaluated[crypto]))
+                    continue
+                alerts_sent.extend(self.check_crypto_asset(crypto, prefetched.get(crypto)))
         
         # Vérifier stocks
-        for stock in self.config['assets']['stocks']:
-            data = self.get_stock_volume_data(stock)
-            if data:
-                alert_level = self.detect_spike(data)
-                if alert_level:
-                    self.send_discord_alert(data, alert_level)
-                    alerts_sent.append({
-                        'symbol': stock,
-                        'level': alert_level,
-                        'increase': data['increase_24h']
-                    })
+        if 'stocks' in markets:
+            # Une seule requête Yahoo groupée pour toutes les actions
+            histories = download_histories(self.config['assets']['stocks'], "60d", "1h")
+            for stock in self.config['assets']['stocks']:
+                data = self.get_stock_volume_data(stock, histories.get(stock))
+                alerts_sent.extend(self._check_spike(data))
         
+        metrics.inc('alerts_total', len(alerts_sent), monitor='volume')
         return alerts_sent
+
+    def check_crypto_asset(self, symbol: str, candles: Optional[CandleSeries] = None) -> List[Dict]:
+        """Vérifie une crypto (appelé aussi à chaque clôture de bougie 1h en streaming)"""
+        data = self.get_crypto_volume_data(symbol, candles)
+        return self._check_spike(data)
+
+    def _check_spike(self, data: Optional[Dict]) -> List[Dict]:
+        """Détecte un pic et envoie l'alerte si nécessaire"""
+        if not data:
+            return []
+
+        alert_level = self.detect_spike(data)
+        if not alert_level:
+            return []
+
+        self.send_discord_alert(data, alert_level)
+        return [{
+            'symbol': data['symbol'],
+            'level': alert_level,
+            'increase': data['increase_24h']
+        }]
     
     def get_current_status(self) -> Dict:
         """Récupère l'état actuel de tous les actifs"""
@@ -389,8 +508,9 @@ class VolumeMonitor:
             if data:
                 status['crypto'].append(data)
         
+        histories = download_histories(self.config['assets']['stocks'], "60d", "1h")
         for stock in self.config['assets']['stocks']:
-            data = self.get_stock_volume_data(stock)
+            data = self.get_stock_volume_data(stock, histories.get(stock))
             if data:
                 status['stocks'].append(data)
         
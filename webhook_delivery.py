@@ -0,0 +1,273 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import metrics
+
+# Limites Discord d'un message webhook
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+# Délai max entre deux tentatives d'un message en échec (secondes)
+MAX_RETRY_DELAY = 300
+
+
+def embed_size(embed: Dict) -> int:
+    """Nombre de caractères d'un embed tel que compté par Discord"""
+    size = len(embed.get('title', '')) + len(embed.get('description', ''))
+    size += len(embed.get('footer', {}).get('text', ''))
+    size += len(embed.get('author', {}).get('name', ''))
+    for field in embed.get('fields', []):
+        size += len(field.get('name', '')) + len(field.get('value', ''))
+    return size
+
+
+class WebhookDispatcher:
+    """
+    Envoi asynchrone des alertes Discord (file durable par webhook)
+
+    Les embeds sont d'abord écrits dans une outbox SQLite, puis envoyés par un
+    thread dédié à chaque URL : la boucle de surveillance ne bloque jamais sur
+    HTTP. Chaque thread regroupe jusqu'à 10 embeds par message, respecte les
+    en-têtes de bucket Discord (X-RateLimit-*) et le retry_after des 429, et
+    retente les échecs réseau/5xx avec un délai croissant, y compris après
+    un redémarrage du bot.
+    """
+
+    def __init__(self, db_file: str = "webhooks.db", timeout: float = 10, pool_size: int = 10):
+        """
+        Args:
+            db_file: Fichier SQLite de l'outbox
+            timeout: Timeout d'une requête webhook (secondes)
+            pool_size: Connexions keep-alive conservées par hôte
+        """
+        self.db_file = db_file
+        self.timeout = timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._workers: Dict[str, threading.Thread] = {}
+        self._wakeups: Dict[str, threading.Event] = {}
+        self._workers_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.stats = {'sent_messages': 0, 'sent_embeds': 0, 'rate_limited': 0, 'retries': 0, 'dropped': 0}
+
+        self._init_db()
+        # Reprendre les envois restés en attente avant un redémarrage
+        for url in self._pending_urls():
+            self._wake(url)
+
+    def _init_db(self):
+        """Crée la table outbox si nécessaire"""
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    embed TEXT NOT NULL,
+                    label TEXT,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt REAL DEFAULT 0
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_url ON outbox (url, id)")
+            self._conn.commit()
+
+    def _pending_urls(self) -> List[str]:
+        with self._db_lock:
+            rows = self._conn.execute("SELECT DISTINCT url FROM outbox").fetchall()
+        return [row[0] for row in rows]
+
+    def send(self, url: str, embed: Dict, label: Optional[str] = None):
+        """
+        Met un embed en file d'envoi (retour immédiat)
+
+        Args:
+            url: URL du webhook Discord
+            embed: Embed Discord (dict)
+            label: Texte affiché dans les logs une fois l'embed envoyé
+        """
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT INTO outbox (url, embed, label, created_at) VALUES (?, ?, ?, ?)",
+                (url, json.dumps(embed), label, time.time())
+            )
+            self._conn.commit()
+        self._wake(url)
+
+    def _wake(self, url: str):
+        """Réveille (ou démarre) le thread d'envoi d'une URL"""
+        with self._workers_lock:
+            if self._stopping.is_set():
+                return
+            event = self._wakeups.setdefault(url, threading.Event())
+            worker = self._workers.get(url)
+            if worker is None or not worker.is_alive():
+                worker = threading.Thread(target=self._run, args=(url, event), daemon=True,
+                                          name=f"webhook-{len(self._workers)}")
+                self._workers[url] = worker
+                worker.start()
+        event.set()
+
+    def _next_batch(self, url: str, max_embeds: int) -> tuple:
+        """
+        Prochains embeds prêts pour une URL
+
+        Returns:
+            (lignes [(id, embed, label, attempts)], secondes avant le prochain envoi prévu ou None)
+        """
+        now = time.time()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, embed, label, attempts, next_attempt FROM outbox WHERE url = ? ORDER BY id LIMIT ?",
+                (url, MAX_EMBEDS_PER_MESSAGE)
+            ).fetchall()
+
+        if not rows:
+            return [], None
+        # Respecter l'ordre : on n'envoie pas au-delà d'un message en attente de nouvelle tentative
+        if rows[0][4] > now:
+            return [], rows[0][4] - now
+
+        batch = []
+        chars = 0
+        for row_id, embed, label, attempts, next_attempt in rows:
+            embed = json.loads(embed)
+            size = embed_size(embed)
+            if next_attempt > now or len(batch) >= max_embeds:
+                break
+            if batch and chars + size > MAX_EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append((row_id, embed, label, attempts))
+            chars += size
+        return batch, 0
+
+    def _delete(self, ids: List[int]):
+        with self._db_lock:
+            self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def _postpone(self, batch: List[tuple]) -> float:
+        """Reporte un lot en échec (délai croissant) ; retourne le délai appliqué"""
+        attempts = max(row[3] for row in batch) + 1
+        delay = min(2 ** attempts, MAX_RETRY_DELAY)
+        with self._db_lock:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = ?, next_attempt = ? WHERE id = ?",
+                [(attempts, time.time() + delay, row[0]) for row in batch]
+            )
+            self._conn.commit()
+        self.stats['retries'] += 1
+        return delay
+
+    def _run(self, url: str, event: threading.Event):
+        """Boucle d'envoi d'une URL"""
+        # Un 400 sur un lot est retenté embed par embed pour isoler l'embed invalide
+        max_embeds = MAX_EMBEDS_PER_MESSAGE
+
+        while not self._stopping.is_set():
+            event.clear()
+            batch, wait = self._next_batch(url, max_embeds)
+            if not batch:
+                event.wait(wait)
+                continue
+
+            started = time.perf_counter()
+            try:
+                response = self._session.post(
+                    url, json={"embeds": [row[1] for row in batch]}, timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                metrics.observe('webhook_seconds', time.perf_counter() - started, status='error')
+                delay = self._postpone(batch)
+                print(f"❌ Erreur envoi webhook ({len(batch)} alerte(s)): {e} - nouvelle tentative dans {delay}s")
+                continue
+            metrics.observe('webhook_seconds', time.perf_counter() - started, status=str(response.status_code))
+
+            if response.status_code == 429:
+                self.stats['rate_limited'] += 1
+                retry_after = self._retry_after(response)
+                print(f"⏳ Webhook limité par Discord - reprise dans {retry_after:.1f}s")
+                self._stopping.wait(retry_after)
+                continue
+
+            if response.ok:
+                self._delete([row[0] for row in batch])
+                self.stats['sent_messages'] += 1
+                self.stats['sent_embeds'] += len(batch)
+                metrics.inc('webhook_embeds_total', len(batch), result='sent')
+                for row in batch:
+                    if row[2]:
+                        print(f"✅ {row[2]}")
+                max_embeds = MAX_EMBEDS_PER_MESSAGE
+            elif response.status_code >= 500:
+                delay = self._postpone(batch)
+                print(f"❌ Erreur webhook: {response.status_code} - nouvelle tentative dans {delay}s")
+                continue
+            elif len(batch) > 1:
+                print(f"⚠️ Erreur webhook: {response.status_code} - renvoi alerte par alerte")
+                max_embeds = 1
+                continue
+            else:
+                # Embed refusé (400) ou webhook supprimé (401/403/404) : inutile de réessayer
+                self._delete([batch[0][0]])
+                self.stats['dropped'] += 1
+                metrics.inc('webhook_embeds_total', result='dropped')
+                print(f"❌ Erreur webhook: {response.status_code} - alerte abandonnée: {batch[0][2] or ''}")
+
+            # Bucket épuisé : attendre sa réinitialisation avant le message suivant
+            if response.headers.get('X-RateLimit-Remaining') == '0':
+                reset_after = response.headers.get('X-RateLimit-Reset-After')
+                if reset_after:
+                    self._stopping.wait(float(reset_after))
+
+    @staticmethod
+    def _retry_after(response) -> float:
+        """Délai demandé par un 429 (corps JSON, sinon en-têtes)"""
+        try:
+            retry_after = response.json().get('retry_after')
+        except ValueError:
+            retry_after = None
+        if retry_after is None:
+            retry_after = (response.headers.get('Retry-After')
+                           or response.headers.get('X-RateLimit-Reset-After') or 1)
+        return float(retry_after)
+
+    def pending(self) -> int:
+        """Nombre d'embeds en attente d'envoi"""
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def flush(self, timeout: float = 10) -> bool:
+        """Attend que l'outbox soit vide (ou le timeout) ; True si tout est envoyé"""
+        deadline = time.time() + timeout
+        while self.pending():
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self):
+        """Arrête les threads d'envoi (les embeds non envoyés restent dans l'outbox)"""
+        self._stopping.set()
+        with self._workers_lock:
+            workers = list(self._workers.values())
+            for event in self._wakeups.values():
+                event.set()
+        for worker in workers:
+            worker.join(timeout=self.timeout)
+        self._session.close()
+        with self._db_lock:
+            self._conn.close()
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class WorkerPoolFull(Exception):
+    """Trop de tâches en attente : la demande est refusée plutôt que mise en file indéfiniment"""
+
+
+class WorkerPool:
+    """
+    Exécuteur borné pour le travail bloquant des commandes (yfinance, recherches)
+
+    Les appels bloquants tournent dans un pool de threads dédié : la boucle
+    asyncio du bot (heartbeat Discord) n'attend jamais une requête HTTP. La
+    file d'attente est limitée, et les demandes identiques simultanées
+    (même `key`) partagent un seul calcul (single-flight).
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 32, name: str = "commands"):
+        """
+        Args:
+            max_workers: Threads d'exécution
+            max_queue: Tâches en attente max (au-delà : WorkerPoolFull)
+            name: Préfixe des noms de threads
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0             # Tâches soumises et non terminées
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {'submitted': 0, 'coalesced': 0, 'rejected': 0}
+
+    async def run(self, func: Callable, *args, key: Optional[Hashable] = None) -> Any:
+        """
+        Exécute func(*args) dans le pool et attend le résultat
+
+        Args:
+            key: Clé de coalescence ; un appel avec une clé déjà en cours
+                 attend le même résultat au lieu de relancer func
+
+        Raises:
+            WorkerPoolFull: File d'attente pleine
+        """
+        if key is not None and key in self._inflight:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.stats['rejected'] += 1
+                raise WorkerPoolFull(f"{self._pending} tâches en cours, réessayer dans quelques secondes")
+            self._pending += 1
+        self.stats['submitted'] += 1
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._call, func, args)
+        if key is not None:
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def _call(self, func: Callable, args: tuple) -> Any:
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def status(self) -> Dict:
+        """Charge actuelle du pool"""
+        with self._lock:
+            pending = self._pending
+        return {
+            'running': min(pending, self.max_workers),
+            'queued': max(0, pending - self.max_workers),
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'inflight_keys': len(self._inflight),
+            **self.stats
+        }
+
+    def shutdown(self):
+        """Arrête le pool (les tâches en cours se terminent)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
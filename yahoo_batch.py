@@ -0,0 +1,89 @@
+from typing import Dict, List
+
+import pandas as pd
+import yfinance as yf
+
+from metrics import metrics
+
+
+def _history(symbol: str, period: str, interval: str) -> pd.DataFrame:
+    """Historique d'un seul symbole (repli quand le téléchargement groupé échoue)"""
+    try:
+        with metrics.timer('fetch_seconds', source='yahoo'):
+            return yf.Ticker(symbol).history(period=period, interval=interval)
+    except Exception as e:
+        print(f"❌ Erreur Yahoo {symbol}: {e}")
+        return pd.DataFrame()
+
+
+def _split(data: pd.DataFrame, symbol: str, single: bool) -> pd.DataFrame:
+    """Extrait le DataFrame d'un symbole d'un téléchargement multi-tickers"""
+    if data is None or data.empty:
+        return pd.DataFrame()
+
+    if isinstance(data.columns, pd.MultiIndex):
+        key = symbol.upper()
+        if key not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        df = data[key]
+    elif single:
+        df = data
+    else:
+        return pd.DataFrame()
+
+    # L'index est l'union des dates de tous les symboles : retirer les lignes vides
+    return df.dropna(how='all').copy()
+
+
+def download_histories(symbols: List[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+    """
+    Télécharge l'historique de plusieurs symboles Yahoo en une seule requête groupée
+
+    Les DataFrames retournés ont les mêmes colonnes que Ticker.history
+    (Open, High, Low, Close, Volume). Un symbole absent ou vide du
+    téléchargement groupé est récupéré individuellement.
+
+    Args:
+        symbols: Symboles yfinance (AAPL, ^GSPC, ...)
+        period: Période yfinance ('60d', 'max', ...)
+        interval: Interval yfinance ('1h', '1d', ...)
+
+    Returns:
+        {symbol: DataFrame} pour chaque symbole (DataFrame vide en cas d'échec)
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+
+    try:
+        with metrics.timer('fetch_seconds', source='yahoo_batch'):
+            data = yf.download(
+                symbols,
+                period=period,
+                interval=interval,
+                group_by='ticker',
+                auto_adjust=True,
+                ignore_tz=False,
+                threads=True,
+                progress=False
+            )
+    except Exception as e:
+        print(f"⚠️ Téléchargement Yahoo groupé échoué ({len(symbols)} symboles): {e}")
+        data = None
+
+    histories = {}
+    failed = []
+    for symbol in symbols:
+        df = _split(data, symbol, single=len(symbols) == 1)
+        if df.empty:
+            failed.append(symbol)
+        else:
+            histories[symbol] = df
+
+    for symbol in failed:
+        histories[symbol] = _history(symbol, period, interval)
+
+    if failed:
+        print(f"⚠️ Yahoo: {len(failed)} symbole(s) récupéré(s) individuellement: {', '.join(failed)}")
+
+    return histories